@@ -0,0 +1,161 @@
+"""
+Response compression negotiated per request.
+
+Brotli is preferred when the client accepts it and the brotli package is
+installed, gzip otherwise. Bodies under COMPRESSION_MIN_SIZE are sent as
+they are, since compressing them costs more than it saves. Streaming
+responses are compressed as they are produced, except server-sent event
+streams, whose events must reach the client as soon as they are written.
+"""
+import gzip
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+_accept_encoding_re = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+# Media types that are already compressed or must not be buffered
+SKIP_CONTENT_TYPES = ('text/event-stream', 'image/', 'video/', 'audio/', 'application/zip', 'application/gzip')
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header (q=0 marks a refused coding)"""
+    accepted = {}
+    for part in header.split(','):
+        match = _accept_encoding_re.fullmatch(part)
+        if not match:
+            continue
+        try:
+            quality = float(match[2]) if match[2] is not None else 1.0
+        except ValueError:
+            continue
+        accepted[match[1].lower()] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """The coding to respond with ('br' or 'gzip'), or None to send the body as is"""
+    accepted = accepted_encodings(header or '')
+    wildcard = accepted.get('*', 0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0
+    for coding in candidates:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31: gzip container
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compress response bodies with brotli or gzip, whichever the client prefers"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.gzip_level = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def compress(self, coding, content):
+        if coding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        return gzip.compress(content, compresslevel=self.gzip_level, mtime=0)
+
+    def _stream(self, coding):
+        if coding == 'br':
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if response.has_header('Content-Encoding') or content_type.startswith(SKIP_CONTENT_TYPES):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        # The body depends on Accept-Encoding from here on, even when sent as is
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if coding is None:
+            return response
+
+        if response.streaming:
+            stream = self._stream(coding)
+            if response.is_async:
+                response.streaming_content = self._compress_async(stream, response.streaming_content)
+            else:
+                response.streaming_content = self._compress_sync(stream, response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = self.compress(coding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The compressed body is a different representation of the resource:
+        # a strong ETag must not match both (same rule as GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = coding
+        return response
+
+    @staticmethod
+    def _compress_sync(stream, chunks):
+        for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+
+    @staticmethod
+    async def _compress_async(stream, chunks):
+        async for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
@@ -0,0 +1,85 @@
+"""
+Fast JSON rendering for API responses.
+
+Uses orjson when it is installed: it serializes datetimes, dates, UUIDs and
+numpy arrays natively and is several times faster than the stdlib encoder
+on the large nested payloads the historical and financials endpoints
+return. Without orjson (or for the rare value it cannot encode, such as an
+integer beyond 64 bits) rendering falls back to the stdlib encoder DRF
+uses, with the same output.
+"""
+import json
+import math
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+_fallback_encoder = JSONEncoder()
+
+
+def _default(obj):
+    """Types orjson leaves to the caller, encoded the way DRF's JSONEncoder does"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    return _fallback_encoder.default(obj)
+
+
+def _escape_line_separators(content):
+    # Same as DRF: keep the output a strict JavaScript subset
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+def _finite(obj):
+    """Copy of obj with NaN and infinity replaced by None, as orjson writes them"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    if hasattr(obj, 'tolist'):
+        # numpy arrays and scalars, which DRF's encoder would turn into lists
+        return _finite(obj.tolist())
+    return obj
+
+
+def dumps(data):
+    """Serialize data to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        try:
+            return _escape_line_separators(orjson.dumps(data, default=_default, option=ORJSON_OPTIONS))
+        except orjson.JSONEncodeError:
+            pass
+    content = json.dumps(
+        _finite(data), cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'), allow_nan=False
+    )
+    return _escape_line_separators(content.encode())
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer backed by orjson.
+
+    Compact output only: requests for indented JSON (e.g. from the
+    browsable API) are rendered by the stdlib JSONRenderer. NaN and
+    infinity are written as null instead of raising.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or orjson is None:
+            return super().render(_finite(data), accepted_media_type, renderer_context)
+        return dumps(data)
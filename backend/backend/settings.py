@@ -39,7 +39,7 @@ CORS_ALLOW_ALL_ORIGINS = True
 # REST framework basic setup
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'backend.renderers.FastJSONRenderer',
     ],
 }
 
@@ -62,6 +62,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'backend.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -107,6 +108,11 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # Concurrent bar-store writers wait for the lock instead of failing
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
         }
     }
 
@@ -158,3 +164,106 @@ SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
 
 FIREBASE_ADMIN_CREDENTIAL = "firebase-service-account.json"
 FIREBASE_AUTH_HEADER = "HTTP_AUTHORIZATION"  
+
+# Response compression (backend/middleware.py): brotli or gzip, as the client
+# prefers, for bodies of at least COMPRESSION_MIN_SIZE bytes
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Polygon.io HTTP client (shared, pooled connection per process)
+POLYGON_CONNECT_TIMEOUT = float(os.getenv('POLYGON_CONNECT_TIMEOUT', '3.05'))
+POLYGON_READ_TIMEOUT = float(os.getenv('POLYGON_READ_TIMEOUT', '10'))
+POLYGON_MAX_RETRIES = int(os.getenv('POLYGON_MAX_RETRIES', '3'))
+POLYGON_RETRY_BACKOFF = 0.3
+POLYGON_RETRY_JITTER = 0.3
+POLYGON_POOL_CONNECTIONS = 10
+POLYGON_POOL_MAXSIZE = 20
+POLYGON_MAX_CONCURRENCY = int(os.getenv('POLYGON_MAX_CONCURRENCY', '16'))
+# Connection pool of the async client used by the /api/stock/async/ views
+# (one per event loop); requests beyond it queue for a connection
+POLYGON_ASYNC_MAX_CONNECTIONS = int(os.getenv('POLYGON_ASYNC_MAX_CONNECTIONS', '200'))
+POLYGON_ASYNC_MAX_KEEPALIVE = 50
+
+# Polygon.io call budget shared by every worker using the key (token bucket,
+# see stock/rate_limit.py); 0 disables it. State lives in a locked file
+# ('file', one host) or in the Django cache ('cache', needs a shared CACHES
+# backend). Background work (refreshes, pre-warming, index rebuilds) leaves
+# the reserve tokens to interactive requests. Waits are the seconds a call
+# may queue for a token before failing over to stored data.
+POLYGON_RATE_LIMIT_PER_MINUTE = int(os.getenv('POLYGON_RATE_LIMIT_PER_MINUTE', '0'))
+POLYGON_RATE_LIMIT_BACKEND = os.getenv('POLYGON_RATE_LIMIT_BACKEND', 'file')
+POLYGON_RATE_LIMIT_FILE = os.getenv('POLYGON_RATE_LIMIT_FILE', str(BASE_DIR / 'polygon_rate_limit.json'))
+POLYGON_RATE_LIMIT_BURST = None
+POLYGON_RATE_LIMIT_INTERACTIVE_RESERVE = None
+POLYGON_RATE_LIMIT_WAITS = {
+    'interactive': 5,
+    'background': 30,
+}
+
+# Stock data service
+STOCK_BATCH_WORKERS = int(os.getenv('STOCK_BATCH_WORKERS', '8'))
+
+# Cached market data freshness: short TTLs (seconds) during the regular
+# session, then keep data until the next open (see stock/freshness.py)
+STOCK_FRESHNESS_POLICY = 'stock.freshness.MarketSessionFreshnessPolicy'
+STOCK_FRESHNESS_OPTIONS = {
+    'ttls': {
+        'quote': 60,
+        'ohlc': 60,
+        'news': 5 * 60,
+        'financials': 6 * 60 * 60,
+    },
+    'settle_seconds': 15 * 60,
+}
+
+# Coalesce concurrent quote refreshes for the same ticker. Set distributed to
+# True to also elect one leader across workers (needs a shared CACHES backend)
+STOCK_SINGLEFLIGHT_DISTRIBUTED = os.getenv('STOCK_SINGLEFLIGHT_DISTRIBUTED', 'false').lower() == 'true'
+STOCK_SINGLEFLIGHT_LEASE_SECONDS = 15
+
+# Stale-while-revalidate: quotes that expired less than this many seconds ago
+# are served immediately (source "stale") and refreshed in the background.
+# 0 disables it.
+STOCK_STALE_GRACE_SECONDS = int(os.getenv('STOCK_STALE_GRACE_SECONDS', '900'))
+STOCK_REFRESH_WORKERS = 4
+
+# Historical bars: long ranges are split into windows fetched concurrently
+POLYGON_HISTORY_WINDOW_DAYS = 365
+POLYGON_HISTORY_MAX_CONCURRENCY = 4
+
+# Local ticker search index: snapshot file and how old (seconds) it may get
+# before a background rebuild from Polygon.io reference tickers
+STOCK_TICKER_INDEX_PATH = os.getenv('STOCK_TICKER_INDEX_PATH', str(BASE_DIR / 'ticker_index.json'))
+STOCK_TICKER_INDEX_MAX_AGE = 24 * 60 * 60
+# Seconds to wait after a failed rebuild before trying again
+STOCK_TICKER_INDEX_RETRY_INTERVAL = 15 * 60
+
+# Live ticker search results cache (used until the ticker index exists)
+STOCK_SEARCH_CACHE_SIZE = 1024
+STOCK_SEARCH_CACHE_TTL = 60 * 60
+
+# In-process L1 cache of fresh quote rows in front of the database; entries
+# also expire after this many seconds so other workers' writes are seen
+STOCK_QUOTE_CACHE_SIZE = 2048
+STOCK_QUOTE_CACHE_MAX_TTL = 60
+
+# Watchlist quote pre-warming (manage.py prewarm_quotes): upstream call
+# budget, how early before expiry to refresh, and seconds between passes
+STOCK_PREWARM_CALLS_PER_MINUTE = int(os.getenv('STOCK_PREWARM_CALLS_PER_MINUTE', '60'))
+STOCK_PREWARM_LEAD_SECONDS = 15
+STOCK_PREWARM_INTERVAL = 10
+
+# Browser/CDN caching of historical, financials and news responses: max-age
+# follows the data's freshness, capped at this many seconds
+STOCK_HTTP_MAX_AGE = 24 * 60 * 60
+
+# Live quote stream (/api/stock/async/stream/, ASGI only): each symbol is
+# polled when its cached quote expires, kept within these bounds (seconds);
+# failed or rate-limited polls back off from STOCK_STREAM_RETRY_INTERVAL,
+# doubling each time; idle streams get a keepalive comment every
+# STOCK_STREAM_HEARTBEAT seconds
+STOCK_STREAM_MIN_INTERVAL = 5
+STOCK_STREAM_MAX_INTERVAL = 15 * 60
+STOCK_STREAM_RETRY_INTERVAL = 30
+STOCK_STREAM_HEARTBEAT = 15
@@ -0,0 +1,64 @@
+import gzip
+import json
+from unittest import mock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from backend import renderers
+from backend.middleware import CompressionMiddleware, choose_encoding
+from backend.renderers import FastJSONRenderer, dumps
+
+
+class DumpsTests(SimpleTestCase):
+    data = {"close": float('nan'), "prices": [1.5, float('inf'), (-float('inf'),)], "note": "a\u2028b"}
+    expected = {"close": None, "prices": [1.5, None, [None]], "note": "a\u2028b"}
+
+    def test_non_finite_floats_become_null(self):
+        self.assertEqual(json.loads(dumps(self.data)), self.expected)
+
+    def test_stdlib_fallback_matches(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            content = dumps(self.data)
+        self.assertNotIn(b'NaN', content)
+        self.assertIn(b'\\u2028', content)
+        self.assertEqual(json.loads(content), self.expected)
+
+    def test_indented_render_writes_null(self):
+        content = FastJSONRenderer().render(self.data, 'application/json; indent=2')
+        self.assertEqual(json.loads(content), self.expected)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"prices": [' + b'1.0, ' * 1000 + b'1.0]}'
+
+    def process(self, response, accept_encoding='gzip, deflate, br'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_compresses_large_json(self):
+        response = self.process(HttpResponse(self.body, content_type='application/json'), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_refused_coding_is_not_used(self):
+        response = self.process(HttpResponse(self.body, content_type='application/json'), 'gzip;q=0, *;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIsNone(choose_encoding('identity'))
+
+    def test_small_bodies_are_sent_as_is(self):
+        response = self.process(HttpResponse(b'{}', content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_json_is_compressed_as_it_goes(self):
+        chunks = [self.body[:100], self.body[100:]]
+        response = self.process(StreamingHttpResponse(iter(chunks), content_type='application/json'), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.body)
+
+    def test_event_streams_are_not_compressed(self):
+        events = [b'event: quote\ndata: {}\n\n'] * 100
+        response = self.process(StreamingHttpResponse(iter(events), content_type='text/event-stream'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(list(response.streaming_content), events)
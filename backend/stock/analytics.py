@@ -0,0 +1,76 @@
+"""
+Cross-sectional return statistics for several tickers.
+
+Closing prices are aligned on the union of their trading dates and turned
+into log returns; covariance and correlation are then computed for every
+pair at once with masked matrix products, using each pair's overlapping
+observations (pairwise-complete), so there is no Python loop over pairs.
+"""
+import numpy as np
+
+
+def align_closes(closes_by_ticker, tickers):
+    """
+    Align {ticker: [(date, close), ...]} on a shared, sorted date index.
+
+    Returns:
+        (dates, prices) where prices is a (len(dates), len(tickers)) float
+        array with NaN for dates a ticker has no bar on.
+    """
+    dates = sorted({day for ticker in tickers for day, _ in closes_by_ticker[ticker]})
+    row = {day: i for i, day in enumerate(dates)}
+    prices = np.full((len(dates), len(tickers)), np.nan)
+    for column, ticker in enumerate(tickers):
+        series = closes_by_ticker[ticker]
+        if series:
+            rows = [row[day] for day, _ in series]
+            prices[rows, column] = [close for _, close in series]
+    return dates, prices
+
+
+def log_returns(prices):
+    """Day-over-day log returns; NaN where either end of the step is missing"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.log(np.where(prices > 0, prices, np.nan))
+    return np.diff(logs, axis=0)
+
+
+def return_matrices(returns, min_periods=2):
+    """
+    Pairwise-complete covariance and correlation of return columns.
+
+    Args:
+        returns: (T, N) array of returns with NaN for missing observations
+        min_periods: Fewest overlapping observations a pair needs; pairs
+            with fewer get NaN
+
+    Returns:
+        (covariance, correlation, counts) as (N, N) arrays; counts holds the
+        number of overlapping observations behind every entry.
+    """
+    valid = ~np.isnan(returns)
+    mask = valid.astype(float)
+    values = np.where(valid, returns, 0.0)
+
+    counts = mask.T @ mask
+    # sums[a, b]: sum of a's returns over the dates both a and b have one
+    sums = values.T @ mask
+    squares = (values * values).T @ mask
+    products = values.T @ values
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = (products - sums * sums.T / counts) / (counts - 1)
+        variance = (squares - sums * sums / counts) / (counts - 1)
+        correlation = covariance / np.sqrt(variance * variance.T)
+
+    insufficient = counts < max(min_periods, 2)
+    covariance[insufficient] = np.nan
+    correlation[insufficient] = np.nan
+    # Rounding can push perfectly (anti-)correlated pairs just past +/-1
+    np.clip(correlation, -1.0, 1.0, out=correlation)
+    return covariance, correlation, counts.astype(int)
+
+
+def matrix_to_lists(matrix):
+    """Nested lists for JSON, with None in place of NaN"""
+    return [[None if np.isnan(v) else v for v in row] for row in matrix.tolist()]
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class StockConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stock'
+
+    def ready(self):
+        # Load the ticker search index snapshot (if any) before the first search
+        from .ticker_index import get_ticker_index
+        get_ticker_index()
@@ -0,0 +1,307 @@
+"""
+Local store of daily OHLCV bars with incremental gap filling.
+
+Bars are kept per (ticker, date) in DailyBar, and BarCoverage records which
+date intervals have been fetched completely. A range request only goes to
+Polygon.io for the sub-intervals that are not covered yet; everything else
+is answered from the database. Results can be consumed as a generator so
+long ranges never have to be held in memory at once.
+"""
+import itertools
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from .freshness import OHLC, get_freshness_policy
+from .market_calendar import get_trading_calendar
+from .models import BarCoverage, DailyBar, DatasetSync
+
+ONE_DAY = timedelta(days=1)
+
+# Polygon.io finalizes a session's daily aggregate shortly after the close;
+# until then the bar may still change and is not marked as covered
+BAR_SETTLE_DELAY = timedelta(hours=1)
+
+# Bars written (and read back) per database round-trip
+SAVE_BATCH_SIZE = 2000
+
+# DatasetSync rows recording when an unsettled session was last fetched,
+# keyed "<ticker>:<date>"; Polygon.io may have no bar for it yet
+ATTEMPTS_DATASET = 'bar_session'
+
+
+def bar_date(polygon_bar):
+    """Session date of a Polygon.io aggregate bar (its 't' is epoch ms)"""
+    return datetime.fromtimestamp(polygon_bar["t"] / 1000, tz=dt_timezone.utc).date()
+
+
+class HistoricalBarStore:
+    """Serve daily bars for a ticker and date range, fetching only the gaps"""
+
+    def __init__(self, polygon_service, calendar=None, freshness=None):
+        self.polygon_service = polygon_service
+        self.calendar = calendar or get_trading_calendar()
+        self.freshness = freshness or get_freshness_policy()
+
+    def get_bars(self, ticker, from_date, to_date):
+        """
+        Return (prices, fetched_upstream) for [from_date, to_date].
+
+        prices is a list of {date, open, high, low, close, volume} dicts in
+        date order; fetched_upstream tells whether Polygon.io was called.
+        """
+        intervals = self.missing_intervals(ticker, from_date, to_date)
+        return list(self.iter_bars(ticker, from_date, to_date, intervals)), bool(intervals)
+
+    def iter_bars(self, ticker, from_date, to_date, intervals=None):
+        """
+        Yield price dicts for [from_date, to_date] in date order, reading
+        covered dates from the database and streaming missing intervals from
+        Polygon.io (saved in batches as they arrive).
+
+        Args:
+            intervals: Result of missing_intervals(), if already computed
+        """
+        if intervals is None:
+            intervals = self.missing_intervals(ticker, from_date, to_date)
+
+        cursor = from_date
+        for start, end in intervals:
+            if cursor < start:
+                yield from self._iter_stored(ticker, cursor, start - ONE_DAY)
+            yield from self._iter_fetched(ticker, start, end)
+            cursor = end + ONE_DAY
+        if cursor <= to_date:
+            yield from self._iter_stored(ticker, cursor, to_date)
+
+    def _iter_stored(self, ticker, from_date, to_date):
+        bars = DailyBar.objects.filter(
+            ticker=ticker, date__gte=from_date, date__lte=to_date
+        ).order_by('date')
+        for bar in bars.iterator(chunk_size=SAVE_BATCH_SIZE):
+            yield bar.as_price()
+
+    def _iter_fetched(self, ticker, start, end):
+        """Stream one missing interval from Polygon.io, saving and yielding it batch by batch"""
+        settled = self.settled_through()
+        upstream = self.polygon_service.iter_historical_prices(ticker, start, end)
+        while True:
+            batch = self.save_bars(ticker, itertools.islice(upstream, SAVE_BATCH_SIZE))
+            for bar in batch:
+                yield bar.as_price()
+            if len(batch) < SAVE_BATCH_SIZE:
+                break
+        self._record_coverage(ticker, start, end, settled)
+        self._record_attempts(ticker, start, end, settled)
+
+    def save_fetched(self, ticker, start, end, results, settled):
+        """
+        Store an interval fetched in full from Polygon.io and mark it covered
+
+        Args:
+            settled: settled_through() as of before the fetch started
+        """
+        for offset in range(0, len(results), SAVE_BATCH_SIZE):
+            self.save_bars(ticker, results[offset:offset + SAVE_BATCH_SIZE])
+        self._record_coverage(ticker, start, end, settled)
+        self._record_attempts(ticker, start, end, settled)
+
+    def settled_through(self, now=None):
+        """Last session date whose bar is final"""
+        now = now or timezone.now()
+        return self.calendar.last_completed_session(now - BAR_SETTLE_DELAY)
+
+    def missing_intervals(self, ticker, from_date, to_date, now=None, record_coverage=True):
+        """
+        Sub-intervals of [from_date, to_date] that must be fetched upstream.
+
+        Settled history is missing when it is not covered by a BarCoverage
+        row. Unsettled sessions (today, or a session that just closed) are
+        refetched whenever their stored bar is no longer fresh, or, when
+        Polygon.io had no bar for them yet, once the last attempt is no
+        longer fresh.
+
+        Args:
+            record_coverage: Mark gaps without sessions (weekends, holidays)
+                as covered; False keeps the lookup read-only
+        """
+        now = now or timezone.now()
+        settled = self.settled_through(now)
+        intervals = []
+
+        settled_end = min(to_date, settled)
+        if from_date <= settled_end:
+            covered = BarCoverage.objects.filter(
+                ticker=ticker, start_date__lte=settled_end, end_date__gte=from_date
+            ).order_by('start_date').values_list('start_date', 'end_date')
+            cursor = from_date
+            for start, end in covered:
+                if start > cursor:
+                    intervals.append((cursor, start - ONE_DAY))
+                cursor = max(cursor, end + ONE_DAY)
+            if cursor <= settled_end:
+                intervals.append((cursor, settled_end))
+
+        # Unsettled tail: sessions that have already opened but are not final
+        started = self._started_unsettled(from_date, to_date, settled, now)
+        if started:
+            fresh = set(DailyBar.objects.filter(
+                ticker=ticker,
+                date__in=started,
+                last_updated__gte=self.freshness.fresh_since(OHLC, now),
+            ).values_list('date', flat=True))
+            unanswered = [day for day in started if day not in fresh]
+            if unanswered and len(self._recent_attempts(ticker, unanswered, now)) < len(unanswered):
+                intervals.append((started[0], started[-1]))
+
+        needed = []
+        for start, end in intervals:
+            if self.calendar.sessions_between(start, end):
+                needed.append((start, end))
+            elif record_coverage:
+                # Weekend/holiday-only gap: nothing to fetch, just cover it
+                self._record_coverage(ticker, start, end, settled)
+        return needed
+
+    def version(self, ticker, from_date, to_date, now=None):
+        """
+        Version of the stored bars for [from_date, to_date], without loading them
+
+        Returns:
+            (version, last_modified, expires_at), or None while part of the
+            range still has to come from Polygon.io. expires_at is None for
+            settled history, which does not change once stored.
+        """
+        now = now or timezone.now()
+        if self.missing_intervals(ticker, from_date, to_date, now, record_coverage=False):
+            return None
+
+        settled = self.settled_through(now)
+        stats = DailyBar.objects.filter(
+            ticker=ticker, date__gte=from_date, date__lte=to_date
+        ).aggregate(
+            count=Count('id'),
+            last_modified=Max('last_updated'),
+            oldest_unsettled=Min('last_updated', filter=Q(date__gt=settled)),
+        )
+        expiries = list(self._recent_attempts(
+            ticker, self._started_unsettled(from_date, to_date, settled, now), now
+        ).values())
+        if stats['oldest_unsettled'] is not None:
+            expiries.append(self.freshness.expires_at(OHLC, stats['oldest_unsettled']))
+        if expiries:
+            expires_at = min(expiries)
+        elif to_date > settled:
+            # The range reaches sessions that have not opened yet
+            expires_at = self.freshness.expires_at(OHLC, now)
+        else:
+            expires_at = None
+        return (stats['count'], stats['last_modified']), stats['last_modified'], expires_at
+
+    def _started_unsettled(self, from_date, to_date, settled, now):
+        """Sessions in [from_date, to_date] that have opened but are not final"""
+        tail_start = max(from_date, settled + ONE_DAY)
+        if tail_start > to_date:
+            return []
+        return [
+            day for day in self.calendar.sessions_between(tail_start, to_date)
+            if self.calendar.session(day)[0] <= now
+        ]
+
+    def _recent_attempts(self, ticker, days, now):
+        """{date: expires_at} for the sessions fetched recently enough not to be refetched"""
+        if not days:
+            return {}
+        keys = {f"{ticker}:{day.isoformat()}": day for day in days}
+        return {
+            keys[key]: expires_at
+            for key, expires_at in DatasetSync.objects.filter(
+                dataset=ATTEMPTS_DATASET, key__in=keys, expires_at__gt=now
+            ).values_list('key', 'expires_at')
+        }
+
+    def _record_attempts(self, ticker, start, end, settled):
+        """
+        Note that the unsettled sessions of a fetched interval were asked for,
+        whether or not Polygon.io returned a bar for them
+        """
+        now = timezone.now()
+        days = self._started_unsettled(start, end, settled, now)
+        if not days:
+            return
+        expires_at = self.freshness.expires_at(OHLC, now)
+        with transaction.atomic():
+            # Attempts for sessions that have since settled are no longer read
+            DatasetSync.objects.filter(
+                dataset=ATTEMPTS_DATASET, key__startswith=f"{ticker}:", expires_at__lte=now
+            ).delete()
+            DatasetSync.objects.bulk_create(
+                [
+                    DatasetSync(
+                        dataset=ATTEMPTS_DATASET,
+                        key=f"{ticker}:{day.isoformat()}",
+                        synced_at=now,
+                        expires_at=expires_at,
+                    )
+                    for day in days
+                ],
+                update_conflicts=True,
+                unique_fields=['dataset', 'key'],
+                update_fields=['synced_at', 'expires_at'],
+            )
+
+    def save_bars(self, ticker, results):
+        """Upsert Polygon.io aggregate bars for a ticker and return the DailyBar objects"""
+        now = timezone.now()
+        bars = [
+            DailyBar(
+                ticker=ticker,
+                date=bar_date(day),
+                open=day.get("o"),
+                high=day.get("h"),
+                low=day.get("l"),
+                close=day.get("c"),
+                volume=int(day.get("v") or 0),
+                last_updated=now,
+            )
+            for day in results
+        ]
+        if not bars:
+            return bars
+        DailyBar.objects.bulk_create(
+            bars,
+            update_conflicts=True,
+            unique_fields=['ticker', 'date'],
+            update_fields=['open', 'high', 'low', 'close', 'volume', 'last_updated'],
+        )
+        return bars
+
+    def _record_coverage(self, ticker, start, end, settled):
+        """
+        Mark [start, end] (clipped to settled sessions) as fetched, merging it
+        with overlapping or adjacent coverage rows
+        """
+        end = min(end, settled)
+        if start > end:
+            return
+        with transaction.atomic():
+            neighbours = list(BarCoverage.objects.select_for_update().filter(
+                ticker=ticker,
+                start_date__lte=end + ONE_DAY,
+                end_date__gte=start - ONE_DAY,
+            ))
+            for row in neighbours:
+                start = min(start, row.start_date)
+                end = max(end, row.end_date)
+            BarCoverage.objects.filter(pk__in=[row.pk for row in neighbours]).delete()
+            BarCoverage.objects.create(ticker=ticker, start_date=start, end_date=end)
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD query parameter, returning None if it is invalid"""
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,102 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling for price series.
+
+Per-bucket work (averages, triangle areas, OHLC aggregation) is vectorized
+with NumPy; the only Python loop is over output buckets, never over bars.
+"""
+import numpy as np
+
+
+def _as_float_array(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def lttb_buckets(n, threshold):
+    """
+    Bucket start offsets for reducing n points to `threshold` points.
+
+    The first and last points get buckets of their own; the points between
+    them are split into threshold - 2 buckets of (nearly) equal size.
+    """
+    middle = np.linspace(1, n - 1, threshold - 1).astype(int)
+    return np.concatenate(([0], middle[:-1], [n - 1]))
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Indices of the points LTTB keeps when reducing (x, y) to `threshold` points.
+
+    Args:
+        x, y: 1-D float arrays of equal length (x ascending)
+        threshold: Number of points to keep (>= 3)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    starts = lttb_buckets(n, threshold)
+    ends = np.append(starts[1:], n)
+    counts = ends - starts
+
+    # Average point of every bucket, used as the third triangle vertex
+    y_filled = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+    avg_x = np.add.reduceat(x, starts) / counts
+    avg_y = np.add.reduceat(y_filled, starts) / counts
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(1, threshold - 1):
+        lo, hi = starts[bucket], ends[bucket]
+        ax, ay = x[previous], y_filled[previous]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        # Twice the triangle area for every candidate in the bucket
+        areas = np.abs((ax - cx) * (y_filled[lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay))
+        previous = lo + int(np.argmax(areas))
+        selected[bucket] = previous
+    return selected
+
+
+def downsample_prices(prices, points):
+    """
+    Reduce a list of {date, open, high, low, close, volume} dicts to `points`
+    bars with LTTB on the close series.
+
+    Each output bar keeps the date and close of the point LTTB selected, and
+    the OHLC extremes of its whole bucket (first open, highest high, lowest
+    low, summed volume), so wicks and ranges survive the reduction.
+    """
+    n = len(prices)
+    if points >= n or points < 3:
+        return prices
+
+    x = np.arange(n, dtype=float)
+    close = _as_float_array(p.get("close") for p in prices)
+    selected = lttb_indices(x, close, points)
+
+    starts = lttb_buckets(n, points)
+    opens = _as_float_array(p.get("open") for p in prices)
+    highs = _as_float_array(p.get("high") for p in prices)
+    lows = _as_float_array(p.get("low") for p in prices)
+    volumes = _as_float_array(p.get("volume") or 0 for p in prices)
+
+    bucket_open = opens[starts]
+    bucket_high = np.fmax.reduceat(highs, starts)
+    bucket_low = np.fmin.reduceat(lows, starts)
+    bucket_volume = np.add.reduceat(volumes, starts)
+
+    def _value(v):
+        return None if np.isnan(v) else float(v)
+
+    return [
+        {
+            "date": prices[index]["date"],
+            "open": _value(bucket_open[i]),
+            "high": _value(bucket_high[i]),
+            "low": _value(bucket_low[i]),
+            "close": _value(close[index]),
+            "volume": int(bucket_volume[i]),
+        }
+        for i, index in enumerate(selected)
+    ]
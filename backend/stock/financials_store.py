@@ -0,0 +1,236 @@
+"""
+Local store of financial statements with filing-aware invalidation.
+
+Statements are kept normalized: one FinancialPeriod row per reported
+period, one FinancialConcept row per line item (label and order are
+shared across companies) and one FinancialValue row per (period, line
+item) with its value and unit. A ticker's statements only change when the company files again, so
+the stored copy is trusted until the end of the period after the latest
+one on record; before then no newer filing can exist. After that the store
+is rechecked at most every FINANCIALS_RECHECK_INTERVAL until it shows up.
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+
+import requests
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DatasetSync, FinancialConcept, FinancialPeriod, FinancialValue
+
+logger = logging.getLogger(__name__)
+
+DATASET = 'financials'
+
+# Periods requested from Polygon.io per sync at minimum, so small requests
+# for different limits share one sync
+FINANCIALS_SYNC_LIMIT = 8
+
+# Upper bound on stored periods per ticker and timeframe (the endpoint's max limit)
+FINANCIALS_MAX_LIMIT = 50
+
+# Once the next filing is due, look for it at most this often
+FINANCIALS_RECHECK_INTERVAL = timedelta(hours=12)
+
+# Period metadata copied to and from FinancialPeriod columns
+PERIOD_FIELDS = (
+    "fiscal_year", "fiscal_period", "company_name", "cik", "sic", "source_filing_url",
+)
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+class FinancialsStore:
+    """Serve a ticker's financial statements, syncing from Polygon.io only when a new filing can exist"""
+
+    def __init__(self, polygon_service):
+        self.polygon_service = polygon_service
+
+    def get(self, ticker, limit, timeframe):
+        """
+        Return (results, source) for the latest `limit` periods.
+
+        results match Polygon.io's vX/reference/financials results; source
+        is "database", "polygon_api", or "stale" when a due sync failed and
+        stored periods were served instead.
+        """
+        sync = self.current_sync(ticker, timeframe)
+        if self.is_fresh(sync, limit):
+            return self.load(ticker, limit, timeframe), "database"
+
+        try:
+            self.sync(ticker, max(limit, FINANCIALS_SYNC_LIMIT), timeframe)
+        except requests.exceptions.RequestException as e:
+            if sync is None:
+                raise
+            logger.warning("Financials sync for %s failed, serving stored periods: %s", ticker, e)
+            return self.load(ticker, limit, timeframe), "stale"
+        return self.load(ticker, limit, timeframe), "polygon_api"
+
+    def current_sync(self, ticker, timeframe):
+        """The DatasetSync row for a ticker's statements, or None if never synced"""
+        return DatasetSync.objects.filter(dataset=DATASET, key=self._key(ticker, timeframe)).first()
+
+    def is_fresh(self, sync, limit):
+        """Whether the stored periods can answer a request for `limit` periods without a sync"""
+        return sync is not None and sync.expires_at > timezone.now() and limit <= sync.extent
+
+    def version(self, ticker, limit, timeframe):
+        """
+        Version of the stored periods a request for `limit` periods is answered from
+
+        Returns:
+            (version, last_modified, expires_at), or None if a sync is due
+        """
+        sync = self.current_sync(ticker, timeframe)
+        if not self.is_fresh(sync, limit):
+            return None
+        # Stored periods only change with a sync
+        return sync.synced_at, sync.synced_at, sync.expires_at
+
+    def _key(self, ticker, timeframe):
+        return f"{ticker}:{timeframe}"
+
+    def sync(self, ticker, limit, timeframe):
+        """Fetch the latest `limit` periods, store them and record when the next filing can exist"""
+        self.save_sync(ticker, limit, timeframe, self.polygon_service.get_financials(ticker, limit, timeframe))
+
+    def save_sync(self, ticker, limit, timeframe, data):
+        """Store a Polygon.io financials response for the latest `limit` periods"""
+        if data.get("status") != "OK":
+            raise ValueError("Failed to fetch financial data from Polygon.io")
+        results = data.get("results") or []
+
+        with transaction.atomic():
+            for result in results:
+                self.save_period(ticker, timeframe, result)
+
+        # A short page means the whole history is stored
+        extent = limit if len(results) >= limit else FINANCIALS_MAX_LIMIT
+        DatasetSync.objects.update_or_create(
+            dataset=DATASET,
+            key=self._key(ticker, timeframe),
+            defaults={
+                "synced_at": timezone.now(),
+                "expires_at": self.expires_at(ticker, timeframe),
+                "extent": extent,
+            },
+        )
+
+    def save_period(self, ticker, timeframe, result):
+        """Upsert one Polygon.io financials result and replace its line items"""
+        start_date = _parse_date(result.get("start_date"))
+        end_date = _parse_date(result.get("end_date"))
+        if start_date is None or end_date is None:
+            return
+        period, _ = FinancialPeriod.objects.update_or_create(
+            ticker=ticker,
+            timeframe=timeframe,
+            start_date=start_date,
+            end_date=end_date,
+            defaults={
+                **{field: result.get(field) or '' for field in PERIOD_FIELDS},
+                "filing_date": _parse_date(result.get("filing_date")),
+                "last_updated": timezone.now(),
+            },
+        )
+
+        items = [
+            (statement, key, item)
+            for statement, line_items in (result.get("financials") or {}).items()
+            for key, item in line_items.items()
+            if isinstance(item, dict)
+        ]
+        concepts = self._concepts(items)
+        FinancialValue.objects.filter(period=period).delete()
+        FinancialValue.objects.bulk_create([
+            FinancialValue(
+                period=period,
+                concept=concepts[(statement, key)],
+                value=item.get("value"),
+                unit=item.get("unit") or '',
+            )
+            for statement, key, item in items
+        ])
+
+    def _concepts(self, items):
+        """FinancialConcept rows for (statement, key, item) triples, creating missing ones"""
+        wanted = {(statement, key): item for statement, key, item in items}
+        statements = {statement for statement, _ in wanted}
+        keys = {key for _, key in wanted}
+        existing = {
+            (concept.statement, concept.key): concept
+            for concept in FinancialConcept.objects.filter(statement__in=statements, key__in=keys)
+        }
+        missing = [
+            FinancialConcept(
+                statement=statement,
+                key=key,
+                label=item.get("label") or '',
+                order=item.get("order") or 0,
+            )
+            for (statement, key), item in wanted.items()
+            if (statement, key) not in existing
+        ]
+        if missing:
+            FinancialConcept.objects.bulk_create(missing, ignore_conflicts=True)
+            for concept in FinancialConcept.objects.filter(
+                statement__in={c.statement for c in missing}, key__in={c.key for c in missing}
+            ):
+                existing[(concept.statement, concept.key)] = concept
+        return existing
+
+    def expires_at(self, ticker, timeframe, now=None):
+        """
+        When the stored periods may be out of date: the end of the period
+        following the latest stored one, or the next recheck if that has
+        already passed (the filing is due but not out yet)
+        """
+        now = now or timezone.now()
+        latest = FinancialPeriod.objects.filter(
+            ticker=ticker, timeframe=timeframe
+        ).order_by('-end_date').first()
+        if latest is None:
+            return now + FINANCIALS_RECHECK_INTERVAL
+        next_period_end = latest.end_date + (latest.end_date - latest.start_date) + timedelta(days=1)
+        next_filing = timezone.make_aware(datetime.combine(next_period_end, time.min))
+        return max(next_filing, now + FINANCIALS_RECHECK_INTERVAL)
+
+    def load(self, ticker, limit, timeframe):
+        """The latest `limit` stored periods in Polygon.io's result shape, newest filing first"""
+        periods = list(
+            FinancialPeriod.objects.filter(ticker=ticker, timeframe=timeframe)
+            # Polygon.io often omits filing_date; undated periods must not
+            # sort ahead of the latest filings (Postgres puts NULLs first)
+            .order_by(F('filing_date').desc(nulls_last=True), '-end_date')[:limit]
+        )
+        values = FinancialValue.objects.filter(period__in=periods).select_related('concept')
+
+        statements = {period.pk: {} for period in periods}
+        for value in values:
+            concept = value.concept
+            statements[value.period_id].setdefault(concept.statement, {})[concept.key] = {
+                "value": value.value,
+                "unit": value.unit,
+                "label": concept.label,
+                "order": concept.order,
+            }
+
+        return [
+            {
+                "tickers": [ticker],
+                "timeframe": period.timeframe,
+                "start_date": period.start_date.isoformat(),
+                "end_date": period.end_date.isoformat(),
+                "filing_date": period.filing_date.isoformat() if period.filing_date else None,
+                **{field: getattr(period, field) for field in PERIOD_FIELDS},
+                "financials": statements[period.pk],
+            }
+            for period in periods
+        ]
@@ -0,0 +1,108 @@
+"""
+Freshness policies for cached market data.
+
+A policy decides how long each dataset ('quote', 'ohlc', 'news',
+'financials') stays fresh after it was fetched. The active policy is chosen
+with the STOCK_FRESHNESS_POLICY setting.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .market_calendar import get_trading_calendar
+
+QUOTE = 'quote'
+OHLC = 'ohlc'
+NEWS = 'news'
+FINANCIALS = 'financials'
+
+DEFAULT_TTLS = {
+    QUOTE: 60,
+    OHLC: 60,
+    NEWS: 5 * 60,
+    FINANCIALS: 6 * 60 * 60,
+}
+
+
+class FreshnessPolicy:
+    """Base class: subclasses implement fresh_since and expires_at"""
+
+    def fresh_since(self, dataset, now=None):
+        """Oldest fetch time whose data is still fresh at `now`"""
+        raise NotImplementedError
+
+    def expires_at(self, dataset, fetched_at):
+        """Moment data fetched at `fetched_at` stops being fresh"""
+        raise NotImplementedError
+
+    def is_fresh(self, dataset, fetched_at, now=None):
+        return fetched_at >= self.fresh_since(dataset, now)
+
+    def ttl_seconds(self, dataset, now=None):
+        """Seconds data fetched at `now` stays fresh (for cache backends)"""
+        now = now or timezone.now()
+        return max(1, int((self.expires_at(dataset, now) - now).total_seconds()))
+
+
+class FixedTTLFreshnessPolicy(FreshnessPolicy):
+    """Same TTL around the clock, regardless of market state"""
+
+    def __init__(self, ttls=None):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+
+    def _ttl(self, dataset):
+        return timedelta(seconds=self.ttls[dataset])
+
+    def fresh_since(self, dataset, now=None):
+        return (now or timezone.now()) - self._ttl(dataset)
+
+    def expires_at(self, dataset, fetched_at):
+        return fetched_at + self._ttl(dataset)
+
+
+class MarketSessionFreshnessPolicy(FixedTTLFreshnessPolicy):
+    """
+    Short TTLs while the regular session is open; after the close (plus a
+    settle window for upstream end-of-day data) anything fetched stays
+    fresh until the next session opens.
+    """
+
+    def __init__(self, ttls=None, settle_seconds=15 * 60, calendar=None):
+        super().__init__(ttls)
+        self.settle = timedelta(seconds=settle_seconds)
+        self.calendar = calendar or get_trading_calendar()
+
+    def fresh_since(self, dataset, now=None):
+        now = now or timezone.now()
+        if self.calendar.is_open(now):
+            return now - self._ttl(dataset)
+        settled = self.calendar.previous_close(now) + self.settle
+        if now < settled:
+            # Just after the close: keep session TTLs until data settles
+            return now - self._ttl(dataset)
+        return settled
+
+    def expires_at(self, dataset, fetched_at):
+        if self.calendar.is_open(fetched_at):
+            return fetched_at + self._ttl(dataset)
+        settled = self.calendar.previous_close(fetched_at) + self.settle
+        if fetched_at < settled:
+            return min(fetched_at + self._ttl(dataset), settled)
+        return self.calendar.next_open(fetched_at)
+
+
+_policy = None
+
+
+def get_freshness_policy():
+    """Return the configured FreshnessPolicy instance"""
+    global _policy
+    if _policy is None:
+        policy_class = import_string(getattr(
+            settings, 'STOCK_FRESHNESS_POLICY',
+            'stock.freshness.MarketSessionFreshnessPolicy'
+        ))
+        _policy = policy_class(**getattr(settings, 'STOCK_FRESHNESS_OPTIONS', {}))
+    return _policy
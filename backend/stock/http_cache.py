@@ -0,0 +1,160 @@
+"""
+Conditional GET and HTTP caching for stock data responses.
+
+Each cacheable endpoint has a validator that looks up the version of the
+stored data a request would be answered from (row counts and update times,
+sync timestamps) without loading or rendering the payload. The version is
+hashed with the request URL into a weak ETag, so a matching If-None-Match
+is answered with 304 before the view runs. Successful responses also get
+Last-Modified and a Cache-Control max-age that ends when the data stops
+being fresh under the freshness policy, capped at STOCK_HTTP_MAX_AGE.
+
+Validators return None while the stored data is not fresh: the view then
+runs as usual (and may go to Polygon.io), and its response carries no
+validators, so a body built from newer data is never tagged with an
+older version.
+"""
+import hashlib
+import logging
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+
+from .bar_store import HistoricalBarStore, parse_date
+from .financials_store import FinancialsStore
+from .news_store import NewsStore
+
+logger = logging.getLogger(__name__)
+
+
+def _etag(request, version):
+    # Weak: the version identifies the data, not the exact bytes (which
+    # also depend on the negotiated Content-Encoding)
+    digest = hashlib.md5(f"{request.get_full_path()}|{version!r}".encode(), usedforsecurity=False)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _max_age(expires_at):
+    cap = getattr(settings, 'STOCK_HTTP_MAX_AGE', 24 * 60 * 60)
+    if expires_at is None:
+        return cap
+    return max(0, min(cap, int((expires_at - timezone.now()).total_seconds())))
+
+
+def _validate(validator, request):
+    """Return (etag, last_modified, max_age) for a request, or None if it must not be cached"""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    try:
+        found = validator(request)
+    except Exception as e:
+        # The view reports the error; the response just goes out unvalidated
+        logger.warning("Could not compute the version for %s: %s", request.get_full_path(), e)
+        return None
+    if found is None:
+        return None
+    version, last_modified, expires_at = found
+    return _etag(request, version), last_modified, _max_age(expires_at)
+
+
+def _not_modified(request, validators):
+    """304 response if the client's copy is current, else None"""
+    etag, last_modified, _ = validators
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def _finish(response, validators):
+    """Add the validators and Cache-Control to a 200 or 304 response"""
+    if validators is None or response.status_code not in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        return response
+    etag, last_modified, max_age = validators
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Same data for every user, so shared caches (CDNs) may store it too
+    patch_cache_control(response, public=True, max_age=max_age)
+    # Keep caches' stored variants consistent with the compressed 200s
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def conditional_cache(validator):
+    """
+    Decorator adding conditional GET and Cache-Control to a stock data view
+
+    Args:
+        validator: Callable taking the request and returning (version,
+            last_modified, expires_at) for the data it would be answered
+            from, or None if that data is not fresh
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                validators = await sync_to_async(_validate)(validator, request)
+                response = _not_modified(request, validators) if validators else None
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                return _finish(response, validators)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            validators = _validate(validator, request)
+            response = _not_modified(request, validators) if validators else None
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            return _finish(response, validators)
+        return wrapper
+    return decorator
+
+
+def _limit(request, default):
+    """The view's `limit` query parameter, normalized the same way"""
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        return default
+    return limit if 1 <= limit <= 50 else default
+
+
+def historical_version(request):
+    """Validator for the historical endpoints"""
+    ticker = request.GET.get('ticker', '').upper()
+    start, end = parse_date(request.GET.get('from')), parse_date(request.GET.get('to'))
+    if not ticker or not start or not end or start > end:
+        return None
+    return HistoricalBarStore(None).version(ticker, start, end)
+
+
+def financials_version(request):
+    """Validator for the financials endpoints"""
+    ticker = request.GET.get('ticker', '').upper()
+    timeframe = request.GET.get('timeframe', 'quarterly')
+    if not ticker:
+        return None
+    if timeframe not in ('quarterly', 'annual'):
+        timeframe = 'quarterly'
+    return FinancialsStore(None).version(ticker, _limit(request, 4), timeframe)
+
+
+def news_version(request):
+    """Validator for the news endpoints"""
+    tickers = list(dict.fromkeys(
+        t.strip().upper() for t in request.GET.get('tickers', '').split(',') if t.strip()
+    ))
+    if not tickers:
+        ticker = request.GET.get('ticker', '').upper()
+        if not ticker:
+            return None
+        tickers = [ticker]
+    return NewsStore(None).version(tickers, _limit(request, 5))
@@ -0,0 +1,176 @@
+"""
+Vectorized technical indicators over daily bars.
+
+Every kernel works on whole NumPy arrays. Exponential smoothing is a linear
+recurrence, which is evaluated block by block in closed form, so there is no
+Python loop per bar. Warm-up positions are NaN (serialized as null).
+"""
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Keep b**-k (b = 1 - alpha) well inside float range within one block
+_EMA_BLOCK_LOG_SCALE = 50.0
+
+
+def sma(values, period):
+    """Simple moving average"""
+    out = np.full(len(values), np.nan)
+    if period <= len(values):
+        sums = np.cumsum(np.insert(values, 0, 0.0))
+        out[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return out
+
+
+def _smooth(values, alpha, seed, start):
+    """
+    Evaluate y[t] = (1 - alpha) * y[t-1] + alpha * values[t] for t > start,
+    with y[start] = seed, in vectorized blocks.
+    """
+    out = np.full(len(values), np.nan)
+    out[start] = seed
+    decay = 1.0 - alpha
+    if decay <= 0:
+        out[start + 1:] = values[start + 1:]
+        return out
+
+    block = max(1, int(_EMA_BLOCK_LOG_SCALE / -math.log(decay)))
+    previous = seed
+    position = start + 1
+    while position < len(values):
+        chunk = values[position:position + block]
+        steps = np.arange(1, len(chunk) + 1)
+        growth = decay ** -steps
+        # y_k = decay^k * (y_0 + alpha * sum_{j<=k} x_j * decay^-j)
+        smoothed = (previous + alpha * np.cumsum(chunk * growth)) / growth
+        out[position:position + len(chunk)] = smoothed
+        previous = smoothed[-1]
+        position += len(chunk)
+    return out
+
+
+def ema(values, period, alpha=None):
+    """Exponential moving average seeded with the SMA of the first `period` values"""
+    alpha = alpha if alpha is not None else 2.0 / (period + 1)
+    # Leading NaNs (e.g. an input that is itself an indicator) are skipped
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) < period:
+        return np.full(len(values), np.nan)
+    first = valid[0]
+    start = first + period - 1
+    seed = values[first:start + 1].mean()
+    return _smooth(values, alpha, seed, start)
+
+
+def rsi(values, period=14):
+    """Relative Strength Index with Wilder's smoothing"""
+    out = np.full(len(values), np.nan)
+    if len(values) <= period:
+        return out
+    delta = np.diff(values)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+    avg_gain = ema(gains, period, alpha=1.0 / period)
+    avg_loss = ema(losses, period, alpha=1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        strength = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    strength = np.where(avg_loss == 0, 100.0, strength)
+    strength = np.where(np.isnan(avg_gain), np.nan, strength)
+    out[1:] = strength
+    return out
+
+
+def macd(values, fast=12, slow=26, signal=9):
+    """MACD line, signal line and histogram"""
+    line = ema(values, fast) - ema(values, slow)
+    signal_line = ema(line, signal)
+    return {
+        "macd": line,
+        "signal": signal_line,
+        "histogram": line - signal_line,
+    }
+
+
+def bbands(values, period=20, width=2.0):
+    """Bollinger Bands: SMA middle band +/- `width` population standard deviations"""
+    middle = sma(values, period)
+    deviation = np.full(len(values), np.nan)
+    if period <= len(values):
+        deviation[period - 1:] = sliding_window_view(values, period).std(axis=1)
+    return {
+        "upper": middle + width * deviation,
+        "middle": middle,
+        "lower": middle - width * deviation,
+    }
+
+
+# name -> (kernel, default parameters, parameter casts)
+INDICATORS = {
+    "sma": (sma, (20,), (int,)),
+    "ema": (ema, (20,), (int,)),
+    "rsi": (rsi, (14,), (int,)),
+    "macd": (macd, (12, 26, 9), (int, int, int)),
+    "bbands": (bbands, (20, 2.0), (int, float)),
+}
+
+MAX_INDICATORS = 20
+MAX_PERIOD = 1000
+
+
+def parse_indicator_specs(raw):
+    """
+    Parse "sma:20,ema:50,rsi:14,macd,bbands:20" into a list of
+    (key, name, params) tuples; key is the canonical spec, e.g. "macd:12:26:9".
+    Raises ValueError for unknown indicators or invalid parameters.
+    """
+    specs = []
+    for item in (part.strip().lower() for part in raw.split(',')):
+        if not item:
+            continue
+        name, *args = item.split(':')
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{name}'")
+        _, defaults, casts = INDICATORS[name]
+        if len(args) > len(defaults):
+            raise ValueError(f"Too many parameters for '{name}'")
+        try:
+            params = tuple(
+                cast(args[i]) if i < len(args) else defaults[i]
+                for i, cast in enumerate(casts)
+            )
+        except ValueError:
+            raise ValueError(f"Invalid parameters for '{name}'")
+        if any(p <= 0 or p > MAX_PERIOD for p in params):
+            raise ValueError(f"Parameters for '{name}' must be between 1 and {MAX_PERIOD}")
+        key = ":".join([name, *(f"{p:g}" for p in params)])
+        if key not in (spec[0] for spec in specs):
+            specs.append((key, name, params))
+
+    if not specs:
+        raise ValueError("At least one indicator is required")
+    if len(specs) > MAX_INDICATORS:
+        raise ValueError(f"At most {MAX_INDICATORS} indicators can be requested at once")
+    return specs
+
+
+def _to_list(series):
+    return [None if math.isnan(v) else v for v in series.tolist()]
+
+
+def compute_indicators(close, specs):
+    """
+    Run each parsed indicator spec over a close-price array.
+
+    Returns {key: list} for single-series indicators and
+    {key: {component: list}} for multi-series ones (macd, bbands).
+    """
+    close = np.asarray(close, dtype=float)
+    results = {}
+    for key, name, params in specs:
+        output = INDICATORS[name][0](close, *params)
+        if isinstance(output, dict):
+            results[key] = {component: _to_list(series) for component, series in output.items()}
+        else:
+            results[key] = _to_list(output)
+    return results
@@ -0,0 +1,197 @@
+"""
+In-process pub/sub hub for live quote streams.
+
+Each event loop has one QuoteHub. A symbol watched by any number of
+subscribers has exactly one poller task, which reads the quote through the
+regular cache tiers and sleeps until that quote expires under the freshness
+policy: every quote TTL while the market is open, and rarely outside
+regular hours. When a quote changes, the changed fields are fanned out to
+every subscriber of the symbol. A subscriber keeps only the latest pending
+fields per symbol (slow readers get updates merged, not queued), so its
+memory stays constant however long it is connected.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+
+from django.conf import settings
+from django.utils import timezone
+
+from .freshness import QUOTE
+from .rate_limit import BACKGROUND, upstream_priority
+from .services_async import AsyncStockDataService
+
+logger = logging.getLogger(__name__)
+
+# Fields that change on every refresh without the quote itself changing
+VOLATILE_FIELDS = frozenset(("source", "last_updated"))
+
+
+class Subscription:
+    """One client's view of the hub: the latest unsent fields per symbol"""
+
+    def __init__(self, hub, symbols):
+        self.hub = hub
+        self.symbols = tuple(symbols)
+        self._pending = {}
+        self._ready = asyncio.Event()
+
+    def push(self, symbol, fields):
+        self._pending.setdefault(symbol, {}).update(fields)
+        self._ready.set()
+
+    async def get(self, timeout):
+        """
+        Wait up to `timeout` seconds for updates.
+
+        Returns:
+            {symbol: changed fields} accumulated since the last call; empty
+            if nothing changed in time
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self._ready.clear()
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class QuoteHub:
+    """Fan out quote changes from one poller per symbol to its subscribers"""
+
+    def __init__(self, format_quote, min_interval=5, max_interval=15 * 60, retry_interval=30):
+        """
+        Args:
+            format_quote: Callable turning (stock_data, source, ohlc_info)
+                into the payload dict sent to clients
+            min_interval, max_interval: Bounds in seconds on the wait
+                between two polls of a symbol
+            retry_interval: Seconds to wait after a failed poll, doubled
+                (up to max_interval) for each further failure in a row
+        """
+        self.format_quote = format_quote
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.retry_interval = retry_interval
+        self._subscribers = {}
+        self._pollers = {}
+        self._latest = {}
+
+    def subscribe(self, symbols):
+        """Subscribe to symbols; known quotes are queued for the subscriber at once"""
+        subscription = Subscription(self, symbols)
+        for symbol in subscription.symbols:
+            self._subscribers.setdefault(symbol, set()).add(subscription)
+            if symbol in self._latest:
+                subscription.push(symbol, self._latest[symbol])
+            if symbol not in self._pollers:
+                self._pollers[symbol] = asyncio.ensure_future(self._poll(symbol))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Drop a subscription and stop polling symbols nobody watches any more"""
+        for symbol in subscription.symbols:
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[symbol]
+                self._latest.pop(symbol, None)
+                poller = self._pollers.pop(symbol, None)
+                if poller is not None:
+                    poller.cancel()
+
+    def publish(self, symbol, payload):
+        """Send the fields of `payload` that differ from the last published quote"""
+        previous = self._latest.get(symbol)
+        if previous is not None and all(
+            previous.get(field) == value
+            for field, value in payload.items() if field not in VOLATILE_FIELDS
+        ):
+            return
+        self._latest[symbol] = payload
+        if previous is None:
+            changes = payload
+        else:
+            changes = {field: value for field, value in payload.items() if previous.get(field) != value}
+            changes["ticker"] = symbol
+        for subscription in self._subscribers.get(symbol, ()):
+            subscription.push(symbol, changes)
+
+    def _next_poll_in(self, stock_data, service):
+        """Seconds until the served quote expires, within the configured bounds"""
+        expires_at = service.freshness.expires_at(QUOTE, stock_data.last_updated)
+        wait = (expires_at - timezone.now()).total_seconds()
+        return min(max(wait, self.min_interval), self.max_interval)
+
+    def _retry_in(self, failures):
+        """Seconds to back off after `failures` polls in a row failed to refresh the quote"""
+        return min(self.retry_interval * 2 ** (failures - 1), self.max_interval)
+
+    async def _poll(self, symbol):
+        service = AsyncStockDataService()
+        # Polls are refresh traffic: leave budget to interactive requests
+        with upstream_priority(BACKGROUND):
+            failures = 0
+            while True:
+                try:
+                    stock_data, source, ohlc_info = await service.aget_stock_data(symbol, allow_stale=False)
+                    self.publish(symbol, self.format_quote(stock_data, source, ohlc_info))
+                    if source == "stale":
+                        # Out of upstream budget: the stored quote has already
+                        # expired, so its expiry would mean polling at min_interval
+                        failures += 1
+                        wait = self._retry_in(failures)
+                    else:
+                        failures = 0
+                        wait = self._next_poll_in(stock_data, service)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Live quote poll for %s failed: %s", symbol, e)
+                    failures += 1
+                    wait = self._retry_in(failures)
+                await asyncio.sleep(wait)
+
+    def stats(self):
+        return {
+            "symbols": len(self._pollers),
+            "subscriptions": len({s for subs in self._subscribers.values() for s in subs}),
+        }
+
+
+# Poller tasks belong to the event loop that started them
+_hubs = weakref.WeakKeyDictionary()
+_hubs_lock = threading.Lock()
+
+
+def get_quote_hub(format_quote):
+    """Return the running event loop's QuoteHub, creating it with `format_quote` on first use"""
+    loop = asyncio.get_running_loop()
+    with _hubs_lock:
+        hub = _hubs.get(loop)
+        if hub is None:
+            hub = _hubs[loop] = QuoteHub(
+                format_quote,
+                min_interval=getattr(settings, 'STOCK_STREAM_MIN_INTERVAL', 5),
+                max_interval=getattr(settings, 'STOCK_STREAM_MAX_INTERVAL', 15 * 60),
+                retry_interval=getattr(settings, 'STOCK_STREAM_RETRY_INTERVAL', 30),
+            )
+    return hub
+
+
+def live_stats():
+    """Polled symbols and open subscriptions summed over every event loop's hub"""
+    with _hubs_lock:
+        hubs = list(_hubs.values())
+    totals = {"symbols": 0, "subscriptions": 0}
+    for hub in hubs:
+        for name, value in hub.stats().items():
+            totals[name] += value
+    return totals
@@ -0,0 +1,199 @@
+import gzip
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from backend import middleware
+from backend.renderers import FastJSONRenderer, orjson
+from stock.financials_store import FinancialsStore
+from stock.models import DailyBar
+
+STATEMENTS = ("balance_sheet", "income_statement", "cash_flow_statement", "comprehensive_income")
+
+
+def synthetic_prices(count, rng):
+    """Historical response prices for `count` sessions, shaped like DailyBar.as_price()"""
+    prices, close, day = [], 100.0, date(2000, 1, 3)
+    while len(prices) < count:
+        if day.weekday() < 5:
+            open_ = close * (1 + rng.gauss(0, 0.01))
+            close = open_ * (1 + rng.gauss(0, 0.015))
+            prices.append({
+                "date": day.strftime('%Y-%m-%d'),
+                "open": round(open_, 4),
+                "high": round(max(open_, close) * 1.01, 4),
+                "low": round(min(open_, close) * 0.99, 4),
+                "close": round(close, 4),
+                "volume": rng.randint(10 ** 5, 10 ** 8),
+            })
+        day += timedelta(days=1)
+    return prices
+
+
+def synthetic_financials(periods, items, rng):
+    """Financials response results shaped like FinancialsStore.load()"""
+    results = []
+    end = date(2024, 12, 31)
+    for _ in range(periods):
+        start = end - timedelta(days=90)
+        results.append({
+            "tickers": ["BENCH"],
+            "timeframe": "quarterly",
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "filing_date": (end + timedelta(days=30)).isoformat(),
+            "fiscal_year": str(end.year),
+            "fiscal_period": "Q4",
+            "company_name": "Benchmark Corp",
+            "cik": "0000000000",
+            "sic": "3571",
+            "source_filing_url": "https://api.polygon.io/v1/reference/sec/filings/0000000000",
+            "financials": {
+                statement: {
+                    f"{statement}_item_{index}": {
+                        "value": rng.uniform(-1e9, 1e10),
+                        "unit": "USD",
+                        "label": f"Line item {index}",
+                        "order": index * 100,
+                    }
+                    for index in range(items)
+                }
+                for statement in STATEMENTS
+            },
+        })
+        end = start - timedelta(days=1)
+    return results
+
+
+def synthetic_quotes(count, rng):
+    """Batch quote results with the datetime and Decimal values model rows carry"""
+    now = timezone.now()
+    return {
+        f"T{index:04d}": {
+            "ticker": f"T{index:04d}",
+            "name": f"Company {index}",
+            "current_price": Decimal(f"{rng.uniform(1, 500):.2f}"),
+            "market_cap": rng.randint(10 ** 8, 10 ** 12),
+            "volume": rng.randint(10 ** 5, 10 ** 8),
+            "last_updated": now,
+            "source": "database",
+            "open_price": rng.uniform(1, 500),
+            "high_price": rng.uniform(1, 500),
+            "low_price": rng.uniform(1, 500),
+            "close_price": rng.uniform(1, 500),
+        }
+        for index in range(count)
+    }
+
+
+def best_time(func, repeat):
+    """Fastest of `repeat` runs, in milliseconds, and the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare JSON rendering time and bytes on the wire for large stock "
+        "responses: stdlib vs fast renderer, uncompressed vs gzip/brotli"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bars', type=int, default=2520,
+            help="Sessions in the historical payload (default: about 10 years)",
+        )
+        parser.add_argument(
+            '--periods', type=int, default=40,
+            help="Periods in the financials payload",
+        )
+        parser.add_argument(
+            '--quotes', type=int, default=100,
+            help="Tickers in the batch quote payload",
+        )
+        parser.add_argument(
+            '--ticker', default=None,
+            help="Use this ticker's stored bars and financials instead of synthetic data",
+        )
+        parser.add_argument('--repeat', type=int, default=20, help="Runs per measurement (best is kept)")
+        parser.add_argument('--seed', type=int, default=0, help="Seed for the synthetic data")
+
+    def payloads(self, options):
+        rng = random.Random(options['seed'])
+        ticker = options['ticker']
+        if ticker is None:
+            prices = synthetic_prices(options['bars'], rng)
+            financials = synthetic_financials(options['periods'], 30, rng)
+        else:
+            ticker = ticker.upper()
+            prices = [bar.as_price() for bar in DailyBar.objects.filter(ticker=ticker).order_by('date')]
+            financials = FinancialsStore(None).load(ticker, options['periods'], 'quarterly')
+            if not prices and not financials:
+                raise CommandError(f"No stored bars or financials for {ticker}")
+
+        payloads = {}
+        if prices:
+            payloads["historical"] = {
+                "ticker": ticker or "BENCH",
+                "from": prices[0]["date"],
+                "to": prices[-1]["date"],
+                "prices": prices,
+                "source": "database",
+            }
+        if financials:
+            payloads["financials"] = {
+                "ticker": ticker or "BENCH",
+                "results": financials,
+                "count": len(financials),
+                "source": "database",
+            }
+        payloads["quotes_batch"] = {"results": synthetic_quotes(options['quotes'], rng), "errors": {}}
+        return payloads
+
+    def handle(self, *args, **options):
+        repeat = max(1, options['repeat'])
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        gzip_level = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+        brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed: the fast renderer falls back to stdlib"))
+        if middleware.brotli is None:
+            self.stdout.write(self.style.WARNING("brotli is not installed: only gzip is measured"))
+
+        header = f"{'payload':<14}{'encoding':<18}{'time ms':>10}{'bytes':>12}{'vs before':>11}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, data in self.payloads(options).items():
+            before_ms, before = best_time(lambda: stdlib.render(data), repeat)
+            after_ms, after = best_time(lambda: fast.render(data), repeat)
+            rows = [
+                ("stdlib json", before_ms, len(before)),
+                ("fast json", after_ms, len(after)),
+            ]
+            gzip_ms, gzipped = best_time(lambda: gzip.compress(after, compresslevel=gzip_level, mtime=0), repeat)
+            rows.append((f"+ gzip -{gzip_level}", after_ms + gzip_ms, len(gzipped)))
+            if middleware.brotli is not None:
+                br_ms, compressed = best_time(
+                    lambda: middleware.brotli.compress(after, quality=brotli_quality), repeat
+                )
+                rows.append((f"+ brotli q{brotli_quality}", after_ms + br_ms, len(compressed)))
+
+            for index, (encoding, elapsed, size) in enumerate(rows):
+                ratio = f"{size / len(before):.1%}" if index else ""
+                self.stdout.write(
+                    f"{name if not index else '':<14}{encoding:<18}{elapsed:>10.2f}{size:>12,}{ratio:>11}"
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"{'':<14}render speedup {before_ms / after_ms:.1f}x"
+            ))
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from stock.prewarm import CALLS_PER_REFRESH, QuotePrewarmer
+from stock.services import StockDataService
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh quotes of watchlist symbols (most watched first) before they "
+        "expire, within an upstream call budget"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Run a single pass and exit instead of running continuously",
+        )
+        parser.add_argument(
+            '--calls-per-minute', type=int,
+            default=getattr(settings, 'STOCK_PREWARM_CALLS_PER_MINUTE', 60),
+            help="Upstream Polygon.io call budget",
+        )
+        parser.add_argument(
+            '--lead-seconds', type=int,
+            default=getattr(settings, 'STOCK_PREWARM_LEAD_SECONDS', 15),
+            help="Refresh quotes this many seconds before they expire",
+        )
+        parser.add_argument(
+            '--interval', type=int,
+            default=getattr(settings, 'STOCK_PREWARM_INTERVAL', 10),
+            help="Seconds between passes",
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help="Only consider the N most watched symbols",
+        )
+
+    def handle(self, *args, **options):
+        if options['calls_per_minute'] < CALLS_PER_REFRESH:
+            raise CommandError(f"--calls-per-minute must be at least {CALLS_PER_REFRESH}")
+
+        prewarmer = QuotePrewarmer(
+            StockDataService(),
+            calls_per_minute=options['calls_per_minute'],
+            lead_seconds=options['lead_seconds'],
+        )
+        if options['once']:
+            self._report(prewarmer.run_once(options['limit']))
+            return
+
+        try:
+            prewarmer.run_forever(options['interval'], options['limit'], on_pass=self._report)
+        except KeyboardInterrupt:
+            pass
+
+    def _report(self, summary):
+        message = (
+            "Refreshed {refreshed}/{due} due of {symbols} symbols "
+            "({failed} failed, {deferred} deferred, {calls} calls)".format(**summary)
+        )
+        if summary['max_lag'] is not None:
+            message += ", lag avg {avg_lag}s max {max_lag}s".format(**summary)
+        self.stdout.write(message)
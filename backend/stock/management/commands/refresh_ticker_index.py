@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from stock.rate_limit import BACKGROUND, upstream_priority
+from stock.services import StockDataService
+from stock.ticker_index import ticker_index_path
+
+
+class Command(BaseCommand):
+    help = "Rebuild the local ticker search index from Polygon.io reference tickers"
+
+    def handle(self, *args, **options):
+        try:
+            # Paging through reference tickers must not starve interactive requests
+            with upstream_priority(BACKGROUND):
+                index = StockDataService().build_ticker_index()
+        except Exception as e:
+            raise CommandError(f"Failed to build ticker index: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(index)} tickers into {ticker_index_path()}"
+        ))
@@ -0,0 +1,180 @@
+"""
+Local US-equities (NYSE/Nasdaq) trading calendar.
+
+Computes regular sessions, weekends, exchange holidays and early closes from
+the published exchange rules, so freshness decisions never need an upstream
+call.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+MONDAY, THURSDAY, SATURDAY, SUNDAY = 0, 3, 5, 6
+
+
+def _easter_sunday(year):
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th given weekday of a month; n=-1 means the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday"""
+    if day.weekday() == SATURDAY:
+        return day - timedelta(days=1)
+    if day.weekday() == SUNDAY:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=64)
+def holidays(year):
+    """Return {date: name} of full-day exchange closures for a year"""
+    days = {}
+
+    # New Year's Day falling on a Saturday is not observed on the Friday
+    # before, since that would close the market on the prior year's last day
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != SATURDAY:
+        days[_observed(new_year)] = "New Year's Day"
+
+    days[_nth_weekday(year, 1, MONDAY, 3)] = "Martin Luther King Jr. Day"
+    days[_nth_weekday(year, 2, MONDAY, 3)] = "Washington's Birthday"
+    days[_easter_sunday(year) - timedelta(days=2)] = "Good Friday"
+    days[_nth_weekday(year, 5, MONDAY, -1)] = "Memorial Day"
+    if year >= 2022:
+        days[_observed(date(year, 6, 19))] = "Juneteenth"
+    days[_observed(date(year, 7, 4))] = "Independence Day"
+    days[_nth_weekday(year, 9, MONDAY, 1)] = "Labor Day"
+    days[_nth_weekday(year, 11, THURSDAY, 4)] = "Thanksgiving Day"
+    days[_observed(date(year, 12, 25))] = "Christmas Day"
+    return days
+
+
+@lru_cache(maxsize=64)
+def early_closes(year):
+    """Return the set of 1:00 pm early-close days for a year"""
+    days = set()
+    closed = holidays(year)
+
+    # July 3rd closes early when Independence Day falls Tuesday-Friday
+    july_third = date(year, 7, 3)
+    if MONDAY <= july_third.weekday() <= THURSDAY:
+        days.add(july_third)
+
+    # Day after Thanksgiving
+    days.add(_nth_weekday(year, 11, THURSDAY, 4) + timedelta(days=1))
+
+    # Christmas Eve, unless it is a weekend day or the observed holiday itself
+    christmas_eve = date(year, 12, 24)
+    if christmas_eve.weekday() < SATURDAY and christmas_eve not in closed:
+        days.add(christmas_eve)
+    return days
+
+
+class TradingCalendar:
+    """Regular-hours trading sessions for US equities"""
+
+    tz = MARKET_TZ
+
+    def is_trading_day(self, day):
+        return day.weekday() < SATURDAY and day not in holidays(day.year)
+
+    def session(self, day):
+        """Return (open, close) aware datetimes for a trading day, or None"""
+        if not self.is_trading_day(day):
+            return None
+        close = EARLY_CLOSE if day in early_closes(day.year) else REGULAR_CLOSE
+        return (
+            datetime.combine(day, REGULAR_OPEN, tzinfo=self.tz),
+            datetime.combine(day, close, tzinfo=self.tz),
+        )
+
+    def next_trading_day(self, day):
+        day += timedelta(days=1)
+        while not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def previous_trading_day(self, day):
+        day -= timedelta(days=1)
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def _local(self, moment):
+        return moment.astimezone(self.tz)
+
+    def is_open(self, moment):
+        """True while the regular session is in progress"""
+        local = self._local(moment)
+        session = self.session(local.date())
+        return bool(session) and session[0] <= local < session[1]
+
+    def next_open(self, moment):
+        """Start of the first regular session that opens after moment"""
+        local = self._local(moment)
+        session = self.session(local.date())
+        if session and local < session[0]:
+            return session[0]
+        return self.session(self.next_trading_day(local.date()))[0]
+
+    def previous_close(self, moment):
+        """End of the most recent regular session that closed at or before moment"""
+        local = self._local(moment)
+        session = self.session(local.date())
+        if session and local >= session[1]:
+            return session[1]
+        return self.session(self.previous_trading_day(local.date()))[1]
+
+    def last_completed_session(self, moment):
+        """Date of the most recent session that has fully closed"""
+        return self.previous_close(moment).date()
+
+    def current_session_date(self, moment):
+        """Date of the session in progress, or None outside regular hours"""
+        if self.is_open(moment):
+            return self._local(moment).date()
+        return None
+
+    def sessions_between(self, start, end):
+        """Trading days in [start, end]"""
+        days = []
+        day = start
+        while day <= end:
+            if self.is_trading_day(day):
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+
+_calendar = TradingCalendar()
+
+
+def get_trading_calendar():
+    return _calendar
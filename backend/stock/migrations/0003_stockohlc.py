@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0002_remove_52_week_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockOHLC',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=255, unique=True)),
+                ('open_price', models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True)),
+                ('high_price', models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True)),
+                ('low_price', models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True)),
+                ('close_price', models.DecimalField(blank=True, decimal_places=4, max_digits=14, null=True)),
+                ('volume', models.BigIntegerField(blank=True, null=True)),
+                ('last_updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Stock OHLC',
+                'verbose_name_plural': 'Stock OHLC',
+                'db_table': 'stock_ohlc',
+            },
+        ),
+    ]
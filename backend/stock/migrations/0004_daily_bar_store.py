@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0003_stockohlc'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(db_index=True, max_length=255)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('last_updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Bar Coverage',
+                'verbose_name_plural': 'Bar Coverage',
+                'db_table': 'stock_bar_coverage',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('open', models.FloatField(blank=True, null=True)),
+                ('high', models.FloatField(blank=True, null=True)),
+                ('low', models.FloatField(blank=True, null=True)),
+                ('close', models.FloatField(blank=True, null=True)),
+                ('volume', models.BigIntegerField(blank=True, null=True)),
+                ('last_updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Daily Bar',
+                'verbose_name_plural': 'Daily Bars',
+                'db_table': 'stock_daily_bar',
+                'unique_together': {('ticker', 'date')},
+            },
+        ),
+    ]
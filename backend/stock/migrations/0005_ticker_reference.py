@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0004_daily_bar_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TickerReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=255, unique=True)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('sic_description', models.CharField(blank=True, max_length=255)),
+                ('market_cap', models.FloatField(blank=True, null=True)),
+                ('last_updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Ticker Reference',
+                'verbose_name_plural': 'Ticker References',
+                'db_table': 'stock_ticker_reference',
+            },
+        ),
+    ]
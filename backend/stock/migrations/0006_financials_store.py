@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0005_ticker_reference'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=255)),
+                ('synced_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+                ('extent', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Dataset Sync',
+                'verbose_name_plural': 'Dataset Syncs',
+                'db_table': 'stock_dataset_sync',
+                'unique_together': {('dataset', 'key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FinancialConcept',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('statement', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=255)),
+                ('label', models.CharField(blank=True, max_length=255)),
+                ('unit', models.CharField(blank=True, max_length=50)),
+                ('order', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Financial Concept',
+                'verbose_name_plural': 'Financial Concepts',
+                'db_table': 'stock_financial_concept',
+                'unique_together': {('statement', 'key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FinancialPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=255)),
+                ('timeframe', models.CharField(max_length=20)),
+                ('fiscal_year', models.CharField(blank=True, max_length=10)),
+                ('fiscal_period', models.CharField(blank=True, max_length=10)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('filing_date', models.DateField(blank=True, null=True)),
+                ('company_name', models.CharField(blank=True, max_length=255)),
+                ('cik', models.CharField(blank=True, max_length=20)),
+                ('sic', models.CharField(blank=True, max_length=10)),
+                ('source_filing_url', models.URLField(blank=True, max_length=500)),
+                ('last_updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Financial Period',
+                'verbose_name_plural': 'Financial Periods',
+                'db_table': 'stock_financial_period',
+                'unique_together': {('ticker', 'timeframe', 'start_date', 'end_date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FinancialValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('concept', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='stock.financialconcept')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='values', to='stock.financialperiod')),
+            ],
+            options={
+                'verbose_name': 'Financial Value',
+                'verbose_name_plural': 'Financial Values',
+                'db_table': 'stock_financial_value',
+                'unique_together': {('period', 'concept')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0006_financials_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsArticle',
+            fields=[
+                ('id', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('published_utc', models.DateTimeField(db_index=True)),
+                ('data', models.JSONField()),
+                ('last_updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'News Article',
+                'verbose_name_plural': 'News Articles',
+                'db_table': 'stock_news_article',
+            },
+        ),
+        migrations.CreateModel(
+            name='NewsArticleTicker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticker', models.CharField(max_length=255)),
+                ('published_utc', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticker_index', to='stock.newsarticle')),
+            ],
+            options={
+                'verbose_name': 'News Article Ticker',
+                'verbose_name_plural': 'News Article Tickers',
+                'db_table': 'stock_news_article_ticker',
+                'indexes': [models.Index(fields=['ticker', '-published_utc'], name='stock_news__ticker_0d6cca_idx')],
+                'unique_together': {('ticker', 'article')},
+            },
+        ),
+    ]
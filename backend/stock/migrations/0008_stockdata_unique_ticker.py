@@ -0,0 +1,62 @@
+from django.db import migrations
+from django.db.models import Count
+
+TABLE = 'stock_stockdata'
+
+
+def ensure_unique_ticker(apps, schema_editor):
+    """
+    Quote upserts conflict on ticker, so stock_stockdata (not managed by
+    Django) needs a unique constraint on it. Add one if the table lacks it,
+    keeping the most recently updated row of any duplicated ticker.
+    """
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if TABLE not in connection.introspection.table_names(cursor):
+            return
+        constraints = connection.introspection.get_constraints(cursor, TABLE)
+    if any(c['unique'] and c['columns'] == ['ticker'] for c in constraints.values()):
+        return
+
+    StockData = apps.get_model('stock', 'StockData')
+    duplicated = (
+        StockData.objects.values('ticker')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+        .values_list('ticker', flat=True)
+    )
+    for ticker in list(duplicated):
+        rows = StockData.objects.filter(ticker=ticker).order_by('-last_updated', '-id')
+        StockData.objects.filter(pk__in=list(rows.values_list('pk', flat=True)[1:])).delete()
+
+    schema_editor.execute(f'CREATE UNIQUE INDEX stock_stockdata_ticker_uniq ON {TABLE} (ticker)')
+
+
+def resync_id_sequence(apps, schema_editor):
+    """
+    Rows used to be created with explicit max(id) + 1 ids, which leaves a
+    PostgreSQL sequence behind the data. Move it past the highest id so
+    inserts can rely on it.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if TABLE not in connection.introspection.table_names(cursor):
+            return
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+        f"COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0007_news_store'),
+    ]
+
+    operations = [
+        migrations.RunPython(ensure_unique_ticker, migrations.RunPython.noop),
+        migrations.RunPython(resync_id_sequence, migrations.RunPython.noop),
+    ]
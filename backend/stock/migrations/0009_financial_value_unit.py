@@ -0,0 +1,31 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_units(apps, schema_editor):
+    """Give stored values the unit their concept was created with"""
+    FinancialConcept = apps.get_model('stock', 'FinancialConcept')
+    FinancialValue = apps.get_model('stock', 'FinancialValue')
+    FinancialValue.objects.update(unit=Subquery(
+        FinancialConcept.objects.filter(pk=OuterRef('concept_id')).values('unit')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock', '0008_stockdata_unique_ticker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financialvalue',
+            name='unit',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.RunPython(copy_units, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='financialconcept',
+            name='unit',
+        ),
+    ]
@@ -8,7 +8,7 @@ class StockData(models.Model):
     Model for the stock_stockdata table in Supabase
     """
     id = models.AutoField(primary_key=True)
-    ticker = models.CharField(max_length=255)
+    ticker = models.CharField(max_length=255, unique=True)
     name = models.CharField(max_length=255)
     current_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     market_cap = models.BigIntegerField(null=True, blank=True)
@@ -25,3 +25,229 @@ class StockData(models.Model):
     
     def __str__(self):
         return f"{self.ticker} - {self.name}"
+
+
+class StockOHLC(models.Model):
+    """
+    Daily OHLC snapshot cached alongside the StockData quote, so cache hits
+    can be answered without calling Polygon.io
+    """
+    ticker = models.CharField(max_length=255, unique=True)
+    open_price = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True)
+    high_price = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True)
+    low_price = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True)
+    close_price = models.DecimalField(max_digits=14, decimal_places=4, null=True, blank=True)
+    volume = models.BigIntegerField(null=True, blank=True)
+    last_updated = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'stock_ohlc'
+        verbose_name = 'Stock OHLC'
+        verbose_name_plural = 'Stock OHLC'
+
+    def __str__(self):
+        return f"{self.ticker} OHLC @ {self.last_updated}"
+
+    def as_polygon_bar(self):
+        """Return the snapshot in the o/h/l/c/v shape Polygon.io aggregates use"""
+        return {
+            "o": self.open_price,
+            "h": self.high_price,
+            "l": self.low_price,
+            "c": self.close_price,
+            "v": self.volume,
+        }
+
+
+class DailyBar(models.Model):
+    """
+    Adjusted daily OHLCV bar for a ticker, stored locally so historical
+    charts are served without calling Polygon.io
+    """
+    ticker = models.CharField(max_length=255)
+    date = models.DateField()
+    open = models.FloatField(null=True, blank=True)
+    high = models.FloatField(null=True, blank=True)
+    low = models.FloatField(null=True, blank=True)
+    close = models.FloatField(null=True, blank=True)
+    volume = models.BigIntegerField(null=True, blank=True)
+    last_updated = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'stock_daily_bar'
+        unique_together = [['ticker', 'date']]
+        verbose_name = 'Daily Bar'
+        verbose_name_plural = 'Daily Bars'
+
+    def __str__(self):
+        return f"{self.ticker} {self.date}"
+
+    def as_price(self):
+        """Return the bar in the shape used by the historical endpoint"""
+        return {
+            "date": self.date.strftime('%Y-%m-%d'),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume or 0,
+        }
+
+
+class BarCoverage(models.Model):
+    """
+    Date interval for which all of a ticker's daily bars have been fetched.
+    Lets the bar store tell "no trading that day" apart from "not fetched yet".
+    """
+    ticker = models.CharField(max_length=255, db_index=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    last_updated = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'stock_bar_coverage'
+        verbose_name = 'Bar Coverage'
+        verbose_name_plural = 'Bar Coverage'
+
+    def __str__(self):
+        return f"{self.ticker} {self.start_date} - {self.end_date}"
+
+
+class TickerReference(models.Model):
+    """
+    Reference data for a ticker (industry classification and size), kept
+    from ticker detail lookups so market-wide snapshots can be grouped
+    without one upstream call per ticker
+    """
+    ticker = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255, blank=True)
+    sic_description = models.CharField(max_length=255, blank=True)
+    market_cap = models.FloatField(null=True, blank=True)
+    last_updated = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'stock_ticker_reference'
+        verbose_name = 'Ticker Reference'
+        verbose_name_plural = 'Ticker References'
+
+    def __str__(self):
+        return f"{self.ticker} - {self.sic_description}"
+
+
+class DatasetSync(models.Model):
+    """
+    When a locally stored dataset (e.g. one ticker's quarterly financials)
+    was last synced from Polygon.io and until when it needs no refresh
+    """
+    dataset = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    synced_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+    # How many records the last sync asked for (dataset specific)
+    extent = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'stock_dataset_sync'
+        unique_together = [['dataset', 'key']]
+        verbose_name = 'Dataset Sync'
+        verbose_name_plural = 'Dataset Syncs'
+
+    def __str__(self):
+        return f"{self.dataset}:{self.key} until {self.expires_at}"
+
+
+class FinancialPeriod(models.Model):
+    """One reported fiscal period of a company's financial statements"""
+    ticker = models.CharField(max_length=255)
+    timeframe = models.CharField(max_length=20)
+    fiscal_year = models.CharField(max_length=10, blank=True)
+    fiscal_period = models.CharField(max_length=10, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    filing_date = models.DateField(null=True, blank=True)
+    company_name = models.CharField(max_length=255, blank=True)
+    cik = models.CharField(max_length=20, blank=True)
+    sic = models.CharField(max_length=10, blank=True)
+    source_filing_url = models.URLField(max_length=500, blank=True)
+    last_updated = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'stock_financial_period'
+        unique_together = [['ticker', 'timeframe', 'start_date', 'end_date']]
+        verbose_name = 'Financial Period'
+        verbose_name_plural = 'Financial Periods'
+
+    def __str__(self):
+        return f"{self.ticker} {self.timeframe} FY{self.fiscal_year} {self.fiscal_period}"
+
+
+class FinancialConcept(models.Model):
+    """
+    A financial statement line item (e.g. income_statement.revenues), with
+    the label shared by every company that reports it
+    """
+    statement = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    label = models.CharField(max_length=255, blank=True)
+    order = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'stock_financial_concept'
+        unique_together = [['statement', 'key']]
+        verbose_name = 'Financial Concept'
+        verbose_name_plural = 'Financial Concepts'
+
+    def __str__(self):
+        return f"{self.statement}.{self.key}"
+
+
+class FinancialValue(models.Model):
+    """Value of one line item in one fiscal period"""
+    period = models.ForeignKey(FinancialPeriod, on_delete=models.CASCADE, related_name='values')
+    concept = models.ForeignKey(FinancialConcept, on_delete=models.PROTECT)
+    value = models.FloatField(null=True, blank=True)
+    # Per value: companies report the same line item in different currencies
+    unit = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        db_table = 'stock_financial_value'
+        unique_together = [['period', 'concept']]
+        verbose_name = 'Financial Value'
+        verbose_name_plural = 'Financial Values'
+
+    def __str__(self):
+        return f"{self.period} {self.concept} = {self.value}"
+
+
+class NewsArticle(models.Model):
+    """A Polygon.io news article, stored once however many tickers it mentions"""
+    id = models.CharField(max_length=255, primary_key=True)
+    published_utc = models.DateTimeField(db_index=True)
+    # The article as returned by Polygon.io (title, publisher, urls, insights...)
+    data = models.JSONField()
+    last_updated = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'stock_news_article'
+        verbose_name = 'News Article'
+        verbose_name_plural = 'News Articles'
+
+    def __str__(self):
+        return f"{self.id} @ {self.published_utc}"
+
+
+class NewsArticleTicker(models.Model):
+    """Ticker -> article index entry, with the publish time for ordering"""
+    ticker = models.CharField(max_length=255)
+    article = models.ForeignKey(NewsArticle, on_delete=models.CASCADE, related_name='ticker_index')
+    published_utc = models.DateTimeField()
+
+    class Meta:
+        db_table = 'stock_news_article_ticker'
+        unique_together = [['ticker', 'article']]
+        indexes = [models.Index(fields=['ticker', '-published_utc'])]
+        verbose_name = 'News Article Ticker'
+        verbose_name_plural = 'News Article Tickers'
+
+    def __str__(self):
+        return f"{self.ticker} -> {self.article_id}"
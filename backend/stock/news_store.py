@@ -0,0 +1,169 @@
+"""
+Local news store shared across tickers.
+
+Articles are stored once, keyed by their Polygon.io id, with a ticker ->
+article index next to them, so an article mentioning several tickers is
+fetched and kept only once. A ticker's feed is served locally while its
+DatasetSync row is fresh (the NEWS freshness policy); feeds for several
+tickers are merged, deduplicated and ordered by publish time in one query.
+"""
+import logging
+from datetime import timedelta
+
+import requests
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .freshness import NEWS, get_freshness_policy
+from .models import DatasetSync, NewsArticle, NewsArticleTicker
+from .polygon_client import get_upstream_executor
+
+logger = logging.getLogger(__name__)
+
+DATASET = 'news'
+
+
+class NewsStore:
+    """Serve news for one or more tickers, syncing stale feeds from Polygon.io"""
+
+    def __init__(self, polygon_service, freshness=None):
+        self.polygon_service = polygon_service
+        self.freshness = freshness or get_freshness_policy()
+
+    def get(self, tickers, limit):
+        """
+        Return (results, source, errors) with the latest `limit` distinct
+        articles across all tickers, newest first.
+
+        source is "database" when every feed was fresh, "polygon_api" when
+        any was synced, or "stale" when a sync failed and stored articles
+        were served instead. errors maps tickers that could not be synced
+        (and have nothing stored) to a message.
+        """
+        syncs, due = self.due_feeds(tickers, limit)
+
+        # Fetch the due feeds concurrently, then store them from this thread
+        executor = get_upstream_executor()
+        futures = {
+            ticker: executor.submit(self.polygon_service.get_news, ticker, limit)
+            for ticker in due
+        }
+        outcomes = {}
+        for ticker, future in futures.items():
+            try:
+                outcomes[ticker] = future.result()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                outcomes[ticker] = e
+        source, errors = self.save_feeds(outcomes, syncs, limit)
+        return self.load(tickers, limit), source, errors
+
+    def due_feeds(self, tickers, limit):
+        """
+        Return (syncs, due): the DatasetSync rows of the tickers' feeds, and
+        the tickers whose feed must be fetched to answer for `limit` articles
+        """
+        now = timezone.now()
+        syncs = {
+            sync.key: sync
+            for sync in DatasetSync.objects.filter(dataset=DATASET, key__in=tickers)
+        }
+        due = [
+            ticker for ticker in tickers
+            if ticker not in syncs or syncs[ticker].expires_at <= now or syncs[ticker].extent < limit
+        ]
+        return syncs, due
+
+    def version(self, tickers, limit):
+        """
+        Version of the stored articles the tickers' merged feed is answered from
+
+        Returns:
+            (version, last_modified, expires_at), or None if any feed is due
+        """
+        syncs, due = self.due_feeds(tickers, limit)
+        if due:
+            return None
+        # Another ticker's sync can add or update an article mentioning these
+        # tickers, so the version comes from the articles, not the syncs
+        stats = NewsArticle.objects.filter(ticker_index__ticker__in=tickers).aggregate(
+            count=Count('id', distinct=True),
+            last_modified=Max('last_updated'),
+        )
+        expires_at = min(sync.expires_at for sync in syncs.values())
+        return (stats['count'], stats['last_modified']), stats['last_modified'], expires_at
+
+    def save_feeds(self, outcomes, syncs, limit):
+        """
+        Store fetched feeds and return (source, errors) for get().
+
+        Args:
+            outcomes: {ticker: Polygon.io news response, or the exception its fetch raised}
+            syncs: DatasetSync rows from due_feeds()
+        """
+        source = "polygon_api" if outcomes else "database"
+        errors = {}
+        for ticker, data in outcomes.items():
+            try:
+                if isinstance(data, Exception):
+                    raise data
+                if data.get("status") != "OK":
+                    raise ValueError("Failed to fetch news data from Polygon.io")
+                self.save_feed(ticker, data.get("results") or [], limit)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                if ticker in syncs:
+                    logger.warning("News sync for %s failed, serving stored articles: %s", ticker, e)
+                    source = "stale"
+                else:
+                    errors[ticker] = str(e)
+        return source, errors
+
+    def save_feed(self, ticker, articles, limit):
+        """Upsert a ticker's latest articles, index them and mark the feed fresh"""
+        now = timezone.now()
+        rows = []
+        for article in articles:
+            published = parse_datetime(article.get("published_utc") or "")
+            if article.get("id") and published:
+                rows.append(NewsArticle(id=article["id"], published_utc=published, data=article, last_updated=now))
+
+        index = {
+            (mentioned, row.id): row.published_utc
+            for row in rows
+            for mentioned in {ticker, *(row.data.get("tickers") or [])}
+        }
+
+        with transaction.atomic():
+            if rows:
+                NewsArticle.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=['id'],
+                    update_fields=['published_utc', 'data', 'last_updated'],
+                )
+                NewsArticleTicker.objects.bulk_create(
+                    [
+                        NewsArticleTicker(ticker=mentioned, article_id=article_id, published_utc=published)
+                        for (mentioned, article_id), published in index.items()
+                    ],
+                    ignore_conflicts=True,
+                )
+            DatasetSync.objects.update_or_create(
+                dataset=DATASET,
+                key=ticker,
+                defaults={
+                    "synced_at": now,
+                    "expires_at": now + timedelta(seconds=self.freshness.ttl_seconds(NEWS, now)),
+                    "extent": limit,
+                },
+            )
+
+    def load(self, tickers, limit):
+        """The latest `limit` stored articles mentioning any of the tickers, each once"""
+        articles = (
+            NewsArticle.objects.filter(ticker_index__ticker__in=tickers)
+            .distinct()
+            .order_by('-published_utc')[:limit]
+        )
+        return [article.data for article in articles]
@@ -0,0 +1,354 @@
+"""
+Shared HTTP clients for Polygon.io.
+
+Every PolygonAPIService instance goes through the same process-wide client so
+that upstream calls reuse pooled keep-alive connections instead of paying a
+fresh TLS handshake per request. Async views use AsyncPolygonHTTPClient,
+which keeps one connection pool per event loop.
+"""
+import asyncio
+import contextvars
+import random
+import threading
+import time
+import weakref
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from .rate_limit import get_rate_limiter
+
+POLYGON_BASE_URL = "https://api.polygon.io"
+
+# Responses worth another attempt; anything else goes back to the caller
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+# Set by the pool classes below whenever urllib3 opens a new socket, so the
+# client can tell whether a request was served on a reused connection.
+_connection_events = threading.local()
+
+
+def _note_new_connection():
+    _connection_events.opened = getattr(_connection_events, "opened", 0) + 1
+
+
+class _TrackingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _note_new_connection()
+        return super()._new_conn()
+
+
+class _TrackingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _note_new_connection()
+        return super()._new_conn()
+
+
+def _retry_delay(attempt, response, backoff_factor, backoff_jitter):
+    """Seconds to wait before the next attempt: Retry-After, else exponential backoff plus jitter"""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff_factor * (2 ** attempt) + random.uniform(0, backoff_jitter)
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools report newly opened connections"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TrackingHTTPConnectionPool,
+            "https": _TrackingHTTPSConnectionPool,
+        }
+
+
+class PolygonHTTPClient:
+    """
+    Thread-safe, connection-pooling HTTP client for Polygon.io.
+
+    - keeps connections alive and pools them per host
+    - applies connect/read timeouts to every request
+    - retries GETs on connection errors, timeouts, 429 and 5xx with
+      exponential backoff plus jitter
+    - counts requests and connection reuse per logical endpoint
+    - takes a token from the shared rate limiter before every attempt, so
+      retries count against the call budget too
+    """
+
+    def __init__(self, connect_timeout=3.05, read_timeout=10, max_retries=3,
+                 backoff_factor=0.3, backoff_jitter=0.3, pool_connections=10,
+                 pool_maxsize=20):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+
+        # Retries happen in get(), where each attempt goes through the rate
+        # limiter; urllib3 retrying inside the adapter would bypass it
+        adapter = _PooledAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+        )
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._stats_lock = threading.Lock()
+        self._stats = defaultdict(lambda: {
+            "requests": 0,
+            "new_connections": 0,
+            "reused_connections": 0,
+            "errors": 0,
+        })
+
+    def get(self, endpoint, url, params=None):
+        """
+        Perform a GET request.
+
+        Args:
+            endpoint: Logical endpoint name used for stats (e.g. 'prev_close')
+            url: Absolute URL to request
+            params: Optional query parameters
+
+        Returns:
+            requests.Response, the last one if every attempt got a retryable
+            status (the caller's status handling still applies)
+
+        Raises:
+            RateLimitExceeded: No call budget became available in time
+            requests.exceptions.RequestException: The request failed after retries
+        """
+        limiter = get_rate_limiter()
+        _connection_events.opened = 0
+        for attempt in range(self.max_retries + 1):
+            if limiter is not None:
+                limiter.acquire(endpoint)
+            response = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    self._record(endpoint, error=True)
+                    raise
+            except requests.exceptions.RequestException:
+                self._record(endpoint, error=True)
+                raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    self._record(endpoint, error=response.status_code >= 400)
+                    return response
+            time.sleep(_retry_delay(attempt, response, self.backoff_factor, self.backoff_jitter))
+
+    def _record(self, endpoint, error=False):
+        opened = getattr(_connection_events, "opened", 0)
+        with self._stats_lock:
+            entry = self._stats[endpoint]
+            entry["requests"] += 1
+            entry["new_connections"] += opened
+            if not opened and not error:
+                entry["reused_connections"] += 1
+            if error:
+                entry["errors"] += 1
+
+    def stats(self):
+        """Return a snapshot of per-endpoint request and connection counters"""
+        with self._stats_lock:
+            snapshot = {name: dict(entry) for name, entry in self._stats.items()}
+        for entry in snapshot.values():
+            served = entry["requests"] - entry["errors"]
+            entry["reuse_ratio"] = round(entry["reused_connections"] / served, 3) if served else None
+        return snapshot
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_polygon_client():
+    """Return the process-wide PolygonHTTPClient, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PolygonHTTPClient(
+                    connect_timeout=getattr(settings, "POLYGON_CONNECT_TIMEOUT", 3.05),
+                    read_timeout=getattr(settings, "POLYGON_READ_TIMEOUT", 10),
+                    max_retries=getattr(settings, "POLYGON_MAX_RETRIES", 3),
+                    backoff_factor=getattr(settings, "POLYGON_RETRY_BACKOFF", 0.3),
+                    backoff_jitter=getattr(settings, "POLYGON_RETRY_JITTER", 0.3),
+                    pool_connections=getattr(settings, "POLYGON_POOL_CONNECTIONS", 10),
+                    pool_maxsize=getattr(settings, "POLYGON_POOL_MAXSIZE", 20),
+                )
+    return _client
+
+
+class AsyncPolygonHTTPClient:
+    """
+    asyncio counterpart of PolygonHTTPClient, built on httpx.AsyncClient.
+
+    Same timeouts, retry policy and per-attempt rate limiting as the sync
+    client, but waiting requests do not hold a thread, so one worker can
+    keep hundreds of them in flight. Transport failures are raised as requests
+    exceptions, so callers handle both clients' errors the same way.
+    """
+
+    def __init__(self, connect_timeout=3.05, read_timeout=10, max_retries=3,
+                 backoff_factor=0.3, backoff_jitter=0.3, max_connections=200,
+                 max_keepalive_connections=50):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_jitter = backoff_jitter
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+        self._stats = defaultdict(lambda: {"requests": 0, "errors": 0})
+
+    async def get(self, endpoint, url, params=None):
+        """
+        Perform a GET request.
+
+        Args:
+            endpoint: Logical endpoint name used for stats (e.g. 'prev_close')
+            url: Absolute URL to request
+            params: Optional query parameters
+
+        Returns:
+            httpx.Response
+
+        Raises:
+            RateLimitExceeded: No call budget became available in time
+            requests.exceptions.RequestException: The request failed after retries
+        """
+        limiter = get_rate_limiter()
+        for attempt in range(self.max_retries + 1):
+            if limiter is not None:
+                await limiter.acquire_async(endpoint)
+            response = None
+            try:
+                response = await self.client.get(url, params=params)
+            except httpx.TimeoutException as e:
+                if attempt == self.max_retries:
+                    self._record(endpoint, error=True)
+                    raise requests.exceptions.Timeout(str(e)) from e
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    self._record(endpoint, error=True)
+                    raise requests.exceptions.ConnectionError(str(e)) from e
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    self._record(endpoint, error=response.status_code >= 400)
+                    return response
+            await asyncio.sleep(_retry_delay(attempt, response, self.backoff_factor, self.backoff_jitter))
+
+    def _record(self, endpoint, error=False):
+        entry = self._stats[endpoint]
+        entry["requests"] += 1
+        if error:
+            entry["errors"] += 1
+
+    def stats(self):
+        return {name: dict(entry) for name, entry in self._stats.items()}
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+# httpx pools are bound to the event loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+
+def get_async_polygon_client():
+    """Return the AsyncPolygonHTTPClient of the running event loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = AsyncPolygonHTTPClient(
+                connect_timeout=getattr(settings, "POLYGON_CONNECT_TIMEOUT", 3.05),
+                read_timeout=getattr(settings, "POLYGON_READ_TIMEOUT", 10),
+                max_retries=getattr(settings, "POLYGON_MAX_RETRIES", 3),
+                backoff_factor=getattr(settings, "POLYGON_RETRY_BACKOFF", 0.3),
+                backoff_jitter=getattr(settings, "POLYGON_RETRY_JITTER", 0.3),
+                max_connections=getattr(settings, "POLYGON_ASYNC_MAX_CONNECTIONS", 200),
+                max_keepalive_connections=getattr(settings, "POLYGON_ASYNC_MAX_KEEPALIVE", 50),
+            )
+    return client
+
+
+def async_client_stats():
+    """Per-endpoint counters summed over every event loop's async client"""
+    with _async_clients_lock:
+        clients = list(_async_clients.values())
+    totals = defaultdict(lambda: {"requests": 0, "errors": 0})
+    for client in clients:
+        for name, entry in client.stats().items():
+            totals[name]["requests"] += entry["requests"]
+            totals[name]["errors"] += entry["errors"]
+    return dict(totals)
+
+
+class RequestMemo:
+    """
+    Request-scoped memo of upstream responses.
+
+    Concurrent callers asking for the same URL share a single in-flight
+    fetch: the first caller performs it and the others wait on its result
+    (or its exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def get_or_fetch(self, key, fetch):
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+        if owner:
+            try:
+                future.set_result(fetch())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that runs each task in a copy of the submitter's context"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        # Keeps the caller's upstream priority (see rate_limit) on worker threads
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_upstream_executor():
+    """Return the process-wide bounded pool used to run Polygon calls concurrently"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ContextThreadPoolExecutor(
+                    max_workers=getattr(settings, "POLYGON_MAX_CONCURRENCY", 16),
+                    thread_name_prefix="polygon-upstream",
+                )
+    return _executor
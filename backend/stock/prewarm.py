@@ -0,0 +1,197 @@
+"""
+Quote pre-warming for symbols that sit in users' watchlists.
+
+Every pass reads the distinct watchlist symbols, most watched first, and
+refreshes the StockData row and OHLC snapshot of each one that is missing
+or about to expire, so dashboard loads find them fresh. Upstream calls are
+paced by a per-minute budget; symbols that do not fit wait for the next
+pass. Calls run in the BACKGROUND rate-limit class, so they only use shared
+budget left over by interactive requests. Refresh lag (how long after expiry a symbol was refreshed; negative
+means ahead of time) is logged per pass.
+"""
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import Count
+from django.utils import timezone
+
+from api.models import WatchlistItem
+
+from .freshness import OHLC, QUOTE
+from .models import StockData, StockOHLC
+from .polygon_client import get_polygon_client
+from .rate_limit import BACKGROUND, RateLimitExceeded, upstream_priority
+
+logger = logging.getLogger(__name__)
+
+# Upstream calls one quote refresh usually takes (ticker details, daily
+# OHLC, previous close); used to decide whether a refresh fits the budget
+CALLS_PER_REFRESH = 3
+
+
+def watchlist_symbols(limit=None):
+    """Distinct watchlist symbols, ordered by how many watchlists contain them"""
+    rows = (
+        WatchlistItem.objects.values('symbol')
+        .annotate(watchlists=Count('watchlist'))
+        .order_by('-watchlists', 'symbol')
+    )
+    symbols = []
+    for row in rows:
+        symbol = (row['symbol'] or '').strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+            if limit and len(symbols) >= limit:
+                break
+    return symbols
+
+
+def _upstream_calls():
+    return sum(entry["requests"] for entry in get_polygon_client().stats().values())
+
+
+class CallBudget:
+    """Sliding one-minute window of upstream calls"""
+
+    def __init__(self, calls_per_minute):
+        self.calls_per_minute = calls_per_minute
+        self._calls = deque()
+
+    def _trim(self, now):
+        while self._calls and now - self._calls[0][0] >= 60:
+            self._calls.popleft()
+
+    def used(self, now=None):
+        now = now or time.monotonic()
+        self._trim(now)
+        return sum(count for _, count in self._calls)
+
+    def wait_time(self, calls, now=None):
+        """Seconds until `calls` more fit in the window (0 if they fit now)"""
+        now = now or time.monotonic()
+        excess = self.used(now) + calls - self.calls_per_minute
+        if excess <= 0:
+            return 0.0
+        # Wait for enough of the oldest calls to leave the window
+        for moment, count in self._calls:
+            excess -= count
+            if excess <= 0:
+                return moment + 60 - now
+        return 60.0
+
+    def record(self, calls, now=None):
+        if calls:
+            self._calls.append((now or time.monotonic(), calls))
+
+
+class QuotePrewarmer:
+    """Refresh watchlist quotes ahead of expiry within an upstream call budget"""
+
+    def __init__(self, stock_service, calls_per_minute, lead_seconds, max_wait=5.0):
+        """
+        Args:
+            stock_service: StockDataService used to fetch and store quotes
+            calls_per_minute: Upstream call budget
+            lead_seconds: Refresh quotes this long before they expire
+            max_wait: Longest a pass waits for budget before deferring the
+                remaining symbols to the next pass
+        """
+        self.service = stock_service
+        self.budget = CallBudget(calls_per_minute)
+        self.lead = timedelta(seconds=lead_seconds)
+        self.max_wait = max_wait
+
+    def expirations(self, symbols):
+        """{symbol: moment its cached quote (or OHLC) stops being fresh}; None if not cached"""
+        freshness = self.service.freshness
+        quotes = dict(
+            StockData.objects.filter(ticker__in=symbols).order_by().values_list('ticker', 'last_updated')
+        )
+        snapshots = dict(
+            StockOHLC.objects.filter(ticker__in=symbols).values_list('ticker', 'last_updated')
+        )
+        expirations = {}
+        for symbol in symbols:
+            if symbol not in quotes or symbol not in snapshots:
+                expirations[symbol] = None
+                continue
+            expirations[symbol] = min(
+                freshness.expires_at(QUOTE, quotes[symbol]),
+                freshness.expires_at(OHLC, snapshots[symbol]),
+            )
+        return expirations
+
+    def run_once(self, limit=None):
+        """
+        One pass over the watchlist symbols.
+
+        Returns:
+            Summary dict: symbols, due, refreshed, failed, deferred, calls,
+            and the average and maximum refresh lag in seconds
+        """
+        symbols = watchlist_symbols(limit)
+        now = timezone.now()
+        expirations = self.expirations(symbols)
+        due = [
+            symbol for symbol in symbols
+            if expirations[symbol] is None or expirations[symbol] - now <= self.lead
+        ]
+
+        refreshed, failed, deferred, lags = 0, 0, 0, []
+        calls_before = _upstream_calls()
+        for position, symbol in enumerate(due):
+            wait = self.budget.wait_time(CALLS_PER_REFRESH)
+            if wait > self.max_wait:
+                deferred = len(due) - position
+                break
+            time.sleep(wait)
+
+            before = _upstream_calls()
+            try:
+                with upstream_priority(BACKGROUND, wait=self.max_wait):
+                    self.service.fetch_and_cache_data(symbol)
+                refreshed += 1
+                if expirations[symbol] is not None:
+                    lags.append((timezone.now() - expirations[symbol]).total_seconds())
+            except RateLimitExceeded:
+                # Interactive traffic is using the shared budget; try again next pass
+                deferred = len(due) - position
+                break
+            except Exception as e:
+                failed += 1
+                logger.warning("Pre-warming %s failed: %s", symbol, e)
+            finally:
+                self.budget.record(_upstream_calls() - before)
+
+        summary = {
+            "symbols": len(symbols),
+            "due": len(due),
+            "refreshed": refreshed,
+            "failed": failed,
+            "deferred": deferred,
+            "calls": _upstream_calls() - calls_before,
+            "avg_lag": round(sum(lags) / len(lags), 1) if lags else None,
+            "max_lag": round(max(lags), 1) if lags else None,
+        }
+        logger.info(
+            "Pre-warmed %(refreshed)d/%(due)d due of %(symbols)d watchlist symbols "
+            "(%(failed)d failed, %(deferred)d deferred, %(calls)d calls); "
+            "lag avg %(avg_lag)s s, max %(max_lag)s s", summary
+        )
+        if deferred:
+            logger.warning("Call budget exhausted: %d watchlist symbols deferred to the next pass", deferred)
+        return summary
+
+    def run_forever(self, interval, limit=None, on_pass=None):
+        """Run passes every `interval` seconds until interrupted"""
+        while True:
+            started = time.monotonic()
+            # Long-running process: drop connections the database timed out
+            close_old_connections()
+            summary = self.run_once(limit)
+            if on_pass:
+                on_pass(summary)
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
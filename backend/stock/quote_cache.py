@@ -0,0 +1,113 @@
+"""
+In-process L1 cache for fresh quote rows and OHLC snapshots.
+
+Sits in front of the StockData / StockOHLC lookups (the L2 tier). An entry
+lives until the row it holds stops being fresh under the freshness policy,
+capped at STOCK_QUOTE_CACHE_MAX_TTL so writes from other processes are
+picked up soon, and this process drops entries for tickers it writes.
+Hit rates are counted per tier.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .freshness import OHLC, QUOTE
+
+
+class QuoteCache:
+    """Thread-safe, size-bounded LRU of (kind, ticker) -> value with per-entry expiry"""
+
+    def __init__(self, maxsize=2048, max_ttl=60):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"l1_hits": 0, "l1_misses": 0, "l2_hits": 0, "l2_misses": 0}
+
+    def get_many(self, kind, tickers):
+        """Return {ticker: value} for the tickers with a live entry, counting L1 hits and misses"""
+        now = time.time()
+        found = {}
+        with self._lock:
+            for ticker in tickers:
+                entry = self._entries.get((kind, ticker))
+                if entry is not None and entry[1] <= now:
+                    del self._entries[(kind, ticker)]
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end((kind, ticker))
+                    found[ticker] = entry[0]
+            self._counters["l1_hits"] += len(found)
+            self._counters["l1_misses"] += len(tickers) - len(found)
+        return found
+
+    def set_many(self, kind, values, expires_at):
+        """
+        Store {ticker: value} loaded from the database (L2).
+
+        Args:
+            expires_at: {ticker: epoch seconds} when each value stops being fresh
+        """
+        now = time.time()
+        with self._lock:
+            for ticker, value in values.items():
+                expiry = min(expires_at[ticker], now + self.max_ttl)
+                if expiry <= now:
+                    continue
+                self._entries[(kind, ticker)] = (value, expiry)
+                self._entries.move_to_end((kind, ticker))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def record_l2(self, hits, misses):
+        """Count database lookups made after L1 misses"""
+        with self._lock:
+            self._counters["l2_hits"] += hits
+            self._counters["l2_misses"] += misses
+
+    def invalidate(self, tickers, kinds=(QUOTE, OHLC)):
+        with self._lock:
+            for ticker in tickers:
+                for kind in kinds:
+                    self._entries.pop((kind, ticker), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+
+        def tier(hits, misses):
+            lookups = hits + misses
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            }
+
+        return {
+            "l1": {**tier(counters["l1_hits"], counters["l1_misses"]), "size": size, "maxsize": self.maxsize},
+            "l2": tier(counters["l2_hits"], counters["l2_misses"]),
+        }
+
+
+_quote_cache = None
+_quote_cache_lock = threading.Lock()
+
+
+def get_quote_cache():
+    """Return the process-wide L1 quote cache, creating it on first use"""
+    global _quote_cache
+    if _quote_cache is None:
+        with _quote_cache_lock:
+            if _quote_cache is None:
+                _quote_cache = QuoteCache(
+                    maxsize=getattr(settings, 'STOCK_QUOTE_CACHE_SIZE', 2048),
+                    max_ttl=getattr(settings, 'STOCK_QUOTE_CACHE_MAX_TTL', 60),
+                )
+    return _quote_cache
@@ -0,0 +1,292 @@
+"""
+Token-bucket rate limiting for the Polygon.io key, shared across workers.
+
+All processes using the key draw from one bucket whose state lives either
+in a lock-protected file (workers on one host) or in the Django cache
+(workers on several hosts, with a shared cache backend such as Redis or
+Memcached). Calls are split into priority classes: interactive calls may
+use every token, while background work (stale refreshes, pre-warming,
+index rebuilds) only takes tokens above a reserve kept for interactive
+traffic.
+
+The priority and how long a call may wait for a token are carried in a
+context variable, set with upstream_priority(). A call that cannot get a
+token in time raises RateLimitExceeded, a RequestException, so callers
+fall back to cached data the same way they do for other upstream errors.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process bucket
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+# Seconds a call of each class waits for a token unless its context says
+# otherwise (overridden by POLYGON_RATE_LIMIT_WAITS)
+DEFAULT_WAITS = {INTERACTIVE: 5.0, BACKGROUND: 30.0}
+
+_priority = contextvars.ContextVar('polygon_priority', default=(INTERACTIVE, None))
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """No Polygon.io call budget became available before the caller's deadline"""
+
+    def __init__(self, *args, priority=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Class of the call that gave up (INTERACTIVE or BACKGROUND)
+        self.priority = priority
+
+
+def outranked_by_caller(error):
+    """
+    Whether `error` is a background call's rate limit failure seen by an
+    interactive caller (e.g. one that joined a background refresh): that
+    caller may still get a token by fetching on its own
+    """
+    return (
+        isinstance(error, RateLimitExceeded)
+        and error.priority == BACKGROUND
+        and current_priority()[0] == INTERACTIVE
+    )
+
+
+@contextmanager
+def upstream_priority(priority, wait=None):
+    """
+    Run the block's Polygon.io calls in a priority class.
+
+    Args:
+        priority: INTERACTIVE or BACKGROUND
+        wait: Seconds each call may wait for a token; 0 fails fast.
+            Defaults to the class's POLYGON_RATE_LIMIT_WAITS entry.
+    """
+    token = _priority.set((priority, wait))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    """(priority, wait) for calls made from the current context"""
+    priority, wait = _priority.get()
+    if wait is None:
+        waits = getattr(settings, 'POLYGON_RATE_LIMIT_WAITS', DEFAULT_WAITS)
+        wait = waits.get(priority, DEFAULT_WAITS[priority])
+    return priority, wait
+
+
+class _FileBucketStore:
+    """Bucket state in a small JSON file, serialized with an exclusive flock"""
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def locked_state(self):
+        with open(self.path, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                content = f.read()
+                state = json.loads(content) if content else None
+                holder = {"state": state}
+                yield holder
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(holder["state"]))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class _CacheBucketStore:
+    """Bucket state in the Django cache, serialized with an add()-based lock"""
+
+    LOCK_TIMEOUT = 2
+
+    def __init__(self, key):
+        self.key = key
+        self.lock_key = f"{key}:lock"
+
+    @contextmanager
+    def locked_state(self):
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.LOCK_TIMEOUT
+        while not cache.add(self.lock_key, owner, timeout=self.LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                # A holder died mid-update; its lock expires on its own
+                break
+            time.sleep(0.005)
+        try:
+            holder = {"state": cache.get(self.key)}
+            yield holder
+            cache.set(self.key, holder["state"], timeout=None)
+        finally:
+            if cache.get(self.lock_key) == owner:
+                cache.delete(self.lock_key)
+
+
+class _LocalBucketStore:
+    """Bucket state for this process only"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    @contextmanager
+    def locked_state(self):
+        with self._lock:
+            holder = {"state": self._state}
+            yield holder
+            self._state = holder["state"]
+
+
+class TokenBucket:
+    """
+    Shared token bucket refilled at `per_minute` tokens a minute, holding
+    at most `burst` tokens. Background calls leave `reserve` tokens for
+    interactive ones.
+    """
+
+    def __init__(self, store, per_minute, burst=None, reserve=None):
+        self.store = store
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or max(1, per_minute // 6))
+        reserve = self.capacity * 0.3 if reserve is None else reserve
+        # Background calls need a whole token above the reserve: with a
+        # bucket too small for both, the reserve gives way
+        self.reserve = float(min(reserve, max(0.0, self.capacity - 1)))
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"granted": 0, "waited": 0, "rejected": 0})
+
+    def _try_take(self, priority):
+        """Take a token if one is available to `priority`; otherwise return seconds to wait"""
+        floor = self.reserve if priority == BACKGROUND else 0.0
+        with self._lock, self.store.locked_state() as holder:
+            now = time.time()
+            state = holder["state"] or {"tokens": self.capacity, "updated": now}
+            tokens = min(self.capacity, state["tokens"] + (now - state["updated"]) * self.rate)
+            taken = tokens - 1 >= floor
+            if taken:
+                tokens -= 1
+            holder["state"] = {"tokens": tokens, "updated": now}
+        return 0.0 if taken else (floor + 1 - tokens) / self.rate
+
+    def acquire(self, endpoint=None):
+        """
+        Take one token for a call from the current context, waiting up to
+        the context's allowance.
+
+        Raises:
+            RateLimitExceeded: No token became available in time
+        """
+        priority, wait = current_priority()
+        deadline = time.monotonic() + wait
+        waited = False
+        while True:
+            retry_in = self._try_take(priority)
+            if not retry_in:
+                self._record(priority, "waited" if waited else "granted")
+                return
+            self._check_deadline(priority, endpoint, retry_in, deadline)
+            waited = True
+            time.sleep(retry_in)
+
+    async def acquire_async(self, endpoint=None):
+        """acquire() for coroutines: waits on the event loop instead of blocking the thread"""
+        priority, wait = current_priority()
+        deadline = time.monotonic() + wait
+        waited = False
+        # The store's lock (flock, or the cache lock's polling) blocks, so
+        # take tokens on a worker thread rather than the event loop
+        try_take = sync_to_async(self._try_take, thread_sensitive=False)
+        while True:
+            retry_in = await try_take(priority)
+            if not retry_in:
+                self._record(priority, "waited" if waited else "granted")
+                return
+            self._check_deadline(priority, endpoint, retry_in, deadline)
+            waited = True
+            await asyncio.sleep(retry_in)
+
+    def _check_deadline(self, priority, endpoint, retry_in, deadline):
+        if retry_in > deadline - time.monotonic():
+            self._record(priority, "rejected")
+            raise RateLimitExceeded(
+                f"Polygon.io rate limit reached for {priority} call"
+                + (f" to {endpoint}" if endpoint else ""),
+                priority=priority,
+            )
+
+    def _record(self, priority, outcome):
+        with self._lock:
+            self._stats[priority][outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "per_minute": round(self.rate * 60, 2),
+                "burst": self.capacity,
+                "reserve": self.reserve,
+                "classes": {name: dict(entry) for name, entry in self._stats.items()},
+            }
+
+
+def _build_store(backend):
+    if backend == 'cache':
+        return _CacheBucketStore('polygon:rate_limit')
+    if backend == 'file' and fcntl is not None:
+        path = getattr(settings, 'POLYGON_RATE_LIMIT_FILE', None) or os.path.join(
+            tempfile.gettempdir(), 'polygon_rate_limit.json'
+        )
+        return _FileBucketStore(path)
+    if backend == 'file':
+        logger.warning("File locks are unavailable here; the Polygon.io rate limit is per process")
+    return _LocalBucketStore()
+
+
+_bucket = None
+_bucket_loaded = False
+_bucket_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Return the process-wide TokenBucket, or None when
+    POLYGON_RATE_LIMIT_PER_MINUTE is 0 (unlimited)
+    """
+    global _bucket, _bucket_loaded
+    if not _bucket_loaded:
+        with _bucket_lock:
+            if not _bucket_loaded:
+                per_minute = getattr(settings, 'POLYGON_RATE_LIMIT_PER_MINUTE', 0)
+                if per_minute:
+                    _bucket = TokenBucket(
+                        _build_store(getattr(settings, 'POLYGON_RATE_LIMIT_BACKEND', 'file')),
+                        per_minute,
+                        burst=getattr(settings, 'POLYGON_RATE_LIMIT_BURST', None),
+                        reserve=getattr(settings, 'POLYGON_RATE_LIMIT_INTERACTIVE_RESERVE', None),
+                    )
+                _bucket_loaded = True
+    return _bucket
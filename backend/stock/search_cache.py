@@ -0,0 +1,117 @@
+"""
+Bounded LRU cache for company search results that reuses shorter queries.
+
+Typing "a", "ap", "app", "appl" issues one search per keystroke. When the
+result for a prefix of the new query is cached and was not truncated by
+the upstream page limit, it already contains every match for the longer
+query, so the answer is found by filtering it locally.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def matches_query(result, query):
+    """Whether a ticker search result matches every word of a query"""
+    haystack = f"{result.get('ticker') or ''} {result.get('name') or ''}".lower()
+    return all(word in haystack for word in query.lower().split())
+
+
+class PrefixLRUCache:
+    """
+    Thread-safe LRU of query -> (results, complete) with hit/miss counters.
+
+    complete means the results are every match for the query (the upstream
+    page was not full), which is what makes an entry reusable for longer
+    queries.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60 * 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._prefix_hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _normalize(query):
+        return " ".join(query.lower().split())
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[2] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, query):
+        """Cached results for a query, or None on a miss"""
+        key = self._normalize(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lookup(key, now)
+            if entry is not None:
+                self._hits += 1
+                return entry[0]
+
+            # Longest cached prefix whose result was complete
+            for end in range(len(key) - 1, 0, -1):
+                entry = self._lookup(key[:end], now)
+                if entry is not None and entry[1]:
+                    results = [result for result in entry[0] if matches_query(result, key)]
+                    self._store(key, results, True, now)
+                    self._prefix_hits += 1
+                    return results
+
+            self._misses += 1
+            return None
+
+    def put(self, query, results, complete):
+        with self._lock:
+            self._store(self._normalize(query), results, complete, time.monotonic())
+
+    def _store(self, key, results, complete, now):
+        self._entries[key] = (results, complete, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._prefix_hits + self._misses
+            return {
+                "hits": self._hits,
+                "prefix_hits": self._prefix_hits,
+                "misses": self._misses,
+                "hit_ratio": round((self._hits + self._prefix_hits) / lookups, 4) if lookups else None,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """Return the process-wide search result cache, creating it on first use"""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = PrefixLRUCache(
+                    maxsize=getattr(settings, 'STOCK_SEARCH_CACHE_SIZE', 1024),
+                    ttl=getattr(settings, 'STOCK_SEARCH_CACHE_TTL', 60 * 60),
+                )
+    return _search_cache
@@ -0,0 +1,79 @@
+"""
+Sector performance from a market-wide grouped daily snapshot.
+
+Two grouped-daily snapshots (the latest settled session and the one before
+it) give every ticker's close-to-close change in two upstream calls. They
+are joined with locally cached reference data (SIC description, market cap)
+and reduced per sector with NumPy group-by operations.
+"""
+import numpy as np
+
+
+def snapshot_closes(results):
+    """(tickers, closes) arrays from Polygon.io grouped daily results"""
+    rows = [(bar["T"], bar["c"]) for bar in results if bar.get("T") and bar.get("c")]
+    tickers = np.array([ticker for ticker, _ in rows], dtype=object)
+    closes = np.array([close for _, close in rows], dtype=float)
+    return tickers, closes
+
+
+def percent_changes(current, previous):
+    """
+    Close-to-close % change for tickers present in both snapshots.
+
+    Args:
+        current, previous: (tickers, closes) pairs from snapshot_closes
+
+    Returns:
+        (tickers, changes) arrays, sorted by ticker
+    """
+    tickers, now_index, before_index = np.intersect1d(
+        current[0].astype(str), previous[0].astype(str), return_indices=True
+    )
+    before = previous[1][before_index]
+    valid = before > 0
+    changes = (current[1][now_index][valid] / before[valid] - 1.0) * 100.0
+    return tickers[valid], changes
+
+
+def group_performance(changes, sectors, weights=None, min_count=1):
+    """
+    Aggregate per-ticker % changes by sector.
+
+    Args:
+        changes: 1-D float array of % changes
+        sectors: Array of sector labels, aligned with changes
+        weights: Optional market caps for a cap-weighted change (NaN = unknown)
+        min_count: Sectors with fewer tickers are left out
+
+    Returns:
+        {sector: {"change", "median", "weighted_change", "count"}}
+    """
+    if len(changes) == 0:
+        return {}
+    labels, groups = np.unique(sectors, return_inverse=True)
+    counts = np.bincount(groups, minlength=len(labels))
+    means = np.bincount(groups, weights=changes, minlength=len(labels)) / counts
+
+    # Medians: sort by (sector, change) and pick the middle of every run
+    ordered = changes[np.lexsort((changes, groups))]
+    starts = np.cumsum(counts) - counts
+    medians = (ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]) / 2
+
+    weighted = np.full(len(labels), np.nan)
+    if weights is not None:
+        weights = np.nan_to_num(np.asarray(weights, dtype=float), nan=0.0)
+        totals = np.bincount(groups, weights=weights, minlength=len(labels))
+        sums = np.bincount(groups, weights=changes * weights, minlength=len(labels))
+        np.divide(sums, totals, out=weighted, where=totals > 0)
+
+    return {
+        str(label): {
+            "change": round(float(means[i]), 4),
+            "median": round(float(medians[i]), 4),
+            "weighted_change": None if np.isnan(weighted[i]) else round(float(weighted[i]), 4),
+            "count": int(counts[i]),
+        }
+        for i, label in enumerate(labels)
+        if counts[i] >= min_count
+    }
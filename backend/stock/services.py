@@ -1,16 +1,63 @@
+import hashlib
+import itertools
+import logging
 import requests
+import numpy as np
 import os
+import threading
+import time
+from collections import deque
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
-from django.db import models, connection
-from .models import StockData
-from datetime import datetime
+from django.db import close_old_connections, transaction
+from .models import StockData, StockOHLC, TickerReference
+from .polygon_client import (
+    POLYGON_BASE_URL, ContextThreadPoolExecutor, RequestMemo, get_polygon_client, get_upstream_executor,
+)
+from .freshness import OHLC, QUOTE, get_freshness_policy
+from .singleflight import SingleFlight
+from .market_calendar import get_trading_calendar
+from .bar_store import HistoricalBarStore
+from .financials_store import FinancialsStore
+from .news_store import NewsStore
+from .upsert import bulk_upsert
+from .quote_cache import get_quote_cache
+from .rate_limit import BACKGROUND, RateLimitExceeded, outranked_by_caller, upstream_priority
+from .indicators import compute_indicators
+from .analytics import align_closes, log_returns, return_matrices
+from .sectors import group_performance, percent_changes, snapshot_closes
+from .search_cache import get_search_cache
+from .ticker_index import (
+    ENTRY_FIELDS, TickerIndex, get_ticker_index, load_snapshot, save_snapshot,
+    set_ticker_index, ticker_index_max_age,
+)
+from contextlib import contextmanager
+from django.core.cache import cache
+from datetime import date, datetime
 
 import dotenv
 from dotenv import load_dotenv
 load_dotenv()
 import dotenv
 
+logger = logging.getLogger(__name__)
+
+# Polygon.io's maximum page size for aggregate bars
+HISTORY_PAGE_LIMIT = 50000
+
+# Results per live ticker search; a shorter page is a complete result
+SEARCH_PAGE_LIMIT = 10
+
+# Polygon.io's maximum page size for reference tickers
+REFERENCE_PAGE_LIMIT = 1000
+
+# Indicator results over settled history only change if bars are corrected
+SETTLED_INDICATORS_TTL = 24 * 60 * 60
+
+# Sector performance is keyed by session, so it only has to outlive one
+SECTOR_PERFORMANCE_TTL = 4 * 24 * 60 * 60
+
 class PolygonAPIService:
     """Service class for handling Polygon.io API interactions"""
     
@@ -18,22 +65,56 @@ class PolygonAPIService:
         self.api_key = os.getenv('POLYGON_API_KEY')
         if not self.api_key:
             raise ValueError("POLYGON_API_KEY environment variable is not set")
+        self.client = get_polygon_client()
+        self._memo = None
+        self._memo_depth = 0
+        self._memo_lock = threading.Lock()
+
+    @contextmanager
+    def request_scope(self):
+        """
+        Memoize upstream responses for the duration of the block so that each
+        URL is fetched at most once, even when requested from several threads.
+        Overlapping scopes on the same service share one memo, which is
+        dropped when the last of them exits.
+        """
+        with self._memo_lock:
+            if self._memo_depth == 0:
+                self._memo = RequestMemo()
+            self._memo_depth += 1
+        try:
+            yield
+        finally:
+            with self._memo_lock:
+                self._memo_depth -= 1
+                if self._memo_depth == 0:
+                    self._memo = None
+
+    def _get(self, endpoint, url, params):
+        """Issue a GET through the shared pooled Polygon client"""
+        memo = self._memo
+        if memo is None:
+            return self.client.get(endpoint, url, params=params)
+        key = (url, tuple(sorted(params.items())))
+        return memo.get_or_fetch(
+            key, lambda: self.client.get(endpoint, url, params=params)
+        )
     
     def get_ticker_info(self, ticker):
         """Fetch ticker information from Polygon.io"""
-        url = f"https://api.polygon.io/v3/reference/tickers/{ticker}"
+        url = f"{POLYGON_BASE_URL}/v3/reference/tickers/{ticker}"
         params = {"apikey": self.api_key}
         
-        response = requests.get(url, params=params)
+        response = self._get("ticker_info", url, params)
         response.raise_for_status()
         return response.json()
     
     def get_previous_close(self, ticker):
         """Fetch previous close price and volume from Polygon.io"""
-        url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/prev"
+        url = f"{POLYGON_BASE_URL}/v2/aggs/ticker/{ticker}/prev"
         params = {"apikey": self.api_key}
         
-        response = requests.get(url, params=params)
+        response = self._get("prev_close", url, params)
         if response.status_code == 200:
             return response.json()
         return {}
@@ -45,14 +126,14 @@ class PolygonAPIService:
         """
         # Try to get today's data first
         today = datetime.now().date().strftime('%Y-%m-%d')
-        url = f"https://api.polygon.io/v1/open-close/{ticker}/{today}"
+        url = f"{POLYGON_BASE_URL}/v1/open-close/{ticker}/{today}"
         params = {
             "adjusted": "true",
             "apikey": self.api_key
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self._get("open_close", url, params)
             if response.status_code == 200:
                 data = response.json()
                 # Check if we got valid data
@@ -75,35 +156,128 @@ class PolygonAPIService:
     
     def search_tickers(self, query):
         """Search for tickers by company name using Polygon.io"""
-        url = "https://api.polygon.io/v3/reference/tickers"
+        url = f"{POLYGON_BASE_URL}/v3/reference/tickers"
         params = {
             "apikey": self.api_key,
             "search": query,
             "active": "true",
-            "limit": 10
+            "limit": SEARCH_PAGE_LIMIT
         }
         
-        response = requests.get(url, params=params)
+        response = self._get("ticker_search", url, params)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_reference_tickers(self):
+        """Yield every active US stock from Polygon.io's reference tickers, page by page"""
+        url = f"{POLYGON_BASE_URL}/v3/reference/tickers"
+        params = {
+            "apiKey": self.api_key,
+            "market": "stocks",
+            "active": "true",
+            "sort": "ticker",
+            "limit": REFERENCE_PAGE_LIMIT
+        }
+
+        while url:
+            response = self._get("ticker_list", url, params)
+            response.raise_for_status()
+            data = response.json()
+            yield from data.get("results") or []
+            url = data.get("next_url")
+            # next_url already carries the query, except for the API key
+            params = {"apiKey": self.api_key}
+
+    def get_grouped_daily(self, day):
+        """Fetch the daily bar of every US stock for one session from Polygon.io"""
+        url = f"{POLYGON_BASE_URL}/v2/aggs/grouped/locale/us/market/stocks/{day.isoformat()}"
+        params = {"apikey": self.api_key, "adjusted": "true"}
+
+        response = self._get("grouped_daily", url, params)
         response.raise_for_status()
         return response.json()
-    
 
     def get_historical_prices(self, ticker, from_date, to_date):
         """
         Fetch historical price data using Polygon.io custom bars endpoint.
         Example: https://api.polygon.io/v2/aggs/ticker/AAPL/range/1/day/2023-01-01/2023-01-10
+
+        Follows next_url pagination, so the whole range is returned.
         """
-        url = f"https://api.polygon.io/v2/aggs/ticker/{ticker}/range/1/day/{from_date}/{to_date}"
+        results = list(self.iter_historical_prices(ticker, from_date, to_date))
+        return {
+            "ticker": ticker,
+            "status": "OK",
+            "results": results,
+            "resultsCount": len(results)
+        }
+
+    def _fetch_aggregate_pages(self, ticker, from_date, to_date):
+        """Fetch every page of daily bars for one window, following next_url"""
+        url = f"{POLYGON_BASE_URL}/v2/aggs/ticker/{ticker}/range/1/day/{from_date}/{to_date}"
         params = {
             "adjusted": "true",
             "sort": "asc",
-            "limit": 120,
+            "limit": HISTORY_PAGE_LIMIT,
             "apiKey": self.api_key
         }
 
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        results = []
+        while url:
+            response = self._get("historical_aggs", url, params)
+            response.raise_for_status()
+            data = response.json()
+            results.extend(data.get("results") or [])
+            url = data.get("next_url")
+            # next_url already carries the query, except for the API key
+            params = {"apiKey": self.api_key}
+        return results
+
+    def iter_historical_prices(self, ticker, from_date, to_date, window_days=None, max_concurrency=None):
+        """
+        Yield daily bars for [from_date, to_date] in ascending date order.
+
+        Long ranges are split into windows of `window_days` that are fetched
+        concurrently, with at most `max_concurrency` windows in flight, so
+        memory stays bounded by the in-flight windows however long the range.
+
+        Args:
+            ticker: Stock ticker symbol
+            from_date, to_date: date objects or YYYY-MM-DD strings
+        """
+        if isinstance(from_date, str):
+            from_date = date.fromisoformat(from_date)
+        if isinstance(to_date, str):
+            to_date = date.fromisoformat(to_date)
+        window = timedelta(days=window_days or getattr(settings, 'POLYGON_HISTORY_WINDOW_DAYS', 365))
+        max_concurrency = max_concurrency or getattr(settings, 'POLYGON_HISTORY_MAX_CONCURRENCY', 4)
+
+        windows = []
+        start = from_date
+        while start <= to_date:
+            end = min(start + window - timedelta(days=1), to_date)
+            windows.append((start, end))
+            start = end + timedelta(days=1)
+
+        executor = get_upstream_executor()
+        in_flight = deque()
+        pending = iter(windows)
+        try:
+            for start, end in itertools.islice(pending, max_concurrency):
+                in_flight.append(executor.submit(
+                    self._fetch_aggregate_pages, ticker, start.isoformat(), end.isoformat()
+                ))
+            while in_flight:
+                bars = in_flight.popleft().result()
+                for start, end in itertools.islice(pending, 1):
+                    in_flight.append(executor.submit(
+                        self._fetch_aggregate_pages, ticker, start.isoformat(), end.isoformat()
+                    ))
+                yield from bars
+        finally:
+            # Consumer stopped early or a window failed: drop queued windows
+            for future in in_flight:
+                future.cancel()
     
     def get_financials(self, ticker, limit=4, timeframe='quarterly'):
         """
@@ -118,7 +292,7 @@ class PolygonAPIService:
         Returns:
             JSON response with complete financial data
         """
-        url = "https://api.polygon.io/vX/reference/financials"
+        url = f"{POLYGON_BASE_URL}/vX/reference/financials"
         params = {
             "ticker": ticker,
             "limit": limit,
@@ -128,7 +302,7 @@ class PolygonAPIService:
             "apiKey": self.api_key
         }
         
-        response = requests.get(url, params=params)
+        response = self._get("financials", url, params)
         response.raise_for_status()
         return response.json()
     
@@ -143,112 +317,695 @@ class PolygonAPIService:
         Returns:
             JSON response with news articles
         """
-        url = "https://api.polygon.io/v2/reference/news"
+        url = f"{POLYGON_BASE_URL}/v2/reference/news"
         params = {
             "ticker": ticker,
             "limit": limit,
             "apiKey": self.api_key
         }
         
-        response = requests.get(url, params=params)
+        response = self._get("news", url, params)
         response.raise_for_status()
         return response.json()
 
     
     
 
+# Worker pool for per-ticker upstream calls in batch requests (shared by the process)
+_batch_executor = ContextThreadPoolExecutor(
+    max_workers=getattr(settings, 'STOCK_BATCH_WORKERS', 8),
+    thread_name_prefix='stock-batch',
+)
+
+# Coalesces concurrent cache-miss refreshes of the same ticker
+_quote_refreshes = SingleFlight(
+    'quote',
+    distributed=getattr(settings, 'STOCK_SINGLEFLIGHT_DISTRIBUTED', False),
+    lease_seconds=getattr(settings, 'STOCK_SINGLEFLIGHT_LEASE_SECONDS', 15),
+)
+
+# Background pool for stale-while-revalidate refreshes, and the tickers it
+# already has queued so a burst of stale reads schedules one refresh each
+_refresh_executor = ContextThreadPoolExecutor(
+    max_workers=getattr(settings, 'STOCK_REFRESH_WORKERS', 4),
+    thread_name_prefix='stock-refresh',
+)
+_pending_refreshes = set()
+_pending_refreshes_lock = threading.Lock()
+
+# Held while a background ticker index rebuild is queued or running, and
+# time.monotonic() of the last failed rebuild (retried after a cooldown)
+_index_refresh_lock = threading.Lock()
+_index_refresh_failed_at = None
+
+
 class StockDataService:
     """Service class for managing stock data operations"""
     
     def __init__(self):
         self.polygon_service = PolygonAPIService()
+        self.freshness = get_freshness_policy()
+        self.stale_grace = timedelta(seconds=getattr(settings, 'STOCK_STALE_GRACE_SECONDS', 0))
     
+    def _cache_cutoff(self, dataset=QUOTE):
+        """Oldest last_updated value still considered fresh for a dataset"""
+        return self.freshness.fresh_since(dataset)
+
+    def _get_fresh_bulk(self, dataset, model, tickers, convert):
+        """
+        Return {ticker: convert(row)} for rows of `model` that are fresh for
+        `dataset`, from the in-process L1 cache where possible and one
+        database query for the rest
+        """
+        quote_cache = get_quote_cache()
+        found = quote_cache.get_many(dataset, tickers)
+        missing = [ticker for ticker in tickers if ticker not in found]
+        if not missing:
+            return found
+
+        # ticker is unique, so the model's default ordering would only add a sort
+        rows = list(model.objects.filter(
+            ticker__in=missing,
+            last_updated__gte=self._cache_cutoff(dataset)
+        ).order_by())
+        quote_cache.record_l2(hits=len(rows), misses=len(missing) - len(rows))
+
+        loaded = {row.ticker: convert(row) for row in rows}
+        quote_cache.set_many(dataset, loaded, {
+            row.ticker: self.freshness.expires_at(dataset, row.last_updated).timestamp()
+            for row in rows
+        })
+        found.update(loaded)
+        return found
+
     def get_cached_data(self, ticker):
-        """Check if we have recent cached data (within 1 hour)"""
-        recent_data = StockData.objects.filter(
-            ticker=ticker,
-            last_updated__gte=timezone.now() - timedelta(hours=1)
-        ).first()
+        """Check if we have cached data that is still fresh under the freshness policy"""
+        recent_data = self.get_cached_data_bulk([ticker]).get(ticker)
         
         if recent_data:
             return recent_data, "database"
         return None, None
+
+    def get_cached_data_bulk(self, tickers):
+        """Return {ticker: StockData} for every ticker with recent cached data"""
+        return self._get_fresh_bulk(QUOTE, StockData, tickers, lambda row: row)
+
+    def get_stale_data_bulk(self, tickers):
+        """Return {ticker: StockData} for rows past freshness but still inside the stale grace window"""
+        stale = {}
+        if not self.stale_grace:
+            return stale
+        cutoff = self._cache_cutoff()
+        stale_rows = StockData.objects.filter(
+            ticker__in=tickers,
+            last_updated__gte=cutoff - self.stale_grace,
+            last_updated__lt=cutoff
+        ).order_by()
+        for row in stale_rows:
+            stale[row.ticker] = row
+        return stale
+
+    def get_stored_data_bulk(self, tickers):
+        """Return {ticker: StockData} for the stored rows, whatever their age"""
+        return {row.ticker: row for row in StockData.objects.filter(ticker__in=tickers).order_by()}
+
+    def get_latest_ohlc_bulk(self, tickers):
+        """Return {ticker: o/h/l/c/v dict} for the stored OHLC snapshots, whatever their age"""
+        snapshots = StockOHLC.objects.filter(ticker__in=tickers)
+        return {snapshot.ticker: snapshot.as_polygon_bar() for snapshot in snapshots}
+
+    def get_cached_ohlc(self, ticker):
+        """Return the stored OHLC snapshot for a ticker as an o/h/l/c/v dict, or None if missing or stale"""
+        return self.get_cached_ohlc_bulk([ticker]).get(ticker)
+
+    def get_cached_ohlc_bulk(self, tickers):
+        """Return {ticker: o/h/l/c/v dict} for every ticker with a fresh OHLC snapshot"""
+        return self._get_fresh_bulk(OHLC, StockOHLC, tickers, StockOHLC.as_polygon_bar)
+
+    def save_ohlcs(self, ohlc_by_ticker):
+        """Upsert the latest OHLC snapshots ({ticker: ohlc_info}) next to the cached quotes"""
+        now = timezone.now()
+        bulk_upsert(
+            StockOHLC,
+            [
+                StockOHLC(
+                    ticker=ticker,
+                    open_price=ohlc_info.get('o'),
+                    high_price=ohlc_info.get('h'),
+                    low_price=ohlc_info.get('l'),
+                    close_price=ohlc_info.get('c'),
+                    volume=ohlc_info.get('v'),
+                    last_updated=now,
+                )
+                for ticker, ohlc_info in ohlc_by_ticker.items()
+            ],
+            unique_fields=['ticker'],
+            update_fields=['open_price', 'high_price', 'low_price', 'close_price', 'volume', 'last_updated'],
+        )
+        self._invalidate_l1(ohlc_by_ticker, kinds=(OHLC,))
+
+    def _fetch_ohlc(self, ticker):
+        """Fetch today's OHLC (falls back to previous day) as a flat o/h/l/c/v dict"""
+        ohlc_data_response = self.polygon_service.get_daily_ohlc(ticker)
+        return ohlc_data_response.get("results", [{}])[0] if ohlc_data_response.get("results") else {}
     
+    def fetch_quote(self, ticker):
+        """
+        Fetch the raw quote pieces for a ticker from Polygon.io (no database access)
+
+        Returns:
+            (ticker_info, ohlc_info, prev_close_info) dicts
+        """
+        # Ticker details, daily OHLC and previous close are independent, so
+        # they run concurrently. get_daily_ohlc falls back to the previous
+        # close, which the request scope dedupes with the explicit call below.
+        executor = get_upstream_executor()
+        with self.polygon_service.request_scope():
+            ticker_future = executor.submit(self.polygon_service.get_ticker_info, ticker)
+            # Get daily OHLC data (tries today first, falls back to previous day)
+            ohlc_future = executor.submit(self._fetch_ohlc, ticker)
+            # Also get previous close for current_price (for consistency)
+            prev_close_future = executor.submit(self.polygon_service.get_previous_close, ticker)
+
+            ticker_data = ticker_future.result()
+            ohlc_info = ohlc_future.result()
+            prev_close_data = prev_close_future.result()
+
+        if ticker_data.get("status") != "OK":
+            raise ValueError("Failed to fetch ticker information")
+        
+        ticker_info = ticker_data.get("results", {})
+        prev_close_info = prev_close_data.get("results", [{}])[0] if prev_close_data.get("results") else {}
+        
+        return ticker_info, ohlc_info, prev_close_info
+
+    def save_quotes(self, quotes):
+        """
+        Persist fetched quotes for any number of tickers in one transaction:
+        one upsert statement each for StockData, StockOHLC and TickerReference
+
+        Args:
+            quotes: {ticker: (ticker_info, ohlc_info, prev_close_info)}, as
+                returned by fetch_quote
+
+        Returns:
+            {ticker: StockData}
+        """
+        now = timezone.now()
+        stock_rows = [
+            StockData(
+                ticker=ticker,
+                name=ticker_info.get('name', ticker),
+                current_price=prev_close_info.get('c'),
+                market_cap=ticker_info.get('market_cap'),
+                volume=prev_close_info.get('v'),
+                last_updated=now,
+            )
+            for ticker, (ticker_info, _, prev_close_info) in quotes.items()
+        ]
+        # Industry classification and market cap, for market-wide aggregates
+        references = [
+            TickerReference(
+                ticker=ticker,
+                name=ticker_info.get('name') or '',
+                sic_description=ticker_info.get('sic_description') or '',
+                market_cap=ticker_info.get('market_cap'),
+                last_updated=now,
+            )
+            for ticker, (ticker_info, _, _) in quotes.items()
+        ]
+
+        with transaction.atomic():
+            bulk_upsert(
+                StockData,
+                stock_rows,
+                unique_fields=['ticker'],
+                update_fields=['name', 'current_price', 'market_cap', 'volume', 'last_updated'],
+            )
+            self.save_ohlcs({ticker: quote[1] for ticker, quote in quotes.items()})
+            bulk_upsert(
+                TickerReference,
+                references,
+                unique_fields=['ticker'],
+                update_fields=['name', 'sic_description', 'market_cap', 'last_updated'],
+            )
+        self._invalidate_l1(quotes, kinds=(QUOTE,))
+        return {row.ticker: row for row in stock_rows}
+
+    def _invalidate_l1(self, tickers, kinds):
+        """Drop this process's L1 entries for written tickers once the write commits"""
+        tickers = list(tickers)
+        if tickers:
+            transaction.on_commit(lambda: get_quote_cache().invalidate(tickers, kinds))
+
     def fetch_and_cache_data(self, ticker):
         """Fetch data from Polygon.io and cache it"""
         try:
-            # Get ticker information
-            ticker_data = self.polygon_service.get_ticker_info(ticker)
-            if ticker_data.get("status") != "OK":
-                raise ValueError("Failed to fetch ticker information")
-            
-            ticker_info = ticker_data.get("results", {})
-            
-            # Get daily OHLC data (tries today first, falls back to previous day)
-            ohlc_data_response = self.polygon_service.get_daily_ohlc(ticker)
-            ohlc_info = ohlc_data_response.get("results", [{}])[0] if ohlc_data_response.get("results") else {}
-            
-            # Also get previous close for current_price (for consistency)
-            prev_close_data = self.polygon_service.get_previous_close(ticker)
-            prev_close_info = prev_close_data.get("results", [{}])[0] if prev_close_data.get("results") else {}
-            
-            # Create or update stock data
-            # First try to get existing record
-            try:
-                stock_data = StockData.objects.get(ticker=ticker)
-                # Update existing record
-                stock_data.name = ticker_info.get('name', ticker)
-                stock_data.current_price = prev_close_info.get('c')
-                stock_data.market_cap = ticker_info.get('market_cap')
-                stock_data.volume = prev_close_info.get('v')
-                stock_data.last_updated = timezone.now()
-                stock_data.save()
-            except StockData.DoesNotExist:
-                # Create new record with explicit ID
-                # Get the next available ID
-                max_id = StockData.objects.aggregate(max_id=models.Max('id'))['max_id'] or 0
-                stock_data = StockData.objects.create(
-                    id=max_id + 1,
-                    ticker=ticker,
-                    name=ticker_info.get('name', ticker),
-                    current_price=prev_close_info.get('c'),
-                    market_cap=ticker_info.get('market_cap'),
-                    volume=prev_close_info.get('v'),
-                    last_updated=timezone.now()
-                )
-            
-            return stock_data, "polygon_api", ohlc_info
-            
+            quote = self.fetch_quote(ticker)
+            stock_data = self.save_quotes({ticker: quote})[ticker]
+            return stock_data, "polygon_api", quote[1]
+
+        except RateLimitExceeded:
+            # Callers fall back to stored data on this one
+            raise
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to fetch data from Polygon.io: {str(e)}")
         except Exception as e:
             raise Exception(f"An error occurred: {str(e)}")
     
-    def get_stock_data(self, ticker):
-        """Main method to get stock data (cached or fresh)"""
+    def refresh_in_background(self, ticker):
+        """Schedule a background refresh of a ticker's quote unless one is already queued"""
+        with _pending_refreshes_lock:
+            if ticker in _pending_refreshes:
+                return
+            _pending_refreshes.add(ticker)
+        _refresh_executor.submit(self._background_refresh, ticker)
+
+    def _background_refresh(self, ticker):
+        try:
+            with upstream_priority(BACKGROUND):
+                _quote_refreshes.do(
+                    ticker,
+                    lambda: self.fetch_and_cache_data(ticker),
+                    recheck=lambda: self._get_cached_quote(ticker),
+                )
+        except Exception as e:
+            logger.warning("Background refresh of %s failed: %s", ticker, e)
+        finally:
+            with _pending_refreshes_lock:
+                _pending_refreshes.discard(ticker)
+            close_old_connections()
+
+    def get_stock_data(self, ticker, allow_stale=True):
+        """
+        Main method to get stock data (cached or fresh)
+
+        With allow_stale, a quote that expired less than STOCK_STALE_GRACE_SECONDS
+        ago is returned at once with source "stale" while a background
+        refresh brings it up to date; older or missing quotes are fetched
+        synchronously.
+        """
         # First check cache
         cached_data, source = self.get_cached_data(ticker)
         if cached_data:
-            # If cached, we still need to fetch OHLC data for the response
-            # Fetch fresh OHLC data (tries today first, falls back to previous day)
-            ohlc_data_response = self.polygon_service.get_daily_ohlc(ticker)
-            ohlc_info = ohlc_data_response.get("results", [{}])[0] if ohlc_data_response.get("results") else {}
+            # Serve OHLC from the snapshot stored with the quote; only go
+            # upstream if it is missing or no longer fresh
+            ohlc_info = self.get_cached_ohlc(ticker)
+            if ohlc_info is None:
+                try:
+                    # Fetch fresh OHLC data (tries today first, falls back to previous day)
+                    ohlc_info = self._fetch_ohlc(ticker)
+                except requests.exceptions.RequestException as e:
+                    # Rate limited or upstream down: the fresh quote still
+                    # stands, with the stored snapshot of any age
+                    logger.warning("OHLC refresh for %s failed, serving the stored snapshot: %s", ticker, e)
+                    return cached_data, source, self.get_latest_ohlc_bulk([ticker]).get(ticker, {})
+                self.save_ohlcs({ticker: ohlc_info})
             return cached_data, source, ohlc_info
         
-        # If no cache, fetch from API
-        return self.fetch_and_cache_data(ticker)
+        if allow_stale:
+            stale_data = self.get_stale_data_bulk([ticker]).get(ticker)
+            if stale_data:
+                self.refresh_in_background(ticker)
+                ohlc_info = self.get_latest_ohlc_bulk([ticker]).get(ticker, {})
+                return stale_data, "stale", ohlc_info
+
+        # If no cache, fetch from API. Concurrent misses for the same ticker
+        # share one upstream fetch; followers waiting on another worker
+        # pick up its freshly cached row. A request that joined a background
+        # refresh which ran out of budget fetches at its own priority.
+        try:
+            return _quote_refreshes.do(
+                ticker,
+                lambda: self.fetch_and_cache_data(ticker),
+                recheck=lambda: self._get_cached_quote(ticker),
+                retry_if=outranked_by_caller,
+            )
+        except RateLimitExceeded:
+            # Out of upstream budget: a stored quote of any age beats an error
+            stored = self.get_stored_data_bulk([ticker])
+            if ticker not in stored:
+                raise
+            return stored[ticker], "stale", self.get_latest_ohlc_bulk([ticker]).get(ticker, {})
+
+    def _get_cached_quote(self, ticker):
+        """Return (stock_data, source, ohlc_info) if the quote and OHLC are both cached and fresh"""
+        cached_data, source = self.get_cached_data(ticker)
+        if cached_data:
+            ohlc_info = self.get_cached_ohlc(ticker)
+            if ohlc_info is not None:
+                return cached_data, source, ohlc_info
+        return None
+
+    def get_stock_data_batch(self, tickers):
+        """
+        Get stock data for many tickers in one call.
+
+        Cache hits (quote and OHLC snapshot) for all tickers are resolved with
+        one query per table. Upstream work for the rest is done concurrently
+        on a bounded worker pool, and everything fetched is then saved from
+        the calling thread with one upsert per table. Quotes inside the stale grace window are returned
+        with source "stale" and refreshed in the background.
+
+        Returns:
+            (results, errors) dicts keyed by ticker. Each result is the same
+            (stock_data, source, ohlc_info) tuple that get_stock_data returns.
+        """
+        cached = self.get_cached_data_bulk(tickers)
+        cached_ohlc = self.get_cached_ohlc_bulk(list(cached))
+
+        # Recently expired quotes are served stale and refreshed in the background
+        stale = self.get_stale_data_bulk([t for t in tickers if t not in cached])
+        stale_ohlc = self.get_latest_ohlc_bulk(list(stale)) if stale else {}
+        for ticker in stale:
+            self.refresh_in_background(ticker)
+
+        futures = {}
+        for ticker in tickers:
+            if ticker in stale:
+                continue
+            if ticker not in cached:
+                futures[ticker] = _batch_executor.submit(self.fetch_quote, ticker)
+            elif ticker not in cached_ohlc:
+                futures[ticker] = _batch_executor.submit(self._fetch_ohlc, ticker)
+
+        fetched_quotes, fetched_ohlc, errors = {}, {}, {}
+        rate_limited = {}
+        for ticker, future in futures.items():
+            try:
+                if ticker in cached:
+                    fetched_ohlc[ticker] = future.result()
+                else:
+                    fetched_quotes[ticker] = future.result()
+            except RateLimitExceeded as e:
+                rate_limited[ticker] = f"Failed to fetch data from Polygon.io: {str(e)}"
+            except requests.exceptions.RequestException as e:
+                errors[ticker] = f"Failed to fetch data from Polygon.io: {str(e)}"
+            except Exception as e:
+                errors[ticker] = f"An error occurred: {str(e)}"
+
+        # Out of upstream budget: serve stored quotes of any age instead
+        stored = self.get_stored_data_bulk([t for t in rate_limited if t not in cached])
+        stored_ohlc = self.get_latest_ohlc_bulk(list(rate_limited)) if rate_limited else {}
+        for ticker, error in rate_limited.items():
+            if ticker in cached:
+                cached_ohlc[ticker] = stored_ohlc.get(ticker, {})
+            elif ticker in stored:
+                stale[ticker] = stored[ticker]
+                stale_ohlc[ticker] = stored_ohlc.get(ticker, {})
+            else:
+                errors[ticker] = error
+
+        # Everything fetched is written with one upsert per table
+        saved = {}
+        try:
+            with transaction.atomic():
+                saved = self.save_quotes(fetched_quotes)
+                self.save_ohlcs(fetched_ohlc)
+        except Exception as e:
+            for ticker in [*fetched_quotes, *fetched_ohlc]:
+                errors[ticker] = f"An error occurred: {str(e)}"
+
+        results = {}
+        for ticker in tickers:
+            if ticker in errors:
+                continue
+            if ticker in stale:
+                results[ticker] = (stale[ticker], "stale", stale_ohlc.get(ticker, {}))
+            elif ticker in cached:
+                ohlc_info = cached_ohlc.get(ticker, fetched_ohlc.get(ticker))
+                results[ticker] = (cached[ticker], "database", ohlc_info)
+            else:
+                results[ticker] = (saved[ticker], "polygon_api", fetched_quotes[ticker][1])
+        return results, errors
     
+    def get_historical_data(self, ticker, from_date, to_date):
+        """
+        Daily bars for [from_date, to_date] from the local bar store, fetching
+        only the missing date intervals from Polygon.io
+
+        Returns:
+            (prices, source) where source is "database" when no upstream call was needed
+        """
+        prices, fetched = HistoricalBarStore(self.polygon_service).get_bars(ticker, from_date, to_date)
+        return prices, "polygon_api" if fetched else "database"
+
+    def iter_historical_data(self, ticker, from_date, to_date):
+        """
+        Streaming variant of get_historical_data
+
+        Returns:
+            (prices_iterator, source); the iterator yields price dicts in date order
+        """
+        store = HistoricalBarStore(self.polygon_service)
+        intervals = store.missing_intervals(ticker, from_date, to_date)
+        prices = store.iter_bars(ticker, from_date, to_date, intervals)
+        return prices, "polygon_api" if intervals else "database"
+
+    def get_indicators(self, ticker, from_date, to_date, specs):
+        """
+        Compute technical indicators over the daily closes in [from_date, to_date]
+
+        Args:
+            specs: Parsed indicator specs from indicators.parse_indicator_specs
+
+        Returns:
+            {"dates": [...], "close": [...], "indicators": {spec_key: series}}
+            Results are cached per (ticker, range, indicator set).
+        """
+        spec_key = ",".join(spec[0] for spec in specs)
+        cache_key = "indicators:{}:{}:{}:{}".format(
+            ticker, from_date, to_date, hashlib.md5(spec_key.encode()).hexdigest()
+        )
+        result = cache.get(cache_key)
+        if result is not None:
+            return result
+
+        store = HistoricalBarStore(self.polygon_service)
+        prices, _ = store.get_bars(ticker, from_date, to_date)
+        prices = [price for price in prices if price["close"] is not None]
+        closes = [price["close"] for price in prices]
+
+        result = {
+            "dates": [price["date"] for price in prices],
+            "close": closes,
+            "indicators": compute_indicators(closes, specs),
+        }
+        if to_date > store.settled_through():
+            ttl = self.freshness.ttl_seconds(OHLC)
+        else:
+            ttl = SETTLED_INDICATORS_TTL
+        cache.set(cache_key, result, ttl)
+        return result
+
+    def _get_closes(self, ticker, from_date, to_date):
+        """(date, close) pairs for a ticker, for use from a worker thread"""
+        try:
+            prices, _ = self.get_historical_data(ticker, from_date, to_date)
+            return [(p["date"], p["close"]) for p in prices if p["close"] is not None]
+        finally:
+            close_old_connections()
+
+    def get_return_statistics(self, tickers, from_date, to_date, min_periods=2):
+        """
+        Covariance and correlation matrices of daily log returns for several tickers.
+
+        Bars for all tickers are loaded concurrently, aligned on the union of
+        their trading dates and reduced in one set of matrix operations.
+
+        Returns:
+            (stats, errors) where stats holds "tickers", "dates" (number of
+            aligned sessions) and the (N, N) "covariance", "correlation" and
+            "observations" arrays, in the order of stats["tickers"]; tickers
+            that failed to load are reported in errors instead.
+        """
+        futures = {
+            ticker: _batch_executor.submit(self._get_closes, ticker, from_date, to_date)
+            for ticker in tickers
+        }
+
+        closes, errors = {}, {}
+        for ticker, future in futures.items():
+            try:
+                closes[ticker] = future.result()
+            except requests.exceptions.RequestException as e:
+                errors[ticker] = f"Failed to fetch data from Polygon.io: {str(e)}"
+            except Exception as e:
+                errors[ticker] = f"An error occurred: {str(e)}"
+
+        loaded = [ticker for ticker in tickers if ticker in closes]
+        dates, prices = align_closes(closes, loaded)
+        covariance, correlation, counts = return_matrices(log_returns(prices), min_periods)
+        return {
+            "tickers": loaded,
+            "dates": len(dates),
+            "covariance": covariance,
+            "correlation": correlation,
+            "observations": counts,
+        }, errors
+
+    def get_sector_performance(self, min_count=1):
+        """
+        Close-to-close % change per sector (SIC description) for the latest
+        settled session.
+
+        Uses two grouped daily snapshots (that session and the one before)
+        joined with cached TickerReference rows; the result is cached until
+        the next session settles.
+        """
+        calendar = get_trading_calendar()
+        session = HistoricalBarStore(self.polygon_service, calendar=calendar).settled_through()
+        cache_key = f"sector_performance:{session.isoformat()}:{min_count}"
+        result = cache.get(cache_key)
+        if result is not None:
+            return result
+
+        previous_session = calendar.previous_trading_day(session)
+        executor = get_upstream_executor()
+        with self.polygon_service.request_scope():
+            current_future = executor.submit(self.polygon_service.get_grouped_daily, session)
+            previous_future = executor.submit(self.polygon_service.get_grouped_daily, previous_session)
+            current = snapshot_closes(current_future.result().get("results") or [])
+            previous = snapshot_closes(previous_future.result().get("results") or [])
+
+        tickers, changes = percent_changes(current, previous)
+
+        references = list(
+            TickerReference.objects.exclude(sic_description='')
+            .order_by('ticker')
+            .values_list('ticker', 'sic_description', 'market_cap')
+        )
+        reference_tickers = np.array([row[0] for row in references], dtype=str)
+        matched, change_index, reference_index = np.intersect1d(
+            tickers, reference_tickers, return_indices=True
+        )
+        sectors = np.array([references[i][1] for i in reference_index], dtype=object)
+        market_caps = np.array(
+            [references[i][2] if references[i][2] is not None else np.nan for i in reference_index],
+            dtype=float,
+        )
+
+        sectors_summary = group_performance(
+            changes[change_index], sectors, weights=market_caps, min_count=min_count
+        )
+        result = {
+            "session": session.isoformat(),
+            "previous_session": previous_session.isoformat(),
+            "sector_performance": {
+                sector: summary["change"] for sector, summary in sectors_summary.items()
+            },
+            "sectors": sectors_summary,
+            "tickers": len(matched),
+            "market_tickers": len(tickers),
+        }
+        cache.set(cache_key, result, SECTOR_PERFORMANCE_TTL)
+        return result
+
+    def build_ticker_index(self):
+        """
+        Rebuild the local search index from a bulk reference-ticker snapshot,
+        persist it and swap it in. Market caps for ranking come from the
+        cached TickerReference rows.
+        """
+        market_caps = dict(
+            TickerReference.objects.exclude(market_cap=None).values_list('ticker', 'market_cap')
+        )
+        entries = []
+        for result in self.polygon_service.iter_reference_tickers():
+            entry = {field: result.get(field) for field in ENTRY_FIELDS}
+            entry["market_cap"] = market_caps.get(entry["ticker"])
+            entries.append(entry)
+
+        index = TickerIndex(entries)
+        # Serve the new index even if it cannot be persisted
+        set_ticker_index(index)
+        try:
+            save_snapshot(index)
+        except OSError as e:
+            logger.warning("Could not save the ticker index snapshot: %s", e)
+        logger.info("Ticker index rebuilt with %d tickers", len(index))
+        return index
+
+    def refresh_ticker_index_in_background(self):
+        """
+        Schedule a ticker index rebuild unless one is already queued or the
+        last one failed less than STOCK_TICKER_INDEX_RETRY_INTERVAL ago
+        """
+        failed_at = _index_refresh_failed_at
+        retry_interval = getattr(settings, 'STOCK_TICKER_INDEX_RETRY_INTERVAL', 15 * 60)
+        if failed_at is not None and time.monotonic() - failed_at < retry_interval:
+            return
+        if not _index_refresh_lock.acquire(blocking=False):
+            return
+        _refresh_executor.submit(self._background_index_refresh)
+
+    def _background_index_refresh(self):
+        global _index_refresh_failed_at
+        try:
+            # Another process may already have written a newer snapshot
+            snapshot = load_snapshot()
+            if snapshot is not None and snapshot.age() < ticker_index_max_age():
+                set_ticker_index(snapshot)
+            else:
+                with upstream_priority(BACKGROUND):
+                    self.build_ticker_index()
+            _index_refresh_failed_at = None
+        except Exception as e:
+            logger.warning("Ticker index refresh failed: %s", e)
+            _index_refresh_failed_at = time.monotonic()
+        finally:
+            _index_refresh_lock.release()
+            close_old_connections()
+
     def search_companies(self, query):
-        """Search for companies by name and return matching tickers"""
+        """
+        Search for companies by ticker or name and return matching tickers.
+
+        Answered from the local ticker index; the live Polygon.io search is
+        only used until the first index snapshot exists, behind a cache that
+        also answers longer queries from complete results of shorter ones.
+        """
+        index = get_ticker_index()
+        if index is None or index.age() > ticker_index_max_age():
+            self.refresh_ticker_index_in_background()
+        if index is not None:
+            return index.search(query)
+
+        search_cache = get_search_cache()
+        results = search_cache.get(query)
+        if results is not None:
+            return results
+
         try:
             search_results = self.polygon_service.search_tickers(query)
             if search_results.get("status") != "OK":
                 raise ValueError("Failed to search companies")
             
             results = search_results.get("results", [])
+            search_cache.put(query, results, complete=len(results) < SEARCH_PAGE_LIMIT)
             return results
             
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to search companies: {str(e)}")
         except Exception as e:
             raise Exception(f"An error occurred during search: {str(e)}")
+
+    def get_financials(self, ticker, limit=4, timeframe='quarterly'):
+        """
+        Financial statements for a ticker from the local financials store,
+        which only goes back to Polygon.io once a newer filing can exist
+
+        Returns:
+            (results, source) with results in Polygon.io's financials shape
+        """
+        return FinancialsStore(self.polygon_service).get(ticker, limit, timeframe)
+
+    def get_news(self, tickers, limit=5):
+        """
+        Latest news for one or more tickers from the local news store,
+        merged and deduplicated across tickers
+
+        Returns:
+            (results, source, errors); see NewsStore.get
+        """
+        return NewsStore(self.polygon_service, self.freshness).get(tickers, limit)
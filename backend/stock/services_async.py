@@ -0,0 +1,377 @@
+"""
+asyncio versions of the stock data services, used by views_async.
+
+Upstream calls go through the event loop's AsyncPolygonHTTPClient, so a
+request waiting on Polygon.io does not hold a worker thread. Fresh quote
+lookups use the L1 cache and Django's async ORM; writes and the store
+bookkeeping reuse the sync StockDataService code through sync_to_async.
+"""
+import asyncio
+import logging
+import os
+import weakref
+from datetime import datetime, timedelta
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .bar_store import HistoricalBarStore
+from .financials_store import FINANCIALS_SYNC_LIMIT, FinancialsStore
+from .freshness import OHLC, QUOTE
+from .models import DailyBar, StockData, StockOHLC
+from .news_store import NewsStore
+from .polygon_client import POLYGON_BASE_URL, get_async_polygon_client
+from .quote_cache import get_quote_cache
+from .rate_limit import RateLimitExceeded, outranked_by_caller
+from .search_cache import get_search_cache
+from .services import HISTORY_PAGE_LIMIT, SEARCH_PAGE_LIMIT, StockDataService
+from .ticker_index import get_ticker_index, ticker_index_max_age
+
+logger = logging.getLogger(__name__)
+
+# Quote fetches in flight per event loop, so concurrent misses for the same
+# ticker share one upstream round-trip
+_quote_fetches = weakref.WeakKeyDictionary()
+
+
+def _first_result(data):
+    return data.get("results", [{}])[0] if data.get("results") else {}
+
+
+class AsyncPolygonAPIService:
+    """Coroutine counterparts of the PolygonAPIService calls the async views need"""
+
+    def __init__(self):
+        self.api_key = os.getenv('POLYGON_API_KEY')
+        if not self.api_key:
+            raise ValueError("POLYGON_API_KEY environment variable is not set")
+
+    async def _get_json(self, endpoint, url, params, raise_for_status=True):
+        """GET through the event loop's pooled client and decode the JSON body"""
+        response = await get_async_polygon_client().get(endpoint, url, params=params)
+        if response.status_code >= 400:
+            if not raise_for_status:
+                return None
+            raise requests.exceptions.HTTPError(f"{response.status_code} Error for url: {url}")
+        return response.json()
+
+    async def get_ticker_info(self, ticker):
+        """Fetch ticker information from Polygon.io"""
+        url = f"{POLYGON_BASE_URL}/v3/reference/tickers/{ticker}"
+        return await self._get_json("ticker_info", url, {"apikey": self.api_key})
+
+    async def get_previous_close(self, ticker):
+        """Fetch previous close price and volume from Polygon.io"""
+        url = f"{POLYGON_BASE_URL}/v2/aggs/ticker/{ticker}/prev"
+        data = await self._get_json("prev_close", url, {"apikey": self.api_key}, raise_for_status=False)
+        return data or {}
+
+    async def get_open_close(self, ticker):
+        """
+        Fetch today's OHLC from the daily open-close endpoint in the
+        aggregates shape, or None if it is not available (yet)
+        """
+        today = datetime.now().date().strftime('%Y-%m-%d')
+        url = f"{POLYGON_BASE_URL}/v1/open-close/{ticker}/{today}"
+        try:
+            data = await self._get_json(
+                "open_close", url, {"adjusted": "true", "apikey": self.api_key}, raise_for_status=False
+            )
+        except Exception:
+            return None
+        if not data or data.get("status") != "OK" or data.get("open") is None:
+            return None
+        return {
+            "results": [{
+                "o": data.get("open"),
+                "h": data.get("high"),
+                "l": data.get("low"),
+                "c": data.get("close"),
+                "v": data.get("volume", 0)
+            }]
+        }
+
+    async def get_daily_ohlc(self, ticker):
+        """Today's OHLC, falling back to the previous day (see PolygonAPIService.get_daily_ohlc)"""
+        return await self.get_open_close(ticker) or await self.get_previous_close(ticker)
+
+    async def search_tickers(self, query):
+        """Search for tickers by company name using Polygon.io"""
+        url = f"{POLYGON_BASE_URL}/v3/reference/tickers"
+        params = {
+            "apikey": self.api_key,
+            "search": query,
+            "active": "true",
+            "limit": SEARCH_PAGE_LIMIT
+        }
+        return await self._get_json("ticker_search", url, params)
+
+    async def _fetch_aggregate_pages(self, ticker, from_date, to_date):
+        """Fetch every page of daily bars for one window, following next_url"""
+        url = f"{POLYGON_BASE_URL}/v2/aggs/ticker/{ticker}/range/1/day/{from_date}/{to_date}"
+        params = {
+            "adjusted": "true",
+            "sort": "asc",
+            "limit": HISTORY_PAGE_LIMIT,
+            "apiKey": self.api_key
+        }
+
+        results = []
+        while url:
+            data = await self._get_json("historical_aggs", url, params)
+            results.extend(data.get("results") or [])
+            url = data.get("next_url")
+            # next_url already carries the query, except for the API key
+            params = {"apiKey": self.api_key}
+        return results
+
+    async def get_historical_bars(self, ticker, from_date, to_date):
+        """
+        Daily bars for [from_date, to_date] in ascending date order, with long
+        ranges split into windows fetched concurrently (at most
+        POLYGON_HISTORY_MAX_CONCURRENCY at a time)
+        """
+        window = timedelta(days=getattr(settings, 'POLYGON_HISTORY_WINDOW_DAYS', 365))
+        slots = asyncio.Semaphore(getattr(settings, 'POLYGON_HISTORY_MAX_CONCURRENCY', 4))
+
+        async def fetch(start, end):
+            async with slots:
+                return await self._fetch_aggregate_pages(ticker, start.isoformat(), end.isoformat())
+
+        windows = []
+        start = from_date
+        while start <= to_date:
+            end = min(start + window - timedelta(days=1), to_date)
+            windows.append(fetch(start, end))
+            start = end + timedelta(days=1)
+        pages = await asyncio.gather(*windows)
+        return [bar for page in pages for bar in page]
+
+    async def get_financials(self, ticker, limit=4, timeframe='quarterly'):
+        """Fetch financial statements from Polygon.io"""
+        url = f"{POLYGON_BASE_URL}/vX/reference/financials"
+        params = {
+            "ticker": ticker,
+            "limit": limit,
+            "timeframe": timeframe,
+            "sort": "filing_date",
+            "order": "desc",
+            "apiKey": self.api_key
+        }
+        return await self._get_json("financials", url, params)
+
+    async def get_news(self, ticker, limit=5):
+        """Fetch latest news articles for a stock from Polygon.io"""
+        url = f"{POLYGON_BASE_URL}/v2/reference/news"
+        params = {
+            "ticker": ticker,
+            "limit": limit,
+            "apiKey": self.api_key
+        }
+        return await self._get_json("news", url, params)
+
+
+class AsyncStockDataService(StockDataService):
+    """
+    StockDataService with coroutine (a-prefixed) versions of the quote,
+    historical, search, financials and news lookups. Results and sources
+    match the sync methods of the same name.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.async_polygon = AsyncPolygonAPIService()
+
+    async def _aget_fresh_bulk(self, dataset, model, tickers, convert):
+        """_get_fresh_bulk with the database lookup on the async ORM"""
+        quote_cache = get_quote_cache()
+        found = quote_cache.get_many(dataset, tickers)
+        missing = [ticker for ticker in tickers if ticker not in found]
+        if not missing:
+            return found
+
+        rows = [
+            row async for row in model.objects.filter(
+                ticker__in=missing,
+                last_updated__gte=self._cache_cutoff(dataset)
+            ).order_by()
+        ]
+        quote_cache.record_l2(hits=len(rows), misses=len(missing) - len(rows))
+
+        loaded = {row.ticker: convert(row) for row in rows}
+        quote_cache.set_many(dataset, loaded, {
+            row.ticker: self.freshness.expires_at(dataset, row.last_updated).timestamp()
+            for row in rows
+        })
+        found.update(loaded)
+        return found
+
+    async def _aget_latest_ohlc(self, ticker):
+        snapshot = await StockOHLC.objects.filter(ticker=ticker).afirst()
+        return snapshot.as_polygon_bar() if snapshot else {}
+
+    async def afetch_quote(self, ticker):
+        """Coroutine version of fetch_quote: the three upstream calls run concurrently"""
+        ticker_data, open_close, prev_close_data = await asyncio.gather(
+            self.async_polygon.get_ticker_info(ticker),
+            self.async_polygon.get_open_close(ticker),
+            self.async_polygon.get_previous_close(ticker),
+        )
+        if ticker_data.get("status") != "OK":
+            raise ValueError("Failed to fetch ticker information")
+
+        ticker_info = ticker_data.get("results", {})
+        # Without today's bar the OHLC falls back to the previous close
+        ohlc_info = _first_result(open_close or prev_close_data)
+        return ticker_info, ohlc_info, _first_result(prev_close_data)
+
+    async def afetch_and_cache_data(self, ticker):
+        """Coroutine version of fetch_and_cache_data"""
+        try:
+            quote = await self.afetch_quote(ticker)
+            saved = await sync_to_async(self.save_quotes)({ticker: quote})
+            return saved[ticker], "polygon_api", quote[1]
+
+        except RateLimitExceeded:
+            raise
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to fetch data from Polygon.io: {str(e)}")
+        except Exception as e:
+            raise Exception(f"An error occurred: {str(e)}")
+
+    async def _afetch_coalesced(self, ticker):
+        """Fetch and store a quote, sharing the fetch with concurrent callers on this loop"""
+        fetches = _quote_fetches.setdefault(asyncio.get_running_loop(), {})
+        task = fetches.get(ticker)
+        if task is None:
+            task = fetches[ticker] = asyncio.ensure_future(self.afetch_and_cache_data(ticker))
+            task.add_done_callback(lambda _: fetches.pop(ticker, None))
+        try:
+            # A caller that goes away must not cancel the fetch the others wait on
+            return await asyncio.shield(task)
+        except RateLimitExceeded as e:
+            # Joined a background fetch (e.g. a live stream poll) that ran
+            # out of budget: fetch at this caller's own priority
+            if not outranked_by_caller(e):
+                raise
+            return await self.afetch_and_cache_data(ticker)
+
+    async def aget_stock_data(self, ticker, allow_stale=True):
+        """Coroutine version of get_stock_data"""
+        cached = (await self._aget_fresh_bulk(QUOTE, StockData, [ticker], lambda row: row)).get(ticker)
+        if cached:
+            ohlc_info = (await self._aget_fresh_bulk(
+                OHLC, StockOHLC, [ticker], StockOHLC.as_polygon_bar
+            )).get(ticker)
+            if ohlc_info is None:
+                try:
+                    ohlc_info = _first_result(await self.async_polygon.get_daily_ohlc(ticker))
+                except requests.exceptions.RequestException as e:
+                    logger.warning("OHLC refresh for %s failed, serving the stored snapshot: %s", ticker, e)
+                    return cached, "database", await self._aget_latest_ohlc(ticker)
+                await sync_to_async(self.save_ohlcs)({ticker: ohlc_info})
+            return cached, "database", ohlc_info
+
+        if allow_stale and self.stale_grace:
+            cutoff = self._cache_cutoff()
+            stale = await StockData.objects.filter(
+                ticker=ticker,
+                last_updated__gte=cutoff - self.stale_grace,
+                last_updated__lt=cutoff
+            ).order_by().afirst()
+            if stale:
+                self.refresh_in_background(ticker)
+                return stale, "stale", await self._aget_latest_ohlc(ticker)
+
+        try:
+            return await self._afetch_coalesced(ticker)
+        except RateLimitExceeded:
+            # Out of upstream budget: a stored quote of any age beats an error
+            stored = await StockData.objects.filter(ticker=ticker).order_by().afirst()
+            if stored is None:
+                raise
+            return stored, "stale", await self._aget_latest_ohlc(ticker)
+
+    async def aget_historical_data(self, ticker, from_date, to_date):
+        """Coroutine version of get_historical_data: missing intervals are fetched concurrently"""
+        store = HistoricalBarStore(self.polygon_service, freshness=self.freshness)
+        intervals = await sync_to_async(store.missing_intervals)(ticker, from_date, to_date)
+        if intervals:
+            settled = store.settled_through()
+            fetched = await asyncio.gather(*(
+                self.async_polygon.get_historical_bars(ticker, start, end) for start, end in intervals
+            ))
+            for (start, end), results in zip(intervals, fetched):
+                await sync_to_async(store.save_fetched)(ticker, start, end, results, settled)
+
+        prices = [
+            bar.as_price() async for bar in DailyBar.objects.filter(
+                ticker=ticker, date__gte=from_date, date__lte=to_date
+            ).order_by('date')
+        ]
+        return prices, "polygon_api" if intervals else "database"
+
+    async def asearch_companies(self, query):
+        """Coroutine version of search_companies"""
+        index = get_ticker_index()
+        if index is None or index.age() > ticker_index_max_age():
+            self.refresh_ticker_index_in_background()
+        if index is not None:
+            return index.search(query)
+
+        search_cache = get_search_cache()
+        results = search_cache.get(query)
+        if results is not None:
+            return results
+
+        try:
+            search_results = await self.async_polygon.search_tickers(query)
+            if search_results.get("status") != "OK":
+                raise ValueError("Failed to search companies")
+
+            results = search_results.get("results", [])
+            search_cache.put(query, results, complete=len(results) < SEARCH_PAGE_LIMIT)
+            return results
+
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to search companies: {str(e)}")
+        except Exception as e:
+            raise Exception(f"An error occurred during search: {str(e)}")
+
+    async def aget_financials(self, ticker, limit=4, timeframe='quarterly'):
+        """Coroutine version of get_financials"""
+        store = FinancialsStore(self.polygon_service)
+        sync = await sync_to_async(store.current_sync)(ticker, timeframe)
+        if store.is_fresh(sync, limit):
+            return await sync_to_async(store.load)(ticker, limit, timeframe), "database"
+
+        sync_limit = max(limit, FINANCIALS_SYNC_LIMIT)
+        try:
+            data = await self.async_polygon.get_financials(ticker, sync_limit, timeframe)
+            await sync_to_async(store.save_sync)(ticker, sync_limit, timeframe, data)
+        except requests.exceptions.RequestException as e:
+            if sync is None:
+                raise
+            logger.warning("Financials sync for %s failed, serving stored periods: %s", ticker, e)
+            return await sync_to_async(store.load)(ticker, limit, timeframe), "stale"
+        return await sync_to_async(store.load)(ticker, limit, timeframe), "polygon_api"
+
+    async def aget_news(self, tickers, limit=5):
+        """Coroutine version of get_news: due feeds are fetched concurrently"""
+        store = NewsStore(self.polygon_service, self.freshness)
+        syncs, due = await sync_to_async(store.due_feeds)(tickers, limit)
+
+        fetched = await asyncio.gather(
+            *(self.async_polygon.get_news(ticker, limit) for ticker in due),
+            return_exceptions=True,
+        )
+        outcomes = {}
+        for ticker, data in zip(due, fetched):
+            if isinstance(data, BaseException) and not isinstance(
+                data, (requests.exceptions.RequestException, ValueError)
+            ):
+                raise data
+            outcomes[ticker] = data
+        source, errors = await sync_to_async(store.save_feeds)(outcomes, syncs, limit)
+        return await sync_to_async(store.load)(tickers, limit), source, errors
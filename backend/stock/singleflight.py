@@ -0,0 +1,107 @@
+"""
+Single-flight coalescing of duplicate work.
+
+When many callers ask for the same key at once, one of them (the leader)
+does the work and the others wait for its result instead of repeating it.
+Coalescing is always done within the process; with `distributed=True` a
+lease in the Django cache backend also elects one leader across workers.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from django.core.cache import cache
+
+
+class SingleFlight:
+    """
+    Group of coalesced calls, e.g. one per kind of upstream fetch.
+
+    Args:
+        name: Namespace for the cross-worker lease keys
+        distributed: Also coordinate with other workers through the cache
+        lease_seconds: How long a remote leader may hold the lease before
+            followers stop waiting and do the work themselves
+        poll_interval: Seconds between rechecks while a remote leader works
+    """
+
+    def __init__(self, name, distributed=False, lease_seconds=15, poll_interval=0.05):
+        self.name = name
+        self.distributed = distributed
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, recheck=None, retry_if=None):
+        """
+        Run fn() once for all concurrent callers of `key` and return its result.
+
+        Args:
+            key: Identity of the work (e.g. the ticker)
+            fn: Callable doing the work
+            recheck: Optional callable used while another worker holds the
+                lease; return a non-None value once that worker's result is
+                visible (e.g. a fresh cached row), else None
+            retry_if: Optional predicate on the leader's exception, called
+                in a follower's context; when true the follower runs the
+                work again itself (or joins a newer flight) instead of
+                raising it
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = Future()
+
+            if leader:
+                return self._run(key, call, fn, recheck)
+            try:
+                return call.result()
+            except Exception as e:
+                if retry_if is None or not retry_if(e):
+                    raise
+
+    def _run(self, key, call, fn, recheck):
+        try:
+            result = self._lead(key, fn, recheck)
+        except BaseException as e:
+            # Retire the flight before waking followers, so a retrying
+            # follower starts a new one instead of rejoining this one
+            self._retire(key)
+            call.set_exception(e)
+            raise
+        self._retire(key)
+        call.set_result(result)
+        return result
+
+    def _retire(self, key):
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def _lead(self, key, fn, recheck):
+        if not self.distributed:
+            return fn()
+
+        lease_key = f"singleflight:{self.name}:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lease_seconds
+
+        while True:
+            if cache.add(lease_key, token, self.lease_seconds):
+                try:
+                    return fn()
+                finally:
+                    if cache.get(lease_key) == token:
+                        cache.delete(lease_key)
+
+            # Another worker is leading; wait for its result to land
+            if recheck is not None:
+                result = recheck()
+                if result is not None:
+                    return result
+            if time.monotonic() >= deadline:
+                return fn()
+            time.sleep(self.poll_interval)
@@ -0,0 +1,50 @@
+from datetime import date
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from stock.analytics import align_closes, log_returns, matrix_to_lists, return_matrices
+
+
+class ReturnMatricesTests(SimpleTestCase):
+    def test_complete_columns_match_numpy(self):
+        rng = np.random.default_rng(7)
+        returns = rng.normal(size=(250, 4))
+
+        covariance, correlation, counts = return_matrices(returns)
+
+        np.testing.assert_allclose(covariance, np.cov(returns, rowvar=False))
+        np.testing.assert_allclose(correlation, np.corrcoef(returns, rowvar=False))
+        self.assertTrue((counts == 250).all())
+
+    def test_pairs_use_their_overlapping_observations(self):
+        rng = np.random.default_rng(8)
+        returns = rng.normal(size=(100, 3))
+        returns[:40, 0] = np.nan
+        returns[70:, 2] = np.nan
+
+        covariance, correlation, counts = return_matrices(returns)
+
+        overlap = returns[40:70][:, [0, 2]]
+        self.assertEqual(counts[0, 2], 30)
+        self.assertAlmostEqual(covariance[0, 2], np.cov(overlap, rowvar=False)[0, 1])
+        self.assertAlmostEqual(correlation[0, 2], np.corrcoef(overlap, rowvar=False)[0, 1])
+        self.assertAlmostEqual(correlation[2, 0], correlation[0, 2])
+
+    def test_too_few_observations_give_nan(self):
+        returns = np.array([[0.1, np.nan], [0.2, 0.3], [0.1, np.nan]])
+        _, correlation, counts = return_matrices(returns, min_periods=2)
+        self.assertEqual(counts[0, 1], 1)
+        self.assertTrue(np.isnan(correlation[0, 1]))
+        self.assertEqual(matrix_to_lists(correlation)[0][1], None)
+
+
+class AlignClosesTests(SimpleTestCase):
+    def test_missing_dates_break_returns(self):
+        d1, d2, d3 = date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)
+        dates, prices = align_closes({"A": [(d1, 1.0), (d2, 2.0), (d3, 4.0)], "B": [(d1, 1.0), (d3, 3.0)]}, ["A", "B"])
+
+        self.assertEqual(dates, [d1, d2, d3])
+        returns = log_returns(prices)
+        np.testing.assert_allclose(returns[:, 0], np.log([2.0, 2.0]))
+        self.assertTrue(np.isnan(returns[:, 1]).all())
@@ -0,0 +1,75 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.test import TestCase
+
+from stock.bar_store import HistoricalBarStore
+from stock.freshness import FixedTTLFreshnessPolicy
+from stock.market_calendar import get_trading_calendar
+from stock.models import BarCoverage, DailyBar
+
+
+def polygon_bars(start, end):
+    """Aggregate bars for every session in [start, end], shaped like Polygon.io's"""
+    calendar = get_trading_calendar()
+    return [
+        {
+            "t": int(datetime.combine(day, datetime.min.time(), dt_timezone.utc).timestamp() * 1000),
+            "o": 10, "h": 11, "l": 9, "c": 10.5, "v": 1000,
+        }
+        for day in calendar.sessions_between(start, end)
+    ]
+
+
+class HistoricalBarStoreTests(TestCase):
+    def setUp(self):
+        self.polygon = mock.Mock()
+        self.polygon.iter_historical_prices.side_effect = lambda ticker, start, end: iter(polygon_bars(start, end))
+        self.store = HistoricalBarStore(self.polygon, freshness=FixedTTLFreshnessPolicy())
+
+    def fetched(self):
+        return [call.args[1:] for call in self.polygon.iter_historical_prices.call_args_list]
+
+    def test_only_gaps_are_fetched_and_coverage_merges(self):
+        self.store.get_bars('AAPL', date(2024, 1, 8), date(2024, 1, 19))
+        prices, fetched_upstream = self.store.get_bars('AAPL', date(2024, 1, 1), date(2024, 1, 31))
+
+        self.assertTrue(fetched_upstream)
+        self.assertEqual(self.fetched(), [
+            (date(2024, 1, 8), date(2024, 1, 19)),
+            (date(2024, 1, 1), date(2024, 1, 7)),
+            (date(2024, 1, 20), date(2024, 1, 31)),
+        ])
+        self.assertEqual(
+            list(BarCoverage.objects.values_list('start_date', 'end_date')),
+            [(date(2024, 1, 1), date(2024, 1, 31))],
+        )
+        # New Year's Day and weekends have no bar
+        self.assertEqual(len(prices), 21)
+        self.assertEqual([p["date"] for p in prices[:2]], ['2024-01-02', '2024-01-03'])
+
+        _, fetched_upstream = self.store.get_bars('AAPL', date(2024, 1, 10), date(2024, 1, 25))
+        self.assertFalse(fetched_upstream)
+
+    def test_weekend_only_gap_is_covered_without_a_fetch(self):
+        self.assertEqual(self.store.missing_intervals('AAPL', date(2024, 1, 6), date(2024, 1, 7)), [])
+        self.assertTrue(BarCoverage.objects.filter(ticker='AAPL').exists())
+        self.polygon.iter_historical_prices.assert_not_called()
+
+    def test_session_without_a_bar_yet_is_not_refetched_while_the_attempt_is_fresh(self):
+        # Mid-session: Polygon.io has no daily bar for today yet
+        self.polygon.iter_historical_prices.side_effect = lambda ticker, start, end: iter([])
+        today = date(2024, 3, 13)
+        now = datetime(2024, 3, 13, 15, 0, tzinfo=dt_timezone.utc)
+
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            self.store.get_bars('AAPL', today, today)
+            self.store.get_bars('AAPL', today, today)
+            self.assertEqual(self.polygon.iter_historical_prices.call_count, 1)
+            self.assertIsNotNone(self.store.version('AAPL', today, today))
+
+        with mock.patch('django.utils.timezone.now', return_value=now + timedelta(minutes=2)):
+            self.store.get_bars('AAPL', today, today)
+            self.assertEqual(self.polygon.iter_historical_prices.call_count, 2)
+
+        self.assertFalse(DailyBar.objects.exists())
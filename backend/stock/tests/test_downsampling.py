@@ -0,0 +1,79 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from stock.downsampling import downsample_prices, lttb_indices
+
+
+def reference_lttb(x, y, threshold):
+    """Textbook LTTB, one point at a time"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        cx, cy = np.mean(x[next_lo:next_hi]), np.mean(y[next_lo:next_hi])
+        areas = [abs((x[a] - cx) * (y[j] - y[a]) - (x[a] - x[j]) * (cy - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        selected.append(a)
+    selected.append(n - 1)
+    return selected
+
+
+def bars(closes):
+    return [
+        {"date": f"2024-01-{i + 1:02d}", "open": c - 1, "high": c + 2, "low": c - 2, "close": c, "volume": 10}
+        for i, c in enumerate(closes)
+    ]
+
+
+class LTTBTests(SimpleTestCase):
+    def test_keeps_endpoints_and_requested_count(self):
+        rng = np.random.default_rng(0)
+        y = rng.normal(size=1000).cumsum()
+        x = np.arange(1000, dtype=float)
+
+        selected = lttb_indices(x, y, 50)
+
+        self.assertEqual(len(selected), 50)
+        self.assertEqual((selected[0], selected[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(selected) > 0))
+
+    def test_matches_reference_on_even_buckets(self):
+        rng = np.random.default_rng(1)
+        # 2 + 8 * 12 points: every middle bucket has exactly 12 points
+        y = rng.normal(size=98).cumsum()
+        x = np.arange(98, dtype=float)
+        self.assertEqual(lttb_indices(x, y, 10).tolist(), reference_lttb(x, y, 10))
+
+    def test_keeps_spikes(self):
+        y = np.zeros(100)
+        y[37] = 50.0
+        self.assertIn(37, lttb_indices(np.arange(100, dtype=float), y, 10))
+
+    def test_short_series_are_returned_whole(self):
+        prices = bars([1.0, 2.0, 3.0])
+        self.assertIs(downsample_prices(prices, 10), prices)
+
+
+class DownsamplePricesTests(SimpleTestCase):
+    def test_buckets_keep_ohlc_extremes_and_volume(self):
+        closes = [10.0] * 30
+        closes[14] = 40.0
+        result = downsample_prices(bars(closes), 5)
+
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result[0]["date"], "2024-01-01")
+        self.assertEqual(result[-1]["date"], "2024-01-30")
+        self.assertEqual(sum(bar["volume"] for bar in result), 300)
+        spike = next(bar for bar in result if bar["close"] == 40.0)
+        self.assertEqual((spike["high"], spike["low"]), (42.0, 8.0))
+
+    def test_missing_values_become_none(self):
+        prices = bars([float(c) for c in range(1, 21)])
+        for bar in prices[:5]:
+            bar["high"] = None
+        result = downsample_prices(prices, 4)
+        self.assertIsNone(result[0]["high"])
+        self.assertTrue(all(bar["close"] is not None for bar in result))
@@ -0,0 +1,48 @@
+from django.test import TestCase
+
+from stock.financials_store import FinancialsStore
+
+
+def result(start, end, filing_date, unit='USD', revenues=100.0):
+    return {
+        "start_date": start,
+        "end_date": end,
+        "filing_date": filing_date,
+        "fiscal_year": start[:4],
+        "financials": {
+            "income_statement": {
+                "revenues": {"value": revenues, "unit": unit, "label": "Revenues", "order": 100},
+            },
+        },
+    }
+
+
+class FinancialsStoreTests(TestCase):
+    def setUp(self):
+        self.store = FinancialsStore(None)
+
+    def save(self, ticker, *results):
+        self.store.save_sync(ticker, 8, 'quarterly', {"status": "OK", "results": list(results)})
+
+    def test_periods_without_filing_date_sort_after_dated_filings(self):
+        self.save(
+            'AAPL',
+            result('2023-10-01', '2023-12-31', None),
+            result('2023-07-01', '2023-09-30', '2023-11-03'),
+            result('2023-04-01', '2023-06-30', '2023-08-04'),
+        )
+
+        loaded = self.store.load('AAPL', 3, 'quarterly')
+
+        self.assertEqual([p["end_date"] for p in loaded], ['2023-09-30', '2023-06-30', '2023-12-31'])
+        self.assertEqual(len(self.store.load('AAPL', 2, 'quarterly')), 2)
+
+    def test_units_are_kept_per_company(self):
+        self.save('AAPL', result('2023-07-01', '2023-09-30', '2023-11-03', unit='USD'))
+        self.save('TM', result('2023-07-01', '2023-09-30', '2023-11-10', unit='JPY', revenues=5.0))
+
+        apple = self.store.load('AAPL', 1, 'quarterly')[0]["financials"]["income_statement"]["revenues"]
+        toyota = self.store.load('TM', 1, 'quarterly')[0]["financials"]["income_statement"]["revenues"]
+
+        self.assertEqual(apple, {"value": 100.0, "unit": "USD", "label": "Revenues", "order": 100})
+        self.assertEqual(toyota, {"value": 5.0, "unit": "JPY", "label": "Revenues", "order": 100})
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import SimpleTestCase
+
+from stock.freshness import NEWS, QUOTE, FixedTTLFreshnessPolicy, MarketSessionFreshnessPolicy
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class MarketSessionFreshnessPolicyTests(SimpleTestCase):
+    # NYSE sessions in March 2024 (EDT) run 13:30-20:00 UTC
+
+    def setUp(self):
+        self.policy = MarketSessionFreshnessPolicy(settle_seconds=15 * 60)
+
+    def test_session_hours_use_ttls(self):
+        now = utc(2024, 3, 13, 15, 0)
+        self.assertEqual(self.policy.fresh_since(QUOTE, now), now - timedelta(seconds=60))
+        self.assertEqual(self.policy.expires_at(NEWS, now), now + timedelta(minutes=5))
+        self.assertEqual(self.policy.ttl_seconds(QUOTE, now), 60)
+
+    def test_settle_window_after_close(self):
+        now = utc(2024, 3, 13, 20, 5)
+        self.assertEqual(self.policy.fresh_since(QUOTE, now), now - timedelta(seconds=60))
+        self.assertEqual(self.policy.expires_at(QUOTE, now), now + timedelta(seconds=60))
+        # Never past the end of the settle window
+        self.assertEqual(self.policy.expires_at(NEWS, utc(2024, 3, 13, 20, 12)), utc(2024, 3, 13, 20, 15))
+
+    def test_settled_data_lasts_until_next_open(self):
+        now = utc(2024, 3, 13, 23, 0)
+        self.assertEqual(self.policy.fresh_since(QUOTE, now), utc(2024, 3, 13, 20, 15))
+        self.assertEqual(self.policy.expires_at(QUOTE, now), utc(2024, 3, 14, 13, 30))
+        self.assertTrue(self.policy.is_fresh(QUOTE, utc(2024, 3, 13, 20, 20), now))
+        self.assertFalse(self.policy.is_fresh(QUOTE, utc(2024, 3, 13, 19, 59), now))
+
+    def test_weekend_lasts_until_monday_open(self):
+        fetched = utc(2024, 3, 15, 21, 0)
+        self.assertEqual(self.policy.expires_at(QUOTE, fetched), utc(2024, 3, 18, 13, 30))
+        self.assertTrue(self.policy.is_fresh(QUOTE, fetched, utc(2024, 3, 17, 12, 0)))
+
+
+class FixedTTLFreshnessPolicyTests(SimpleTestCase):
+    def test_overrides_merge_with_defaults(self):
+        policy = FixedTTLFreshnessPolicy({QUOTE: 10})
+        fetched = utc(2024, 3, 16, 12, 0)
+        self.assertEqual(policy.expires_at(QUOTE, fetched), fetched + timedelta(seconds=10))
+        self.assertEqual(policy.expires_at(NEWS, fetched), fetched + timedelta(minutes=5))
@@ -0,0 +1,72 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from stock.indicators import bbands, compute_indicators, ema, macd, parse_indicator_specs, rsi, sma
+
+
+def reference_ema(values, period, alpha=None):
+    """Bar-by-bar EMA seeded with the SMA of the first `period` values"""
+    alpha = alpha if alpha is not None else 2.0 / (period + 1)
+    out = [np.nan] * len(values)
+    out[period - 1] = sum(values[:period]) / period
+    for t in range(period, len(values)):
+        out[t] = (1 - alpha) * out[t - 1] + alpha * values[t]
+    return np.array(out)
+
+
+class IndicatorTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.close = 100 + rng.normal(size=600).cumsum()
+
+    def test_sma(self):
+        result = sma(self.close, 20)
+        self.assertTrue(np.isnan(result[:19]).all())
+        self.assertAlmostEqual(result[19], self.close[:20].mean())
+        self.assertAlmostEqual(result[-1], self.close[-20:].mean())
+
+    def test_ema_matches_recurrence_across_blocks(self):
+        # Short periods decay fast, so the closed form runs over several blocks
+        for period in (5, 200):
+            np.testing.assert_allclose(ema(self.close, period), reference_ema(self.close, period), rtol=1e-9)
+
+    def test_ema_skips_leading_nans(self):
+        values = np.concatenate(([np.nan] * 3, self.close[:50]))
+        result = ema(values, 10)
+        self.assertTrue(np.isnan(result[:12]).all())
+        np.testing.assert_allclose(result[3:], reference_ema(self.close[:50], 10), rtol=1e-9)
+
+    def test_rsi_bounds(self):
+        result = rsi(self.close, 14)
+        self.assertTrue(np.isnan(result[:14]).all())
+        self.assertTrue(((result[14:] >= 0) & (result[14:] <= 100)).all())
+        self.assertEqual(rsi(np.arange(1.0, 40.0), 14)[-1], 100.0)
+
+    def test_macd_histogram(self):
+        result = macd(self.close)
+        np.testing.assert_allclose(
+            result["macd"][33:], (reference_ema(self.close, 12) - reference_ema(self.close, 26))[33:], rtol=1e-9
+        )
+        np.testing.assert_allclose(result["histogram"], result["macd"] - result["signal"])
+
+    def test_bbands_use_population_std(self):
+        result = bbands(self.close, 20, 2.0)
+        window = self.close[-20:]
+        self.assertAlmostEqual(result["upper"][-1], window.mean() + 2 * window.std())
+        self.assertAlmostEqual(result["lower"][-1], window.mean() - 2 * window.std())
+
+
+class ParseIndicatorSpecsTests(SimpleTestCase):
+    def test_defaults_and_deduplication(self):
+        specs = parse_indicator_specs("sma:20, SMA, macd, bbands:20:2.5")
+        self.assertEqual([key for key, _, _ in specs], ["sma:20", "macd:12:26:9", "bbands:20:2.5"])
+
+    def test_invalid_specs(self):
+        for raw in ("", "vwap", "sma:0", "sma:x", "rsi:14:2", "ema:5000"):
+            with self.subTest(raw=raw), self.assertRaises(ValueError):
+                parse_indicator_specs(raw)
+
+    def test_warm_up_is_serialized_as_none(self):
+        results = compute_indicators([1.0, 2.0, 3.0], parse_indicator_specs("sma:2,bbands:2"))
+        self.assertEqual(results["sma:2"], [None, 1.5, 2.5])
+        self.assertEqual(results["bbands:2:2"]["middle"], [None, 1.5, 2.5])
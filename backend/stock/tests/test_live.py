@@ -0,0 +1,50 @@
+import asyncio
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from stock import live
+from stock.live import QuoteHub
+
+
+class QuoteHubPollTests(SimpleTestCase):
+    def poll_waits(self, outcomes):
+        """Run one symbol's poller over `outcomes` and return the waits it scheduled"""
+        waits = []
+
+        async def sleep(seconds):
+            waits.append(seconds)
+            if len(waits) == len(outcomes):
+                raise asyncio.CancelledError
+
+        hub = QuoteHub(lambda stock_data, source, ohlc: {"price": stock_data.current_price, "source": source},
+                       min_interval=5, max_interval=100, retry_interval=30)
+        with mock.patch.object(live, 'AsyncStockDataService') as service_class, \
+                mock.patch.object(live.asyncio, 'sleep', sleep):
+            service = service_class.return_value
+            service.aget_stock_data = mock.AsyncMock(side_effect=outcomes)
+            service.freshness.expires_at.side_effect = lambda kind, at: at + timedelta(seconds=60)
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(hub._poll('AAPL'))
+        return waits
+
+    def quote(self, source, age=0):
+        stock_data = mock.Mock(current_price=190, last_updated=timezone.now() - timedelta(seconds=age))
+        return stock_data, source, None
+
+    def test_fresh_quote_is_polled_when_it_expires(self):
+        [wait] = self.poll_waits([self.quote("database", age=20)])
+        self.assertAlmostEqual(wait, 40, delta=1)
+
+    def test_rate_limited_fallback_backs_off(self):
+        waits = self.poll_waits([
+            self.quote("stale", age=3600),
+            self.quote("stale", age=3600),
+            RuntimeError("upstream down"),
+            self.quote("stale", age=3600),
+            self.quote("polygon_api"),
+        ])
+        self.assertEqual(waits[:4], [30, 60, 100, 100])
+        self.assertAlmostEqual(waits[4], 60, delta=1)
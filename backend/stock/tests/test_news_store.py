@@ -0,0 +1,64 @@
+from unittest import mock
+
+import requests
+from django.test import TestCase
+
+from stock.freshness import FixedTTLFreshnessPolicy
+from stock.news_store import NewsStore
+
+
+def article(article_id, published, *tickers):
+    return {"id": article_id, "published_utc": published, "tickers": list(tickers), "title": article_id}
+
+
+def feed(*articles):
+    return {"status": "OK", "results": list(articles)}
+
+
+class NewsStoreTests(TestCase):
+    def setUp(self):
+        self.polygon = mock.Mock()
+        self.store = NewsStore(self.polygon, freshness=FixedTTLFreshnessPolicy())
+
+    def test_merged_feed_is_deduplicated_and_newest_first(self):
+        shared = article("shared", "2024-03-12T15:00:00Z", "AAPL", "MSFT")
+        self.polygon.get_news.side_effect = lambda ticker, limit: {
+            "AAPL": feed(shared, article("a1", "2024-03-10T12:00:00Z", "AAPL")),
+            "MSFT": feed(article("m1", "2024-03-11T09:00:00Z", "MSFT"), shared),
+        }[ticker]
+
+        results, source, errors = self.store.get(["AAPL", "MSFT"], 5)
+
+        self.assertEqual([a["id"] for a in results], ["shared", "m1", "a1"])
+        self.assertEqual((source, errors), ("polygon_api", {}))
+
+    def test_fresh_feeds_are_served_locally(self):
+        self.polygon.get_news.return_value = feed(article("a1", "2024-03-10T12:00:00Z", "AAPL"))
+        self.store.get(["AAPL"], 5)
+        self.polygon.get_news.reset_mock()
+
+        results, source, _ = self.store.get(["AAPL"], 3)
+
+        self.assertEqual(source, "database")
+        self.assertEqual([a["id"] for a in results], ["a1"])
+        self.polygon.get_news.assert_not_called()
+        self.assertIsNotNone(self.store.version(["AAPL"], 3))
+        # A larger limit than was synced needs another fetch
+        self.assertEqual(self.store.due_feeds(["AAPL"], 10)[1], ["AAPL"])
+        self.assertIsNone(self.store.version(["AAPL"], 10))
+
+    def test_articles_indexed_for_every_mentioned_ticker(self):
+        self.polygon.get_news.return_value = feed(article("shared", "2024-03-12T15:00:00Z", "AAPL", "MSFT"))
+        self.store.get(["AAPL"], 5)
+        self.assertEqual([a["id"] for a in self.store.load(["MSFT"], 5)], ["shared"])
+
+    def test_failed_sync_serves_stored_articles_or_reports_error(self):
+        self.polygon.get_news.return_value = feed(article("a1", "2024-03-10T12:00:00Z", "AAPL"))
+        self.store.get(["AAPL"], 5)
+        self.polygon.get_news.side_effect = requests.exceptions.ConnectionError("down")
+
+        results, source, errors = self.store.get(["AAPL", "MSFT"], 10)
+
+        self.assertEqual(source, "stale")
+        self.assertEqual([a["id"] for a in results], ["a1"])
+        self.assertEqual(list(errors), ["MSFT"])
@@ -0,0 +1,64 @@
+import asyncio
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from stock import polygon_client
+from stock.polygon_client import AsyncPolygonHTTPClient, PolygonHTTPClient
+
+
+def response(status_code, headers=None):
+    return mock.Mock(status_code=status_code, headers=headers or {})
+
+
+class RetryRateLimitTests(SimpleTestCase):
+    """Every attempt, retries included, takes a token from the rate limiter"""
+
+    def setUp(self):
+        self.limiter = mock.Mock()
+        patches = [
+            mock.patch.object(polygon_client, 'get_rate_limiter', return_value=self.limiter),
+            mock.patch.object(polygon_client.time, 'sleep'),
+            mock.patch.object(polygon_client.asyncio, 'sleep', new=mock.AsyncMock()),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_sync_retry_takes_a_token_per_attempt(self):
+        client = PolygonHTTPClient(max_retries=3)
+        self.addCleanup(client.close)
+        client.session.get = mock.Mock(side_effect=[
+            response(429, {"Retry-After": "1"}),
+            requests.exceptions.ConnectionError(),
+            response(200),
+        ])
+
+        self.assertEqual(client.get('prev_close', 'https://polygon.test/').status_code, 200)
+        self.assertEqual(self.limiter.acquire.call_count, 3)
+        polygon_client.time.sleep.assert_any_call(1.0)
+        self.assertEqual(client.stats()['prev_close']['requests'], 1)
+
+    def test_sync_returns_last_response_after_retries(self):
+        client = PolygonHTTPClient(max_retries=1)
+        self.addCleanup(client.close)
+        client.session.get = mock.Mock(return_value=response(503))
+
+        self.assertEqual(client.get('prev_close', 'https://polygon.test/').status_code, 503)
+        self.assertEqual(self.limiter.acquire.call_count, 2)
+        self.assertEqual(client.stats()['prev_close']['errors'], 1)
+
+    def test_async_retry_takes_a_token_per_attempt(self):
+        self.limiter.acquire_async = mock.AsyncMock()
+
+        async def fetch():
+            client = AsyncPolygonHTTPClient(max_retries=3)
+            client.client.get = mock.AsyncMock(side_effect=[response(429), response(500), response(200)])
+            try:
+                return await client.get('prev_close', 'https://polygon.test/')
+            finally:
+                await client.aclose()
+
+        self.assertEqual(asyncio.run(fetch()).status_code, 200)
+        self.assertEqual(self.limiter.acquire_async.await_count, 3)
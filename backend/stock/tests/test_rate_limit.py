@@ -0,0 +1,39 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from stock.rate_limit import BACKGROUND, INTERACTIVE, TokenBucket, _LocalBucketStore, upstream_priority
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_reserve_leaves_background_a_token_at_low_rates(self):
+        # Polygon.io free tier: a one-token bucket
+        bucket = TokenBucket(_LocalBucketStore(), per_minute=5)
+        self.assertEqual(bucket.capacity, 1)
+        self.assertEqual(bucket.reserve, 0)
+        self.assertEqual(bucket._try_take(BACKGROUND), 0.0)
+
+    def test_explicit_reserve_is_clamped_to_capacity(self):
+        bucket = TokenBucket(_LocalBucketStore(), per_minute=60, burst=3, reserve=5)
+        self.assertEqual(bucket.reserve, 2)
+        self.assertEqual(bucket._try_take(BACKGROUND), 0.0)
+        self.assertGreater(bucket._try_take(BACKGROUND), 0.0)
+        self.assertEqual(bucket._try_take(INTERACTIVE), 0.0)
+
+    def test_reserve_kept_for_interactive_calls(self):
+        bucket = TokenBucket(_LocalBucketStore(), per_minute=600)
+        self.assertEqual((bucket.capacity, bucket.reserve), (100, 30))
+        for _ in range(70):
+            self.assertEqual(bucket._try_take(BACKGROUND), 0.0)
+        self.assertGreater(bucket._try_take(BACKGROUND), 0.0)
+        self.assertEqual(bucket._try_take(INTERACTIVE), 0.0)
+
+    def test_acquire_async_takes_a_token(self):
+        bucket = TokenBucket(_LocalBucketStore(), per_minute=5)
+
+        async def acquire():
+            with upstream_priority(BACKGROUND, wait=0):
+                await bucket.acquire_async('test')
+
+        asyncio.run(acquire())
+        self.assertEqual(bucket.stats()["classes"][BACKGROUND]["granted"], 1)
@@ -0,0 +1,105 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from stock import freshness, services
+from stock.freshness import FixedTTLFreshnessPolicy
+from stock.models import StockData, StockOHLC
+from stock.quote_cache import get_quote_cache
+from stock.rate_limit import RateLimitExceeded
+
+
+class ServiceTestCase(TestCase):
+    """Fixed TTLs, an empty L1 cache and a mocked Polygon.io service"""
+
+    def setUp(self):
+        get_quote_cache().clear()
+        patches = [
+            mock.patch.object(freshness, '_policy', FixedTTLFreshnessPolicy()),
+            mock.patch.object(services, 'PolygonAPIService'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(get_quote_cache().clear)
+        self.service = services.StockDataService()
+        self.polygon = self.service.polygon_service
+
+
+class GetStockDataTests(ServiceTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        StockData.objects.create(ticker='AAPL', name='Apple Inc.', current_price=190, last_updated=now)
+        StockOHLC.objects.create(
+            ticker='AAPL', open_price=1, high_price=2, low_price=0.5, close_price=1.5, volume=100,
+            last_updated=now - timedelta(days=1),
+        )
+
+    def test_fresh_quote_survives_a_rate_limited_ohlc_refresh(self):
+        self.polygon.get_daily_ohlc.side_effect = RateLimitExceeded("budget exhausted")
+
+        stock_data, source, ohlc_info = self.service.get_stock_data('AAPL')
+
+        self.assertEqual((stock_data.ticker, source), ('AAPL', 'database'))
+        self.assertEqual(ohlc_info["c"], 1.5)
+        self.polygon.get_daily_ohlc.assert_called_once_with('AAPL')
+
+    def test_stale_ohlc_is_refreshed_when_upstream_answers(self):
+        self.polygon.get_daily_ohlc.return_value = {"results": [{"o": 3, "h": 4, "l": 2, "c": 3.5, "v": 10}]}
+
+        _, _, ohlc_info = self.service.get_stock_data('AAPL')
+
+        self.assertEqual(ohlc_info["c"], 3.5)
+        self.assertEqual(float(StockOHLC.objects.get(ticker='AAPL').close_price), 3.5)
+
+
+class RequestScopeTests(SimpleTestCase):
+    """Upstream GETs are deduplicated within a request_scope block"""
+
+    def setUp(self):
+        patch = mock.patch.dict('os.environ', {'POLYGON_API_KEY': 'test'})
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.polygon = services.PolygonAPIService()
+        self.polygon.client = mock.Mock()
+        self.polygon.client.get.return_value = mock.Mock(status_code=200, json=lambda: {"results": {}})
+
+    def test_concurrent_calls_share_one_fetch(self):
+        release = threading.Event()
+
+        def slow_get(endpoint, url, params=None):
+            release.wait(5)
+            return mock.Mock(status_code=200, json=lambda: {"results": {"ticker": "AAPL"}})
+
+        self.polygon.client.get.side_effect = slow_get
+        with self.polygon.request_scope(), ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(self.polygon.get_ticker_info, 'AAPL') for _ in range(4)]
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(self.polygon.client.get.call_count, 1)
+        self.assertEqual(results, [{"results": {"ticker": "AAPL"}}] * 4)
+
+    def test_distinct_urls_and_calls_outside_a_scope_are_not_shared(self):
+        with self.polygon.request_scope():
+            self.polygon.get_ticker_info('AAPL')
+            with self.polygon.request_scope():
+                self.polygon.get_ticker_info('AAPL')
+            self.polygon.get_ticker_info('MSFT')
+        self.polygon.get_ticker_info('AAPL')
+
+        self.assertEqual(self.polygon.client.get.call_count, 3)
+
+    def test_errors_are_shared_within_the_scope(self):
+        self.polygon.client.get.side_effect = requests.exceptions.ConnectionError("down")
+        with self.polygon.request_scope():
+            for _ in range(2):
+                with self.assertRaises(requests.exceptions.ConnectionError):
+                    self.polygon.get_ticker_info('AAPL')
+        self.assertEqual(self.polygon.client.get.call_count, 1)
@@ -0,0 +1,77 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from stock.rate_limit import BACKGROUND, RateLimitExceeded, outranked_by_caller, upstream_priority
+from stock.singleflight import SingleFlight
+
+
+class SingleFlightTests(SimpleTestCase):
+    def run_with_follower(self, leader_error, follower_priority):
+        """
+        Start a leader that fails with `leader_error` once a follower has
+        joined; return what the follower got (result or exception)
+        """
+        flight = SingleFlight('test')
+        joined, release = threading.Event(), threading.Event()
+        calls = []
+
+        def leader_work():
+            calls.append('leader')
+            release.wait(5)
+            raise leader_error
+
+        def follower_work():
+            calls.append('follower')
+            return 'fresh'
+
+        def lead():
+            with upstream_priority(BACKGROUND):
+                try:
+                    flight.do('AAPL', leader_work)
+                except RateLimitExceeded:
+                    pass
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        while 'AAPL' not in flight._calls:
+            pass
+
+        outcome = {}
+
+        def follow():
+            joined.set()
+            try:
+                with upstream_priority(follower_priority):
+                    outcome['result'] = flight.do('AAPL', follower_work, retry_if=outranked_by_caller)
+            except RateLimitExceeded as e:
+                outcome['error'] = e
+
+        follower = threading.Thread(target=follow)
+        follower.start()
+        joined.wait(5)
+        # Give the follower time to block on the leader's flight
+        follower.join(0.1)
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        return outcome, calls
+
+    def test_interactive_follower_refetches_after_background_leader_is_rate_limited(self):
+        outcome, calls = self.run_with_follower(
+            RateLimitExceeded("budget exhausted", priority=BACKGROUND), 'interactive'
+        )
+        self.assertEqual(outcome, {'result': 'fresh'})
+        self.assertEqual(calls, ['leader', 'follower'])
+
+    def test_background_follower_shares_the_failure(self):
+        outcome, calls = self.run_with_follower(
+            RateLimitExceeded("budget exhausted", priority=BACKGROUND), BACKGROUND
+        )
+        self.assertIsInstance(outcome.get('error'), RateLimitExceeded)
+        self.assertEqual(calls, ['leader'])
+
+    def test_finished_flight_is_retired(self):
+        flight = SingleFlight('test')
+        self.assertEqual(flight.do('AAPL', lambda: 1), 1)
+        self.assertEqual(flight._calls, {})
@@ -0,0 +1,29 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from stock import services
+
+
+class TickerIndexRefreshTests(SimpleTestCase):
+    def tearDown(self):
+        services._index_refresh_failed_at = None
+
+    @mock.patch.object(services, 'PolygonAPIService')
+    @mock.patch.object(services, 'load_snapshot', return_value=None)
+    def test_failed_rebuild_is_not_retried_during_cooldown(self, *_):
+        service = services.StockDataService()
+        with mock.patch.object(service, 'build_ticker_index', side_effect=OSError("upstream down")), \
+                mock.patch.object(services._refresh_executor, 'submit') as submit:
+            services._index_refresh_lock.acquire()
+            service._background_index_refresh()
+            self.assertFalse(services._index_refresh_lock.locked())
+            self.assertIsNotNone(services._index_refresh_failed_at)
+
+            service.refresh_ticker_index_in_background()
+            submit.assert_not_called()
+
+            with self.settings(STOCK_TICKER_INDEX_RETRY_INTERVAL=0):
+                service.refresh_ticker_index_in_background()
+            submit.assert_called_once()
+        services._index_refresh_lock.release()
@@ -0,0 +1,97 @@
+import json
+from unittest import mock
+
+from django.test import TestCase
+
+from stock import freshness, services, services_async, views
+from stock.bar_store import SAVE_BATCH_SIZE
+from stock.financials_store import FinancialsStore
+from stock.freshness import FixedTTLFreshnessPolicy
+
+
+class HistoricalStreamTests(TestCase):
+    url = '/api/stock/data/historical/?ticker=AAPL&from=2000-01-01&to=2024-01-01&stream=true'
+
+    def setUp(self):
+        self.produced = 0
+        self.total = SAVE_BATCH_SIZE * 3 + 5
+        patch = mock.patch.object(views, 'StockDataService')
+        service = patch.start()
+        self.addCleanup(patch.stop)
+        service.return_value.iter_historical_data.return_value = (self._prices(), 'database')
+
+    def _prices(self):
+        for index in range(self.total):
+            self.produced += 1
+            yield {"date": f"d{index}", "close": index}
+
+    async def test_asgi_stream_sends_batches_as_they_are_read(self):
+        response = await self.async_client.get(self.url)
+        self.assertTrue(response.is_async)
+
+        chunks = aiter(response.streaming_content)
+        received = [await anext(chunks)]
+        self.assertEqual(self.produced, 0)
+        received.append(await anext(chunks))
+        self.assertEqual(self.produced, SAVE_BATCH_SIZE)
+
+        received += [chunk async for chunk in chunks]
+        self.assertEqual(self.produced, self.total)
+        payload = json.loads(b"".join(received))
+        self.assertEqual(payload["source"], 'database')
+        self.assertEqual([price["close"] for price in payload["prices"]], list(range(self.total)))
+
+    def test_wsgi_stream_is_unchanged(self):
+        response = self.client.get(self.url)
+        self.assertFalse(response.is_async)
+        payload = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(payload["prices"]), self.total)
+
+
+class ConditionalGetTests(TestCase):
+    url = '/api/stock/financials/?ticker=AAPL&limit=4'
+
+    def setUp(self):
+        patches = [
+            mock.patch.object(freshness, '_policy', FixedTTLFreshnessPolicy()),
+            mock.patch.object(services, 'PolygonAPIService'),
+            mock.patch.object(services_async, 'AsyncPolygonAPIService'),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        FinancialsStore(None).save_sync('AAPL', 8, 'quarterly', {"status": "OK", "results": [{
+            "start_date": "2023-07-01", "end_date": "2023-09-30", "filing_date": "2023-11-03", "financials": {},
+        }]})
+
+    def test_matching_etag_gets_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+        other = self.client.get(self.url.replace('limit=4', 'limit=2'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(other.status_code, 200)
+
+    async def test_async_view_shares_validators(self):
+        response = await self.async_client.get(self.url)
+        cached = await self.async_client.get(
+            self.url.replace('/financials/', '/async/financials/'), headers={"if-none-match": response['ETag']}
+        )
+        # The ETag covers the URL, so the async endpoint has its own
+        self.assertEqual(cached.status_code, 200)
+        again = await self.async_client.get(
+            self.url.replace('/financials/', '/async/financials/'), headers={"if-none-match": cached['ETag']}
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_data_due_for_sync_is_not_validated(self):
+        response = self.client.get('/api/stock/financials/?ticker=MSFT')
+        self.assertFalse(response.has_header('ETag'))
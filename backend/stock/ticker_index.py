@@ -0,0 +1,183 @@
+"""
+Local ticker search index for company autocomplete.
+
+The index is built from a bulk snapshot of Polygon.io's reference tickers
+and kept in memory, so a search is a couple of bisects over sorted lists
+instead of an upstream call per keystroke. The snapshot is persisted as
+JSON so a process can load it at startup; StockDataService refreshes it in
+the background once it is older than STOCK_TICKER_INDEX_MAX_AGE.
+"""
+import bisect
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Reference fields kept per ticker (the search response shape)
+ENTRY_FIELDS = ("ticker", "name", "market", "locale", "primary_exchange", "type", "active")
+
+MAX_RESULTS = 10
+
+# Sorts after every character that can appear in a ticker or name token
+_PREFIX_END = "\uffff"
+
+
+def name_tokens(text):
+    """Lower-case alphanumeric words of a company name or query"""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class TickerIndex:
+    """Immutable prefix index over tickers and company-name tokens"""
+
+    def __init__(self, entries, built_at=None):
+        """
+        Args:
+            entries: Dicts with ENTRY_FIELDS and an optional market_cap
+            built_at: Epoch seconds the snapshot was taken
+        """
+        self.entries = sorted(entries, key=lambda entry: entry["ticker"])
+        self.tickers = [entry["ticker"] for entry in self.entries]
+        self.built_at = built_at if built_at is not None else time.time()
+
+        # Static rank: larger market cap first, then shorter ticker. Matches
+        # are kept as ranks, so picking the best ones is a plain integer
+        # nsmallest with no per-candidate key function.
+        order = sorted(
+            range(len(self.entries)),
+            key=lambda position: (
+                -(self.entries[position].get("market_cap") or 0),
+                len(self.tickers[position]),
+                self.tickers[position],
+            ),
+        )
+        self.ranked = [self.entries[position] for position in order]
+        self.ticker_ranks = [0] * len(order)
+        for rank, position in enumerate(order):
+            self.ticker_ranks[position] = rank
+
+        postings = sorted({
+            (token, self.ticker_ranks[position])
+            for position, entry in enumerate(self.entries)
+            for token in name_tokens(entry.get("name") or "")
+        })
+        self.tokens = [token for token, _ in postings]
+        self.token_ranks = [rank for _, rank in postings]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def age(self, now=None):
+        """Seconds since the snapshot was taken"""
+        return (now or time.time()) - self.built_at
+
+    def _ticker_prefix(self, prefix):
+        """Ranks of tickers starting with prefix"""
+        lo = bisect.bisect_left(self.tickers, prefix)
+        hi = bisect.bisect_left(self.tickers, prefix + _PREFIX_END, lo)
+        return self.ticker_ranks[lo:hi]
+
+    def _token_prefix(self, prefix):
+        """Ranks of companies with a name word starting with prefix"""
+        lo = bisect.bisect_left(self.tokens, prefix)
+        hi = bisect.bisect_left(self.tokens, prefix + _PREFIX_END, lo)
+        return set(self.token_ranks[lo:hi])
+
+    def search(self, query, limit=MAX_RESULTS):
+        """
+        Entries matching a query, best first.
+
+        A ticker matches when it starts with the query; a company matches
+        when every query word is a prefix of some word of its name. The
+        exact ticker ranks first, then ticker prefixes, then name matches;
+        within each group larger market caps come first.
+        """
+        symbol = query.strip().upper()
+        ticker_matches = self._ticker_prefix(symbol) if symbol else []
+        ranks = heapq.nsmallest(limit, ticker_matches)
+
+        # An exact ticker match leads regardless of market cap
+        position = bisect.bisect_left(self.tickers, symbol)
+        if symbol and position < len(self.tickers) and self.tickers[position] == symbol:
+            exact = self.ticker_ranks[position]
+            ranks = [exact] + [rank for rank in ranks if rank != exact]
+
+        words = name_tokens(query)
+        if words and len(ranks) < limit:
+            matches = self._token_prefix(words[0])
+            for word in words[1:]:
+                if not matches:
+                    break
+                matches &= self._token_prefix(word)
+            matches.difference_update(ticker_matches)
+            ranks += heapq.nsmallest(limit - len(ranks), matches)
+
+        return [self.ranked[rank] for rank in ranks[:limit]]
+
+    def to_json(self):
+        return {"built_at": self.built_at, "entries": self.entries}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["entries"], built_at=data["built_at"])
+
+
+def ticker_index_path():
+    return getattr(settings, 'STOCK_TICKER_INDEX_PATH', os.path.join(settings.BASE_DIR, 'ticker_index.json'))
+
+
+def ticker_index_max_age():
+    return getattr(settings, 'STOCK_TICKER_INDEX_MAX_AGE', 24 * 60 * 60)
+
+
+def load_snapshot(path=None):
+    """Read a persisted index, or None if there is no usable snapshot"""
+    path = path or ticker_index_path()
+    try:
+        with open(path, encoding='utf-8') as f:
+            return TickerIndex.from_json(json.load(f))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Ignoring unreadable ticker index snapshot %s: %s", path, e)
+        return None
+
+
+def save_snapshot(index, path=None):
+    """Persist an index atomically, so concurrent readers never see a partial file"""
+    path = path or ticker_index_path()
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(index.to_json(), f, separators=(',', ':'))
+    os.replace(temporary, path)
+
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+
+def get_ticker_index():
+    """The process-wide index, loaded from disk on first use (None if there is none yet)"""
+    global _index, _index_loaded
+    if not _index_loaded:
+        with _index_lock:
+            if not _index_loaded:
+                _index = load_snapshot()
+                _index_loaded = True
+    return _index
+
+
+def set_ticker_index(index):
+    """Swap in a new index for subsequent searches"""
+    global _index, _index_loaded
+    with _index_lock:
+        _index = index
+        _index_loaded = True
@@ -0,0 +1,35 @@
+"""
+Bulk upsert helper.
+
+On PostgreSQL and SQLite, bulk_create(update_conflicts=True) compiles to a
+single INSERT ... ON CONFLICT (...) DO UPDATE statement, so rows are
+inserted or updated in one round-trip without a read first, and new rows
+take their id from the table's own sequence. Backends without conflict
+targets fall back to one update_or_create per row.
+"""
+from django.db import connections, router
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields):
+    """
+    Insert `objs`, updating `update_fields` of rows that already exist
+    with the same `unique_fields`. Returns objs.
+    """
+    if not objs:
+        return objs
+    features = connections[router.db_for_write(model)].features
+    if features.supports_update_conflicts_with_target:
+        model.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
+        return objs
+
+    for obj in objs:
+        model.objects.update_or_create(
+            **{field: getattr(obj, field) for field in unique_fields},
+            defaults={field: getattr(obj, field) for field in update_fields},
+        )
+    return objs
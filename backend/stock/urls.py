@@ -1,12 +1,29 @@
 from django.urls import path
-from .views import get_stock_data, get_historical_data, search_companies, get_financials, get_news
+from .views import (
+    get_stock_data, get_stock_data_batch, get_historical_data, get_indicators,
+    get_correlation, get_sector_performance, search_companies, get_financials, get_news,
+    get_upstream_stats,
+)
+from . import views_async
 
 app_name = 'stock'
 
 urlpatterns = [
     path('data/', get_stock_data, name='stock-data'),
+    path('data/batch/', get_stock_data_batch, name='stock-data-batch'),
     path('data/historical/', get_historical_data, name='stock-historical'),
+    path('indicators/', get_indicators, name='indicators'),
+    path('correlation/', get_correlation, name='correlation'),
+    path('sectors/', get_sector_performance, name='sector-performance'),
     path('search/', search_companies, name='search-companies'),
     path('financials/', get_financials, name='financials'),
     path('news/', get_news, name='news'),
+    path('stats/', get_upstream_stats, name='upstream-stats'),
+    # Async variants (event-loop based when served over ASGI)
+    path('async/data/', views_async.get_stock_data, name='stock-data-async'),
+    path('async/data/historical/', views_async.get_historical_data, name='stock-historical-async'),
+    path('async/search/', views_async.search_companies, name='search-companies-async'),
+    path('async/financials/', views_async.get_financials, name='financials-async'),
+    path('async/news/', views_async.get_news, name='news-async'),
+    path('async/stream/', views_async.stream_quotes, name='stream-quotes'),
 ]
@@ -1,12 +1,51 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from .services import StockDataService
 from .serializers import StockDataResponseSerializer
-from datetime import datetime
+from .polygon_client import async_client_stats, get_polygon_client
+from .search_cache import get_search_cache
+from .quote_cache import get_quote_cache
+from .rate_limit import get_rate_limiter
+from .live import live_stats
+from .bar_store import SAVE_BATCH_SIZE, parse_date
+from .downsampling import downsample_prices
+from .indicators import parse_indicator_specs
+from .analytics import matrix_to_lists
+from .http_cache import conditional_cache, financials_version, historical_version, news_version
+from backend.renderers import dumps
+import itertools
+import json
 import requests
 
 
+def _format_stock_data(stock_data, source, ohlc_data):
+    """Build the per-ticker response payload shared by the single and batch endpoints"""
+    # Extract OHLC values from Polygon API response
+    # Polygon API returns: o (open), h (high), l (low), c (close)
+    open_price = ohlc_data.get('o') if ohlc_data else None
+    high_price = ohlc_data.get('h') if ohlc_data else None
+    low_price = ohlc_data.get('l') if ohlc_data else None
+    close_price = ohlc_data.get('c') if ohlc_data else None
+
+    return {
+        "ticker": stock_data.ticker,
+        "name": stock_data.name,
+        "current_price": float(stock_data.current_price) if stock_data.current_price else None,
+        "market_cap": stock_data.market_cap,
+        "volume": stock_data.volume,
+        "last_updated": stock_data.last_updated,
+        "source": source,
+        "open_price": float(open_price) if open_price is not None else None,
+        "high_price": float(high_price) if high_price is not None else None,
+        "low_price": float(low_price) if low_price is not None else None,
+        "close_price": float(close_price) if close_price is not None else None
+    }
+
+
 @api_view(["GET"])
 def get_stock_data(request):
     """
@@ -25,27 +64,7 @@ def get_stock_data(request):
         stock_service = StockDataService()
         stock_data, source, ohlc_data = stock_service.get_stock_data(ticker)
         
-        # Extract OHLC values from Polygon API response
-        # Polygon API returns: o (open), h (high), l (low), c (close)
-        open_price = ohlc_data.get('o') if ohlc_data else None
-        high_price = ohlc_data.get('h') if ohlc_data else None
-        low_price = ohlc_data.get('l') if ohlc_data else None
-        close_price = ohlc_data.get('c') if ohlc_data else None
-        
-        # Serialize the response
-        response_data = {
-            "ticker": stock_data.ticker,
-            "name": stock_data.name,
-            "current_price": float(stock_data.current_price) if stock_data.current_price else None,
-            "market_cap": stock_data.market_cap,
-            "volume": stock_data.volume,
-            "last_updated": stock_data.last_updated,
-            "source": source,
-            "open_price": float(open_price) if open_price is not None else None,
-            "high_price": float(high_price) if high_price is not None else None,
-            "low_price": float(low_price) if low_price is not None else None,
-            "close_price": float(close_price) if close_price is not None else None
-        }
+        response_data = _format_stock_data(stock_data, source, ohlc_data)
         
         return Response(response_data)
         
@@ -61,6 +80,73 @@ def get_stock_data(request):
         )
 
 
+# Upper bound on symbols accepted by the batch endpoint
+MAX_BATCH_TICKERS = 100
+
+
+@api_view(["GET"])
+def get_stock_data_batch(request):
+    """
+    Fetch stock data for several tickers in one request
+    Query parameter: tickers (e.g., ?tickers=AAPL,MSFT,GOOGL)
+    Each entry in "results" has the same shape as /api/stock/data/
+    """
+    raw_tickers = request.GET.get('tickers', '')
+    # Normalize and de-duplicate while keeping the requested order
+    tickers = list(dict.fromkeys(
+        t.strip().upper() for t in raw_tickers.split(',') if t.strip()
+    ))
+
+    if not tickers:
+        return Response(
+            {"error": "At least one ticker symbol is required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return Response(
+            {"error": f"At most {MAX_BATCH_TICKERS} tickers can be requested at once"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        stock_service = StockDataService()
+        results, errors = stock_service.get_stock_data_batch(tickers)
+
+        return Response({
+            "results": {
+                ticker: _format_stock_data(*results[ticker])
+                for ticker in tickers if ticker in results
+            },
+            "errors": errors,
+            "count": len(results)
+        })
+
+    except ValueError as e:
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    except Exception as e:
+        return Response(
+            {"error": f"An error occurred: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def _format_search_result(result):
+    """Build one search result entry shared by the sync and async search endpoints"""
+    return {
+        "ticker": result.get("ticker"),
+        "name": result.get("name"),
+        "market": result.get("market"),
+        "locale": result.get("locale"),
+        "primary_exchange": result.get("primary_exchange"),
+        "type": result.get("type"),
+        "active": result.get("active")
+    }
+
+
 @api_view(["GET"])
 def search_companies(request):
     """
@@ -86,17 +172,7 @@ def search_companies(request):
         results = stock_service.search_companies(query)
         
         # Format the results for the frontend
-        formatted_results = []
-        for result in results:
-            formatted_results.append({
-                "ticker": result.get("ticker"),
-                "name": result.get("name"),
-                "market": result.get("market"),
-                "locale": result.get("locale"),
-                "primary_exchange": result.get("primary_exchange"),
-                "type": result.get("type"),
-                "active": result.get("active")
-            })
+        formatted_results = [_format_search_result(result) for result in results]
         
         return Response({
             "query": query,
@@ -115,18 +191,57 @@ def search_companies(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def _historical_json_head(ticker, from_date, to_date, source):
+    """Opening of the streamed historical response, up to the prices array"""
+    header = json.dumps({"ticker": ticker, "from": from_date, "to": to_date, "source": source})
+    return header[:-1] + ', "prices": ['
+
+
+def _stream_historical_json(ticker, from_date, to_date, prices, source):
+    """Yield the historical response as JSON text, one price object at a time"""
+    yield _historical_json_head(ticker, from_date, to_date, source)
+    for index, price in enumerate(prices):
+        yield (b", " if index else b"") + dumps(price)
+    yield "]}"
+
+
+async def _astream_historical_json(ticker, from_date, to_date, prices, source):
+    """
+    _stream_historical_json for ASGI servers, which would otherwise read a
+    sync iterator to the end before sending anything. The prices iterator
+    (database reads and upstream fetches) is advanced on a worker thread,
+    one SAVE_BATCH_SIZE batch at a time.
+    """
+    next_batch = sync_to_async(lambda: [dumps(price) for price in itertools.islice(prices, SAVE_BATCH_SIZE)])
+    yield _historical_json_head(ticker, from_date, to_date, source)
+    separator = b""
+    while True:
+        batch = await next_batch()
+        if not batch:
+            break
+        yield separator + b", ".join(batch)
+        separator = b", "
+    yield "]}"
+
+
+@conditional_cache(historical_version)
 @api_view(["GET"])
 def get_historical_data(request):
     """
-    Fetch historical stock data using Polygon.io
+    Fetch historical daily bars, served from the local bar store and
+    filled from Polygon.io only for dates not fetched before
     Query params:
         - ticker (e.g., AAPL)
         - from (e.g., 2023-01-01)
         - to (e.g., 2023-01-10)
+        - stream (optional, "true" to stream the prices array as it is produced)
+        - points (optional, downsample to at most N bars with LTTB; disables streaming)
     """
     ticker = request.GET.get('ticker', '').upper()
     from_date = request.GET.get('from')
     to_date = request.GET.get('to')
+    stream = request.GET.get('stream', '').lower() in ('1', 'true')
+    points = request.GET.get('points')
 
     if not ticker or not from_date or not to_date:
         return Response(
@@ -134,42 +249,197 @@ def get_historical_data(request):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    start, end = parse_date(from_date), parse_date(to_date)
+    if not start or not end or start > end:
+        return Response(
+            {"error": "from and to must be YYYY-MM-DD dates with from <= to"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if points is not None:
+        try:
+            points = int(points)
+        except ValueError:
+            points = 0
+        if points < 3:
+            return Response(
+                {"error": "points must be an integer of at least 3"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
     try:
-        polygon_service = StockDataService().polygon_service
-        raw_data = polygon_service.get_historical_prices(ticker, from_date, to_date)
+        if stream and points is None:
+            prices, source = StockDataService().iter_historical_data(ticker, start, end)
+            if isinstance(request._request, ASGIRequest):
+                content = _astream_historical_json(ticker, from_date, to_date, prices, source)
+            else:
+                content = _stream_historical_json(ticker, from_date, to_date, prices, source)
+            return StreamingHttpResponse(content, content_type='application/json')
+
+        prices, source = StockDataService().get_historical_data(ticker, start, end)
 
-        results = raw_data.get("results", [])
-        if not results:
+        if not prices:
             return Response({"message": "No data found", "ticker": ticker, "prices": []})
 
-        prices = [
-            {
-                "date": datetime.utcfromtimestamp(day["t"] / 1000).strftime('%Y-%m-%d'),
-                "open": day.get("o"),
-                "high": day.get("h"),
-                "low": day.get("l"),
-                "close": day.get("c"),
-                "volume": day.get("v", 0)
-            }
-            for day in results
-        ]
+        response_data = {
+            "ticker": ticker,
+            "from": from_date,
+            "to": to_date,
+            "prices": prices,
+            "source": source
+        }
+        if points is not None and len(prices) > points:
+            response_data["prices"] = downsample_prices(prices, points)
+            response_data["downsampled_from"] = len(prices)
+
+        return Response(response_data)
+
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["GET"])
+def get_indicators(request):
+    """
+    Compute technical indicators over historical daily closes
+    Query params:
+        - ticker (e.g., AAPL)
+        - from (e.g., 2023-01-01)
+        - to (e.g., 2023-12-31)
+        - ind (e.g., sma:20,ema:50,rsi:14,macd,bbands:20)
+    """
+    ticker = request.GET.get('ticker', '').upper()
+    from_date = request.GET.get('from')
+    to_date = request.GET.get('to')
+    raw_specs = request.GET.get('ind', '')
+
+    if not ticker or not from_date or not to_date or not raw_specs:
+        return Response(
+            {"error": "ticker, from, to, and ind parameters are required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    start, end = parse_date(from_date), parse_date(to_date)
+    if not start or not end or start > end:
+        return Response(
+            {"error": "from and to must be YYYY-MM-DD dates with from <= to"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        specs = parse_indicator_specs(raw_specs)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    try:
+        result = StockDataService().get_indicators(ticker, start, end, specs)
         return Response({
             "ticker": ticker,
             "from": from_date,
             "to": to_date,
-            "prices": prices,
-            "source": "polygon_api"
+            **result
+        })
+
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Upper bound on symbols accepted by the correlation endpoint
+MAX_CORRELATION_TICKERS = 250
+
+
+@api_view(["GET"])
+def get_correlation(request):
+    """
+    Correlation and covariance matrices of daily log returns
+    Query params:
+        - tickers (e.g., AAPL,MSFT,GOOGL)
+        - from (e.g., 2023-01-01)
+        - to (e.g., 2023-12-31)
+        - min_periods (optional): fewest overlapping returns a pair needs
+    Matrix rows and columns follow the order of "tickers" in the response
+    """
+    raw_tickers = request.GET.get('tickers', '')
+    tickers = list(dict.fromkeys(
+        t.strip().upper() for t in raw_tickers.split(',') if t.strip()
+    ))
+    from_date = request.GET.get('from')
+    to_date = request.GET.get('to')
+
+    if len(tickers) < 2 or not from_date or not to_date:
+        return Response(
+            {"error": "At least two tickers, from, and to parameters are required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if len(tickers) > MAX_CORRELATION_TICKERS:
+        return Response(
+            {"error": f"At most {MAX_CORRELATION_TICKERS} tickers can be requested at once"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    start, end = parse_date(from_date), parse_date(to_date)
+    if not start or not end or start > end:
+        return Response(
+            {"error": "from and to must be YYYY-MM-DD dates with from <= to"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        min_periods = int(request.GET.get('min_periods', 2))
+    except ValueError:
+        return Response(
+            {"error": "min_periods must be an integer"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        stats, errors = StockDataService().get_return_statistics(tickers, start, end, min_periods)
+        return Response({
+            "tickers": stats["tickers"],
+            "from": from_date,
+            "to": to_date,
+            "dates": stats["dates"],
+            "correlation": matrix_to_lists(stats["correlation"]),
+            "covariance": matrix_to_lists(stats["covariance"]),
+            "observations": stats["observations"].tolist(),
+            "errors": errors
         })
 
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(["GET"])
+def get_sector_performance(request):
+    """
+    Sector-level % change for the latest settled session
+    Query parameter: min_count (optional, e.g., ?min_count=3) drops sectors
+    with fewer tickers
+    "sector_performance" maps sector -> mean % change; "sectors" adds the
+    median, market-cap-weighted change and ticker count per sector
+    """
+    try:
+        min_count = max(1, int(request.GET.get('min_count', 1)))
+    except ValueError:
+        return Response(
+            {"error": "min_count must be an integer"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        return Response(StockDataService().get_sector_performance(min_count))
+
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@conditional_cache(financials_version)
 @api_view(["GET"])
 def get_financials(request):
     """
-    Fetch comprehensive financial data from Polygon.io (includes balance sheet, cash flow, income statement)
+    Fetch comprehensive financial data (includes balance sheet, cash flow, income statement),
+    served from the local financials store
     Query params:
         - ticker (e.g., AAPL)
         - limit (optional, default: 4)
@@ -199,20 +469,14 @@ def get_financials(request):
         if timeframe not in valid_timeframes:
             timeframe = 'quarterly'
         
-        polygon_service = StockDataService().polygon_service
-        financial_data = polygon_service.get_financials(ticker, limit, timeframe)
-        
-        if financial_data.get("status") != "OK":
-            return Response(
-                {"error": "Failed to fetch financial data from Polygon.io"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        stock_service = StockDataService()
+        results, source = stock_service.get_financials(ticker, limit, timeframe)
         
         return Response({
             "ticker": ticker,
-            "results": financial_data.get("results", []),
-            "count": financial_data.get("count", 0),
-            "source": "polygon_api"
+            "results": results,
+            "count": len(results),
+            "source": source
         })
         
     except requests.exceptions.HTTPError as e:
@@ -227,22 +491,39 @@ def get_financials(request):
         )
 
 
+# Upper bound on symbols accepted by the multi-ticker news mode
+MAX_NEWS_TICKERS = 100
+
+
+@conditional_cache(news_version)
 @api_view(["GET"])
 def get_news(request):
     """
-    Fetch latest news articles for a stock from Polygon.io
+    Fetch latest news articles for a stock, or merged news for several
     Query params:
-        - ticker (e.g., AAPL)
+        - ticker (e.g., AAPL), or tickers (e.g., AAPL,MSFT,GOOGL) to merge
+          the feeds into one list with each article once
         - limit (optional, default: 5)
     """
     ticker = request.GET.get('ticker', '').upper()
+    raw_tickers = request.GET.get('tickers', '')
     limit = request.GET.get('limit', '5')
+
+    tickers = list(dict.fromkeys(
+        t.strip().upper() for t in raw_tickers.split(',') if t.strip()
+    ))
     
-    if not ticker:
+    if not ticker and not tickers:
         return Response(
             {"error": "Ticker symbol is required"}, 
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    if len(tickers) > MAX_NEWS_TICKERS:
+        return Response(
+            {"error": f"At most {MAX_NEWS_TICKERS} tickers can be requested at once"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
     try:
         # Validate limit
@@ -253,29 +534,53 @@ def get_news(request):
         except ValueError:
             limit = 5
         
-        polygon_service = StockDataService().polygon_service
-        news_data = polygon_service.get_news(ticker, limit)
-        
-        if news_data.get("status") != "OK":
+        stock_service = StockDataService()
+
+        if tickers:
+            results, source, errors = stock_service.get_news(tickers, limit)
+            return Response({
+                "tickers": tickers,
+                "results": results,
+                "count": len(results),
+                "source": source,
+                "errors": errors
+            })
+
+        results, source, errors = stock_service.get_news([ticker], limit)
+        if errors:
             return Response(
-                {"error": "Failed to fetch news data from Polygon.io"},
+                {"error": f"Failed to fetch news data from Polygon.io: {errors[ticker]}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
         return Response({
             "ticker": ticker,
-            "results": news_data.get("results", []),
-            "count": news_data.get("count", 0),
-            "source": "polygon_api"
+            "results": results,
+            "count": len(results),
+            "source": source
         })
         
-    except requests.exceptions.HTTPError as e:
-        return Response(
-            {"error": f"API request failed: {str(e)}"}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
     except Exception as e:
         return Response(
             {"error": f"An error occurred: {str(e)}"}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(["GET"])
+def get_upstream_stats(request):
+    """
+    Report per-endpoint Polygon.io request and connection-reuse counters
+    (sync and async clients), rate limiter outcomes per priority class,
+    search and quote cache hit/miss counters, and live stream pollers and
+    subscriptions, for this process
+    """
+    limiter = get_rate_limiter()
+    return Response({
+        "polygon": get_polygon_client().stats(),
+        "polygon_async": async_client_stats(),
+        "rate_limit": limiter.stats() if limiter else None,
+        "search_cache": get_search_cache().stats(),
+        "quote_cache": get_quote_cache().stats(),
+        "live": live_stats()
+    })
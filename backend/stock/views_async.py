@@ -0,0 +1,299 @@
+"""
+Async versions of the quote, historical, search, financials and news
+endpoints, plus the live quote stream. They answer with the same payloads
+as the views in views.py, but run on the event loop when served by the
+ASGI application (backend/asgi.py), so requests waiting on Polygon.io do
+not each hold a worker thread.
+"""
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+
+from backend.renderers import dumps
+
+from .bar_store import parse_date
+from .downsampling import downsample_prices
+from .http_cache import conditional_cache, financials_version, historical_version, news_version
+from .live import get_quote_hub
+from .services_async import AsyncStockDataService
+from .views import MAX_BATCH_TICKERS, MAX_NEWS_TICKERS, _format_search_result, _format_stock_data
+import requests
+
+
+def _json(data, status_code=status.HTTP_200_OK):
+    """JSON response rendered like the DRF views' (see backend.renderers)"""
+    return HttpResponse(dumps(data), content_type='application/json', status=status_code)
+
+
+def _error(message, status_code):
+    return _json({"error": message}, status_code)
+
+
+@require_GET
+async def get_stock_data(request):
+    """
+    Fetch stock data for one ticker
+    Query parameter: ticker (e.g., ?ticker=AAPL)
+    """
+    ticker = request.GET.get('ticker', '').upper()
+
+    if not ticker:
+        return _error("Ticker symbol is required", status.HTTP_400_BAD_REQUEST)
+
+    try:
+        stock_data, source, ohlc_data = await AsyncStockDataService().aget_stock_data(ticker)
+        return _json(_format_stock_data(stock_data, source, ohlc_data))
+
+    except ValueError as e:
+        return _error(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception as e:
+        return _error(f"An error occurred: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_GET
+async def search_companies(request):
+    """
+    Search for companies by name
+    Query parameter: q (e.g., ?q=apple)
+    """
+    query = request.GET.get('q', '').strip()
+
+    if not query:
+        return _error("Search query is required", status.HTTP_400_BAD_REQUEST)
+
+    if len(query) < 2:
+        return _error("Search query must be at least 2 characters", status.HTTP_400_BAD_REQUEST)
+
+    try:
+        results = await AsyncStockDataService().asearch_companies(query)
+        formatted_results = [_format_search_result(result) for result in results]
+        return _json({
+            "query": query,
+            "results": formatted_results,
+            "count": len(formatted_results)
+        })
+
+    except ValueError as e:
+        return _error(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception as e:
+        return _error(f"An error occurred: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@conditional_cache(historical_version)
+@require_GET
+async def get_historical_data(request):
+    """
+    Fetch historical daily bars, served from the local bar store and
+    filled from Polygon.io only for dates not fetched before
+    Query params:
+        - ticker (e.g., AAPL)
+        - from (e.g., 2023-01-01)
+        - to (e.g., 2023-01-10)
+        - points (optional, downsample to at most N bars with LTTB)
+    """
+    ticker = request.GET.get('ticker', '').upper()
+    from_date = request.GET.get('from')
+    to_date = request.GET.get('to')
+    points = request.GET.get('points')
+
+    if not ticker or not from_date or not to_date:
+        return _error("ticker, from, and to parameters are required", status.HTTP_400_BAD_REQUEST)
+
+    start, end = parse_date(from_date), parse_date(to_date)
+    if not start or not end or start > end:
+        return _error("from and to must be YYYY-MM-DD dates with from <= to", status.HTTP_400_BAD_REQUEST)
+
+    if points is not None:
+        try:
+            points = int(points)
+        except ValueError:
+            points = 0
+        if points < 3:
+            return _error("points must be an integer of at least 3", status.HTTP_400_BAD_REQUEST)
+
+    try:
+        prices, source = await AsyncStockDataService().aget_historical_data(ticker, start, end)
+
+        if not prices:
+            return _json({"message": "No data found", "ticker": ticker, "prices": []})
+
+        response_data = {
+            "ticker": ticker,
+            "from": from_date,
+            "to": to_date,
+            "prices": prices,
+            "source": source
+        }
+        if points is not None and len(prices) > points:
+            response_data["prices"] = downsample_prices(prices, points)
+            response_data["downsampled_from"] = len(prices)
+
+        return _json(response_data)
+
+    except Exception as e:
+        return _error(str(e), status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@conditional_cache(financials_version)
+@require_GET
+async def get_financials(request):
+    """
+    Fetch financial statements, served from the local financials store
+    Query params:
+        - ticker (e.g., AAPL)
+        - limit (optional, default: 4)
+        - timeframe (optional, default: 'quarterly')
+    """
+    ticker = request.GET.get('ticker', '').upper()
+    limit = request.GET.get('limit', '4')
+    timeframe = request.GET.get('timeframe', 'quarterly')
+
+    if not ticker:
+        return _error("Ticker symbol is required", status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = int(limit)
+        if limit < 1 or limit > 50:
+            limit = 4
+    except ValueError:
+        limit = 4
+
+    if timeframe not in ('quarterly', 'annual'):
+        timeframe = 'quarterly'
+
+    try:
+        results, source = await AsyncStockDataService().aget_financials(ticker, limit, timeframe)
+        return _json({
+            "ticker": ticker,
+            "results": results,
+            "count": len(results),
+            "source": source
+        })
+
+    except requests.exceptions.HTTPError as e:
+        return _error(f"API request failed: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except Exception as e:
+        return _error(f"An error occurred: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@conditional_cache(news_version)
+@require_GET
+async def get_news(request):
+    """
+    Fetch latest news articles for a stock, or merged news for several
+    Query params:
+        - ticker (e.g., AAPL), or tickers (e.g., AAPL,MSFT,GOOGL) to merge
+          the feeds into one list with each article once
+        - limit (optional, default: 5)
+    """
+    ticker = request.GET.get('ticker', '').upper()
+    raw_tickers = request.GET.get('tickers', '')
+    limit = request.GET.get('limit', '5')
+
+    tickers = list(dict.fromkeys(
+        t.strip().upper() for t in raw_tickers.split(',') if t.strip()
+    ))
+
+    if not ticker and not tickers:
+        return _error("Ticker symbol is required", status.HTTP_400_BAD_REQUEST)
+
+    if len(tickers) > MAX_NEWS_TICKERS:
+        return _error(
+            f"At most {MAX_NEWS_TICKERS} tickers can be requested at once", status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        limit = int(limit)
+        if limit < 1 or limit > 50:
+            limit = 5
+    except ValueError:
+        limit = 5
+
+    try:
+        stock_service = AsyncStockDataService()
+
+        if tickers:
+            results, source, errors = await stock_service.aget_news(tickers, limit)
+            return _json({
+                "tickers": tickers,
+                "results": results,
+                "count": len(results),
+                "source": source,
+                "errors": errors
+            })
+
+        results, source, errors = await stock_service.aget_news([ticker], limit)
+        if errors:
+            return _error(
+                f"Failed to fetch news data from Polygon.io: {errors[ticker]}",
+                status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return _json({
+            "ticker": ticker,
+            "results": results,
+            "count": len(results),
+            "source": source
+        })
+
+    except Exception as e:
+        return _error(f"An error occurred: {str(e)}", status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+async def _quote_events(subscription, heartbeat):
+    """Yield SSE messages for a subscription: one "quote" event per changed symbol"""
+    # Reconnect after 5 s if the connection drops
+    yield "retry: 5000\n\n"
+    try:
+        while True:
+            updates = await subscription.get(heartbeat)
+            if not updates:
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+            for fields in updates.values():
+                yield f"event: quote\ndata: {dumps(fields).decode()}\n\n"
+    finally:
+        subscription.close()
+
+
+@require_GET
+async def stream_quotes(request):
+    """
+    Server-sent events stream of live quotes (requires the ASGI server)
+    Query parameter: tickers (e.g., ?tickers=AAPL,MSFT,GOOGL)
+    Each "quote" event carries a ticker's full quote (same fields as
+    /api/stock/data/) the first time, then only the fields that changed.
+    Under WSGI (e.g. runserver) it answers 503 and clients should poll.
+    """
+    raw_tickers = request.GET.get('tickers', '')
+    tickers = list(dict.fromkeys(
+        t.strip().upper() for t in raw_tickers.split(',') if t.strip()
+    ))
+
+    if not tickers:
+        return _error("At least one ticker is required", status.HTTP_400_BAD_REQUEST)
+
+    if len(tickers) > MAX_BATCH_TICKERS:
+        return _error(
+            f"At most {MAX_BATCH_TICKERS} tickers can be requested at once", status.HTTP_400_BAD_REQUEST
+        )
+
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI the never-ending stream would be buffered whole, holding
+        # a worker thread forever; clients poll /api/stock/data/batch/ instead
+        return _error(
+            "Live quotes need the ASGI server (uvicorn backend.asgi:application)",
+            status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    subscription = get_quote_hub(_format_stock_data).subscribe(tickers)
+    response = StreamingHttpResponse(
+        _quote_events(subscription, getattr(settings, 'STOCK_STREAM_HEARTBEAT', 15)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
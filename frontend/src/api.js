@@ -2,7 +2,7 @@ import axios from 'axios';
 import { auth } from './firebase';
 
 // Try proxy first, fallback to direct connection
-const baseURL = import.meta.env.DEV
+export const baseURL = import.meta.env.DEV
     ? '/api'  // Use proxy in development
     : 'http://localhost:8000/api';  // Direct connection fallback
 
@@ -6,6 +6,8 @@ import DatePicker from 'react-datepicker'
 import 'react-datepicker/dist/react-datepicker.css'
 import { api } from '../api'
 
+const MAX_CHART_POINTS = 500
+
 export default function HistoricalChart({ ticker }) {
   const [data, setData] = useState([])
   const [loading, setLoading] = useState(false)
@@ -31,7 +33,8 @@ export default function HistoricalChart({ ticker }) {
     try {
       const fromStr = from.toISOString().split('T')[0]
       const toStr = to.toISOString().split('T')[0]
-      const response = await api.get(`/stock/data/historical/?ticker=${ticker}&from=${fromStr}&to=${toStr}`)
+      // Long ranges are downsampled server-side to what the chart can show
+      const response = await api.get(`/stock/data/historical/?ticker=${ticker}&from=${fromStr}&to=${toStr}&points=${MAX_CHART_POINTS}`)
       setData(response.data.prices?.length > 0 ? response.data.prices : [])
     } catch (err) {
       setError('Failed to load chart data')
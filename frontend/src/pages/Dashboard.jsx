@@ -12,6 +12,9 @@ import HistoricalChart from '../components/HistoricalChart'
 import SummaryModal from '../components/SummaryModal'
 import { fetchSummary } from '../api'
 
+// Mirrors MAX_BATCH_TICKERS in backend/stock/views.py
+const MAX_BATCH_TICKERS = 100
+
 export default function Dashboard() {
     const [ticker, setTicker] = useState('')
     const [stockData, setStockData] = useState(null)
@@ -89,21 +92,28 @@ export default function Dashboard() {
                         setSelectedWatchlistId(response.data[0].id)
                     }
                     
-                    // Fetch prices for watchlist items (limit to first 10 to reduce API calls)
+                    // Fetch prices for all watchlist items in a single batch request
                     const allItems = response.data.flatMap(w => w.items || [])
                     const uniqueTickers = [...new Set(allItems.map(i => i.symbol || i.ticker).filter(Boolean))]
                     
+                    // The batch endpoint takes at most MAX_BATCH_TICKERS symbols per request
+                    const batches = []
+                    for (let i = 0; i < uniqueTickers.length; i += MAX_BATCH_TICKERS) {
+                        batches.push(uniqueTickers.slice(i, i + MAX_BATCH_TICKERS))
+                    }
+
                     const watchlistData = {}
-                    await Promise.all(
-                        uniqueTickers.slice(0, 10).map(async (symbol) => {
-                            try {
-                                const res = await api.get(`/stock/data/?ticker=${symbol}`)
-                                watchlistData[symbol] = res.data
-                            } catch (err) {
-                                console.error(`Failed to fetch ${symbol}:`, err)
-                            }
-                        })
-                    )
+                    await Promise.all(batches.map(async (batch) => {
+                        try {
+                            const res = await api.get(`/stock/data/batch/?tickers=${batch.join(',')}`)
+                            Object.assign(watchlistData, res.data.results || {})
+                            Object.entries(res.data.errors || {}).forEach(([symbol, error]) => {
+                                console.error(`Failed to fetch ${symbol}:`, error)
+                            })
+                        } catch (err) {
+                            console.error('Failed to fetch watchlist prices:', err)
+                        }
+                    }))
                     setWatchlistStocksData(watchlistData)
                 } catch (err) {
                     console.error('Error fetching watchlists:', err)
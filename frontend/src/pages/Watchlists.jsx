@@ -3,10 +3,16 @@ import { useNavigate } from 'react-router-dom'
 import { signOut } from 'firebase/auth'
 import { onAuthStateChanged } from 'firebase/auth'
 import { auth } from '../firebase'
-import { api } from '../api'
+import { api, baseURL } from '../api'
 import UserPersonaSidebar from '../components/UserPersonaSidebar'
 import ChatInterface from '../components/ChatInterface'
 
+// Mirrors MAX_BATCH_TICKERS in backend/stock/views.py
+const MAX_BATCH_TICKERS = 100
+
+// Milliseconds between price refreshes while the live stream is unavailable
+const PRICE_POLL_INTERVAL = 60000
+
 export default function Watchlists() {
     const [user, setUser] = useState(null)
     const [watchlists, setWatchlists] = useState([])
@@ -21,52 +27,52 @@ export default function Watchlists() {
     const [chatOpen, setChatOpen] = useState(false)
     const navigate = useNavigate()
 
-    const fetchPricesForTickers = useCallback(async (tickers) => {
-        setLoadingPrices(prev => {
-            const newState = { ...prev }
-            tickers.forEach(ticker => {
-                newState[ticker] = true
+    const fetchPricesForTickers = useCallback(async (tickers, showLoading = true) => {
+        if (showLoading) {
+            setLoadingPrices(prev => {
+                const newState = { ...prev }
+                tickers.forEach(ticker => {
+                    newState[ticker] = true
+                })
+                return newState
             })
-            return newState
-        })
+        }
 
-        const pricePromises = tickers.map(async (ticker) => {
-            try {
-                const response = await api.get(`/stock/data/?ticker=${ticker}`)
-                return {
-                    ticker,
-                    data: response.data
-                }
-            } catch (err) {
-                console.error(`Error fetching price for ${ticker}:`, err)
-                return {
-                    ticker,
-                    data: null
-                }
-            }
-        })
+        // The batch endpoint takes at most MAX_BATCH_TICKERS symbols per request
+        const batches = []
+        for (let i = 0; i < tickers.length; i += MAX_BATCH_TICKERS) {
+            batches.push(tickers.slice(i, i + MAX_BATCH_TICKERS))
+        }
 
-        const results = await Promise.all(pricePromises)
-        
         const prices = {}
-        results.forEach(({ ticker, data }) => {
-            if (data) {
-                prices[ticker] = {
-                    price: data.current_price,
-                    name: data.name
-                }
+        await Promise.all(batches.map(async (batch) => {
+            try {
+                const response = await api.get(`/stock/data/batch/?tickers=${batch.join(',')}`)
+                Object.entries(response.data.results || {}).forEach(([ticker, data]) => {
+                    prices[ticker] = {
+                        price: data.current_price,
+                        name: data.name
+                    }
+                })
+                Object.entries(response.data.errors || {}).forEach(([ticker, error]) => {
+                    console.error(`Error fetching price for ${ticker}:`, error)
+                })
+            } catch (err) {
+                console.error('Error fetching watchlist prices:', err)
             }
-        })
+        }))
 
         setStockPrices(prev => ({ ...prev, ...prices }))
         
-        setLoadingPrices(prev => {
-            const newState = { ...prev }
-            tickers.forEach(ticker => {
-                newState[ticker] = false
+        if (showLoading) {
+            setLoadingPrices(prev => {
+                const newState = { ...prev }
+                tickers.forEach(ticker => {
+                    newState[ticker] = false
+                })
+                return newState
             })
-            return newState
-        })
+        }
     }, [])
 
     const fetchWatchlists = useCallback(async () => {
@@ -109,6 +115,55 @@ export default function Watchlists() {
         return () => unsubscribe()
     }, [navigate, fetchWatchlists])
 
+    // Live price updates for every watched symbol over server-sent events
+    // streams of up to MAX_BATCH_TICKERS symbols each
+    const watchedTickers = Array.from(new Set(
+        watchlists.flatMap(watchlist => (watchlist.items || []).map(item => item.symbol || item.ticker))
+            .filter(Boolean)
+    )).sort().join(',')
+
+    useEffect(() => {
+        if (!watchedTickers) return
+        const tickers = watchedTickers.split(',')
+        const cleanups = []
+        for (let i = 0; i < tickers.length; i += MAX_BATCH_TICKERS) {
+            const chunk = tickers.slice(i, i + MAX_BATCH_TICKERS)
+            let live = false
+            let opened = false
+            const source = new EventSource(`${baseURL}/stock/async/stream/?tickers=${chunk.join(',')}`)
+            source.onopen = () => {
+                live = true
+                opened = true
+            }
+            // Reconnecting: keep the prices current by polling meanwhile
+            source.onerror = () => {
+                live = false
+                // The stream never opened (the backend is not served over
+                // ASGI) or was given up: stop retrying and rely on the poll
+                if (!opened || source.readyState === EventSource.CLOSED) source.close()
+            }
+            source.addEventListener('quote', (event) => {
+                // Each event carries only the fields that changed
+                const quote = JSON.parse(event.data)
+                setStockPrices(prev => ({
+                    ...prev,
+                    [quote.ticker]: {
+                        price: 'current_price' in quote ? quote.current_price : prev[quote.ticker]?.price,
+                        name: 'name' in quote ? quote.name : prev[quote.ticker]?.name
+                    }
+                }))
+            })
+            const poll = setInterval(() => {
+                if (!live) fetchPricesForTickers(chunk, false)
+            }, PRICE_POLL_INTERVAL)
+            cleanups.push(() => {
+                clearInterval(poll)
+                source.close()
+            })
+        }
+        return () => cleanups.forEach(cleanup => cleanup())
+    }, [watchedTickers, fetchPricesForTickers])
+
     const removeFromWatchlist = async (ticker) => {
         try {
             await api.delete(`/watchlist/remove/${ticker}`)